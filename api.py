@@ -0,0 +1,290 @@
+# API JSON somente leitura (saldos, histórico e série diária) para leitores de
+# código de barras e outras ferramentas internas, sem passar pela página do Streamlit.
+# Cada resposta tem um ETag derivado da versão dos dados: um GET com
+# If-None-Match igual recebe 304 sem corpo nem cálculo.
+# Uso:
+#   python api.py --porta 8502
+#   curl localhost:8502/saldos?setor=Cola
+#   curl localhost:8502/itens/42
+#   curl localhost:8502/itens/42/historico?inicio=2024-05-01&limite=20
+#   curl localhost:8502/itens/42/serie
+#   curl localhost:8502/itens/42/acumulado?pontos=200
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from storage import criar_backend, set_backend
+from utils.estoque_utils import (
+    PAGINA_HISTORICO, calcular_saldo, carregar_dados, carregar_historico, carregar_saldos,
+    carregar_serie_diaria, cache_por_item, obter_indice, preparar_dados_candlestick,
+    preparar_dados_grafico, versao_dados, versao_item
+)
+from utils.normalizacao_utils import como_datetime
+
+MAX_RESPOSTAS = 256
+MAX_LIMITE = 1000
+
+logger = logging.getLogger("estoque.api")
+
+_respostas = OrderedDict()
+_respostas_lock = threading.Lock()
+_cadastro = (None, None)
+
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+def versao_cadastro(items_df):
+    """
+    Hash da tabela de itens (nomes, unidades, setores), calculado uma vez por DataFrame
+    """
+    global _cadastro
+    if _cadastro[0] is not items_df:
+        valores = pd.util.hash_pandas_object(items_df, index=False).to_numpy()
+        _cadastro = (items_df, hashlib.sha1(valores.tobytes()).hexdigest()[:16])
+    return _cadastro[1]
+
+def _etag(*partes):
+    return '"' + hashlib.sha1(repr(partes).encode()).hexdigest()[:32] + '"'
+
+def _registros(df, colunas=None):
+    # DataFrame -> lista de dicts com None no lugar de NaN/NA
+    if colunas is not None:
+        df = df[colunas]
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+def _inteiros(df, colunas):
+    # Quantidades inteiras saem como int no JSON (merge/fillna deixam float)
+    valores = {c: df[c].astype("int64") for c in colunas if c in df.columns and df[c].notna().all() and (df[c] % 1 == 0).all()}
+    return df.assign(**valores) if valores else df
+
+def _quantidade(valor):
+    valor = valor.item() if isinstance(valor, np.generic) else valor
+    return int(valor) if isinstance(valor, float) and valor.is_integer() else valor
+
+def _json_padrao(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, (pd.Timestamp, datetime, date)):
+        return valor.isoformat()
+    return str(valor)
+
+def _item(indice, texto):
+    try:
+        item_id = int(texto)
+    except ValueError:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"Invalid item id: {texto}")
+    if item_id not in indice.nome_item:
+        raise ErroRequisicao(HTTPStatus.NOT_FOUND, f"Item {item_id} not found")
+    return item_id
+
+def _parametro(consulta, nome, converter=str, padrao=None):
+    valores = consulta.get(nome)
+    if not valores:
+        return padrao
+    try:
+        return converter(valores[-1])
+    except ValueError:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"Invalid value for '{nome}': {valores[-1]}")
+
+def _data(texto):
+    return datetime.strptime(texto, "%Y-%m-%d").date()
+
+def _saldos(indice, transactions_df, setor=None):
+    itens = indice.itens(setor)
+    saldo_df = calcular_saldo(itens, transactions_df, carregar_saldos(transactions_df))
+    colunas = [c for c in ["id", "name", "unit", "sector"] if c in saldo_df.columns]
+    return _registros(_inteiros(saldo_df.rename(columns={"Saldo Atual": "saldo"}), ["saldo"]), colunas + ["saldo"])
+
+def _item_detalhe(indice, item_id):
+    # Saldo somando só as transações do item: a resposta depende só dele (e o ETag também)
+    linha = indice.items_df.loc[indice.items_df["id"] == item_id]
+    colunas = [c for c in ["id", "name", "unit", "sector"] if c in linha.columns]
+    return {**_registros(linha, colunas)[0], "saldo": _quantidade(indice.saldo_item(item_id))}
+
+def _historico(item_id, consulta):
+    inicio = _parametro(consulta, "inicio", _data)
+    fim = _parametro(consulta, "fim", _data)
+    limite = min(_parametro(consulta, "limite", int, PAGINA_HISTORICO), MAX_LIMITE)
+    deslocamento = _parametro(consulta, "deslocamento", int, 0)
+    if limite < 1 or deslocamento < 0:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "'limite' must be positive and 'deslocamento' not negative")
+
+    df = carregar_historico(item_id, inicio, fim, limite, deslocamento)
+    colunas = [c for c in ["id", "amount", "transaction_type", "observation", "author", "timestamp"] if c in df.columns]
+    if not df.empty:
+        df = df.assign(timestamp=como_datetime(df["timestamp"]))
+    return {"item": item_id, "limite": limite, "deslocamento": deslocamento, "transacoes": _registros(df, colunas)}
+
+def _serie(indice, item_id):
+    # Mesmo cache dos candles da página: recalculado só quando o item muda
+    candles = cache_por_item(
+        item_id,
+        'candles',
+        lambda: preparar_dados_candlestick(indice.items_df, indice.transacoes_item(item_id), [item_id]),
+        indice.transactions_df
+    )
+    serie = candles.assign(date=candles["date"].dt.strftime("%Y-%m-%d")) if not candles.empty else candles
+    return {"item": item_id, "dias": _registros(_inteiros(serie, ["open", "high", "low", "close"]), ["date", "open", "high", "low", "close"])}
+
+def _acumulado(indice, item_id, consulta):
+    # Saldo no fim de cada dia com movimento; agregado no banco quando há a view/RPC.
+    # Com `pontos`, reduzido com LTTB a no máximo esse número de dias.
+    pontos = _parametro(consulta, "pontos", int)
+    if pontos is not None and pontos < 3:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "'pontos' must be at least 3")
+    serie = preparar_dados_grafico(
+        indice.items_df, indice.transacoes_item(item_id), item_id, carregar_serie_diaria(item_id), pontos
+    )
+    if serie.empty:
+        return {"item": item_id, "dias": []}
+    saldos = serie.iloc[:, 0]
+    dias = pd.DataFrame({"date": saldos.index.strftime("%Y-%m-%d"), "saldo": saldos.to_numpy()})
+    return {"item": item_id, "dias": _registros(_inteiros(dias, ["saldo"]))}
+
+def responder(caminho, consulta):
+    """
+    Resolve uma rota: retorna (etag, calcular), onde `calcular()` monta o
+    corpo da resposta. O ETag sai só das versões, sem calcular nada.
+    """
+    items_df, transactions_df, people_df, projects_df = carregar_dados()
+    indice = obter_indice(items_df, transactions_df, people_df, projects_df)
+    cadastro = versao_cadastro(items_df)
+    partes = [p for p in caminho.split("/") if p]
+    chave_consulta = sorted((k, tuple(v)) for k, v in consulta.items())
+
+    # Versões dos dados lidos acima (não das atuais): um corpo nunca fica sob o ETag de outros dados.
+    # None: dados antigos demais para saber a versão; responde sem ETag nem cache.
+    if partes == ["saldos"]:
+        setor = _parametro(consulta, "setor")
+        if setor not in (None, "Todos") and setor not in indice.linhas_por_setor:
+            raise ErroRequisicao(HTTPStatus.NOT_FOUND, f"Sector {setor} not found")
+        versao = versao_dados(transactions_df)
+        return (
+            _etag(partes, chave_consulta, versao, cadastro) if versao is not None else None,
+            lambda: {"setor": setor, "itens": _saldos(indice, transactions_df, setor)}
+        )
+    if partes == ["setores"]:
+        return _etag(partes, cadastro), lambda: {"setores": sorted(map(str, indice.linhas_por_setor))}
+
+    if len(partes) in (2, 3) and partes[0] == "itens":
+        item_id = _item(indice, partes[1])
+        rota = partes[2] if len(partes) == 3 else None
+        calcular = {
+            None: lambda: _item_detalhe(indice, item_id),
+            "historico": lambda: _historico(item_id, consulta),
+            "serie": lambda: _serie(indice, item_id),
+            "acumulado": lambda: _acumulado(indice, item_id, consulta),
+        }.get(rota)
+        if calcular is not None:
+            # Só as transações deste item contam: escritas em outros itens não mudam o ETag
+            versao = versao_item(item_id, transactions_df)
+            if versao is None:
+                return None, calcular
+            return _etag(partes, chave_consulta, versao, cadastro), calcular
+
+    raise ErroRequisicao(HTTPStatus.NOT_FOUND, f"Unknown path: {caminho}")
+
+def _corpo(etag, calcular):
+    # Corpo já serializado por ETag: polls sem If-None-Match também não recalculam
+    if etag is None:
+        return json.dumps(calcular(), default=_json_padrao, ensure_ascii=False).encode("utf-8")
+    with _respostas_lock:
+        if etag in _respostas:
+            _respostas.move_to_end(etag)
+            return _respostas[etag]
+    corpo = json.dumps(calcular(), default=_json_padrao, ensure_ascii=False).encode("utf-8")
+    with _respostas_lock:
+        _respostas[etag] = corpo
+        while len(_respostas) > MAX_RESPOSTAS:
+            _respostas.popitem(last=False)
+    return corpo
+
+def _etag_confere(cabecalho, etag):
+    if not cabecalho:
+        return False
+    if cabecalho.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    return etag in (re.sub(r"^W/", "", valor.strip()) for valor in cabecalho.split(","))
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "EstoqueAPI/1.0"
+
+    def do_GET(self):
+        self._responder(com_corpo=True)
+
+    def do_HEAD(self):
+        self._responder(com_corpo=False)
+
+    def _responder(self, com_corpo):
+        url = urlsplit(self.path)
+        try:
+            etag, calcular = responder(url.path, parse_qs(url.query))
+            if etag is not None and _etag_confere(self.headers.get("If-None-Match"), etag):
+                self._enviar(HTTPStatus.NOT_MODIFIED, None, etag)
+                return
+            self._enviar(HTTPStatus.OK, _corpo(etag, calcular), etag, com_corpo)
+        except ErroRequisicao as e:
+            self._enviar(e.status, json.dumps({"erro": str(e)}).encode("utf-8"), com_corpo=com_corpo)
+        except Exception as e:
+            print(f"Error handling {self.path}: {str(e)}")
+            self._enviar(HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({"erro": str(e)}).encode("utf-8"), com_corpo=com_corpo)
+
+    def _enviar(self, status, corpo, etag=None, com_corpo=True):
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            # Pode guardar, mas sempre revalidar (If-None-Match)
+            self.send_header("Cache-Control", "no-cache")
+        if corpo is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        if corpo is not None and com_corpo:
+            self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        # Leitores fazem polling: acesso só no nível debug
+        logger.debug("%s - %s", self.address_string(), formato % args)
+
+def criar_servidor(host="127.0.0.1", porta=8502, backend=None):
+    """
+    Cria o servidor HTTP (sem iniciar). Com `backend`, ele passa a ser o
+    backend do processo (ex.: SQLiteBackend em memória nos testes).
+    """
+    if backend is not None:
+        set_backend(backend)
+    return ThreadingHTTPServer((host, porta), ApiHandler)
+
+def main():
+    parser = argparse.ArgumentParser(description="API JSON somente leitura de saldos, histórico e série diária.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8502)
+    parser.add_argument("--backend", default=None, help="supabase, postgres ou sqlite (padrão: ESTOQUE_BACKEND)")
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.host, args.porta, criar_backend(args.backend) if args.backend else None)
+    print(f"Serving on http://{args.host}:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,107 +1,34 @@
 import streamlit as st
-from utils.estoque_utils import carregar_dados, mostrar_estoque, mostrar_movimentacoes, criar_movimentacao, calcular_saldo, preparar_dados_grafico
-from fpdf import FPDF
-import io
-from datetime import datetime
+from utils.estoque_utils import carregar_dados, obter_indice, mostrar_estoque, mostrar_movimentacoes, carregar_historico, PAGINA_HISTORICO, registrar_movimentacao, estado_fila, aguardar_envio, reenviar_movimentacoes_com_erro, aplicar_movimentacoes, preparar_dados_candlestick, cache_por_item, carregar_saldos, saldos_em, versao_dados, validar_movimentacoes, criar_movimentacoes_em_lote, ler_arquivo_movimentacoes
+from utils.relatorio_utils import gerar_pdf, preparar_relatorio
+from utils.normalizacao_utils import como_datetime
+from utils.desempenho_utils import iniciar_execucao, registrar, mostrar_painel_desempenho
+from utils.grafico_utils import PONTOS_GRAFICO, reduzir_candles, figura_candles
+from datetime import datetime, timedelta
 import pytz
+import time
+import uuid
 import pandas as pd
-import os
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
-from streamlit_echarts import st_echarts
+from storage import aquecer_em_segundo_plano
 
-def gerar_pdf(transacoes_hoje, relatorio):
-    pdf = FPDF(orientation='L')  # Set landscape orientation
-    pdf.add_page()
-    
-    # Get page width (now using landscape dimensions)
-    page_width = pdf.w - 2 * pdf.l_margin
-    
-    # Use built-in font instead of Arial
-    pdf.set_font("Helvetica", style="B", size=12)
-    
-    # Movimentações do Dia primeiro
-    pdf.cell(page_width, 10, txt="Movimentações do Dia", ln=True, align="C")
-    pdf.ln(5)
-    pdf.set_font("Helvetica", style="B", size=12)
-    
-    # Calculate column widths based on page width
-    col_widths = {
-        "Data/Hora": page_width * 0.2,
-        "Quantidade": page_width * 0.15,
-        "Nome do Item": page_width * 0.3,
-        "Tipo": page_width * 0.15,
-        "Observação": page_width * 0.2
-    }
-    
-    # Draw header
-    pdf.cell(col_widths["Data/Hora"], 10, "Data/Hora", border=1, align="C")
-    pdf.cell(col_widths["Quantidade"], 10, "Quantidade", border=1, align="C")
-    pdf.cell(col_widths["Nome do Item"], 10, "Nome do Item", border=1, align="C")
-    pdf.cell(col_widths["Tipo"], 10, "Tipo", border=1, align="C")
-    pdf.cell(col_widths["Observação"], 10, "Observação", border=1, align="C", ln=True)
-    
-    pdf.set_font("Helvetica", size=12)
-    # Sort transactions in reverse order (most recent first)
-    for _, row in transacoes_hoje.sort_values(by="Data/Hora", ascending=False).iterrows():
-        # Clean and encode text to handle special characters
-        data_hora = str(row["Data/Hora"]).encode('latin1', 'replace').decode('latin1')
-        quantidade = str(row["Quantidade"]).encode('latin1', 'replace').decode('latin1')
-        nome_item = str(row["Nome do Item"])[0:30].encode('latin1', 'replace').decode('latin1')
-        tipo = str(row["Tipo de Movimentação"]).encode('latin1', 'replace').decode('latin1')
-        obs = str(row.get("Observação", ""))[0:30].encode('latin1', 'replace').decode('latin1')
-        
-        pdf.cell(col_widths["Data/Hora"], 10, data_hora, border=1, align="C")
-        pdf.cell(col_widths["Quantidade"], 10, quantidade, border=1, align="C")
-        pdf.cell(col_widths["Nome do Item"], 10, nome_item, border=1, align="C")
-        pdf.cell(col_widths["Tipo"], 10, tipo, border=1, align="C")
-        pdf.cell(col_widths["Observação"], 10, obs, border=1, align="C", ln=True)
-    
-    pdf.ln(10)
-    
-    # Estoque Atual depois
-    pdf.set_font("Helvetica", style="B", size=12)
-    pdf.cell(page_width, 10, txt="Relatório Diário de Estoque", ln=True, align="C")
-    pdf.ln(5)
-    
-    # Calculate column widths for stock report
-    stock_col_widths = {
-        "Nome": page_width * 0.5,
-        "Unidade": page_width * 0.25,
-        "Saldo Atual": page_width * 0.25
-    }
-    
-    # Draw header
-    pdf.cell(stock_col_widths["Nome"], 10, "Nome", border=1, align="C")
-    pdf.cell(stock_col_widths["Unidade"], 10, "Unidade", border=1, align="C")
-    pdf.cell(stock_col_widths["Saldo Atual"], 10, "Saldo Atual", border=1, align="C", ln=True)
-    
-    pdf.set_font("Helvetica", size=12)
-    # Group items by section
-    for section, group in relatorio.groupby("Setor"):
-        # Add section header
-        pdf.set_font("Helvetica", style="B", size=12)
-        pdf.cell(page_width, 10, f"Setor: {section}", ln=True)
-        pdf.set_font("Helvetica", size=12)
-        
-        for _, row in group.iterrows():
-            # Clean and encode text to handle special characters
-            nome = str(row["Nome"]).encode('latin1', 'replace').decode('latin1')
-            unidade = str(row["Unidade"]).encode('latin1', 'replace').decode('latin1')
-            saldo = str(row["Saldo Atual"]).encode('latin1', 'replace').decode('latin1')
-            
-            pdf.cell(stock_col_widths["Nome"], 10, nome, border=1, align="C")
-            pdf.cell(stock_col_widths["Unidade"], 10, unidade, border=1, align="C")
-            pdf.cell(stock_col_widths["Saldo Atual"], 10, saldo, border=1, align="C", ln=True)
-        
-        pdf.ln(5)  # Add some space between sections
-    
-    pdf_bytes = pdf.output(dest='S').encode('latin1')
-    pdf_buffer = io.BytesIO(pdf_bytes)
-    return pdf_buffer
+# Intervalos do gráfico do item (dias até hoje; None = histórico inteiro)
+PERIODOS_GRAFICO = {"1 mês": 31, "3 meses": 92, "1 ano": 366, "Tudo": None}
+
+# Conectar ao banco enquanto o resto da página é montado
+aquecer_em_segundo_plano()
+
+@st.cache_data(max_entries=4, show_spinner="Gerando relatório...")
+def gerar_relatorio_pdf(versao, dia, _items_df, _transactions_df, _saldos_df, _acumulados=None):
+    # Cacheado pela versão dos dados e pelo dia; os DataFrames (prefixo _) não entram no hash
+    if dia < datetime.now(pytz.timezone('America/Sao_Paulo')).date():
+        # Relatório de um dia passado: estoque no fim daquele dia
+        _saldos_df = saldos_em(_transactions_df, dia, _acumulados)
+    transacoes_hoje, relatorio = preparar_relatorio(_items_df, _transactions_df, _saldos_df, dia)
+    return gerar_pdf(transacoes_hoje, relatorio, dia).getvalue()
 
 def main():
+    # Medições de tempo deste rerun (painel lateral com ESTOQUE_PERF=1)
+    iniciar_execucao()
     st.title("Touché | Estoque")
     
     # Initialize session state for selected sector
@@ -156,15 +83,19 @@ def main():
 
     # Carregar dados
     items_df, transactions_df, people_df, projects_df = carregar_dados()
+    # Posições por item/setor e nome -> id, montados uma vez por versão dos dados
+    indice = obter_indice(items_df, transactions_df, people_df, projects_df)
+    # Saldos agregados no banco (None se indisponível: calcula localmente)
+    saldos_servidor = carregar_saldos(transactions_df)
+    # Dados sem o filtro de setor, para o relatório
+    items_df_full, transactions_df_full = items_df, transactions_df
 
     # Filtrar visualização pelo setor
-    if setor != "Todos":
-        items_df = items_df[items_df["sector"] == setor]
-        item_ids = set(items_df["id"])
-        transactions_df = transactions_df[transactions_df["item"].isin(item_ids)]
+    items_df = indice.itens(setor)
+    transactions_df = indice.transacoes_setor(setor)
 
     # Move item selection here, before the first table
-    item_options = {row["name"]: row["id"] for _, row in items_df.iterrows()}
+    item_options = indice.opcoes_itens(setor)
     
     # Reset selected item if it's not in the current sector's items
     if 'selected_item' in st.session_state and st.session_state.selected_item not in item_options:
@@ -177,120 +108,63 @@ def main():
             key="item_selector",
             index=list(item_options.keys()).index(st.session_state.selected_item) if 'selected_item' in st.session_state else 0
         )
-        # Get current amount for selected item
-        saldo_df = calcular_saldo(items_df, transactions_df)
-        current_amount = saldo_df[saldo_df['name'] == selected_item]['Saldo Atual'].iloc[0]
-        st.markdown(f"Quantidade em estoque atualmente: **{current_amount}**")
-
         # Use the selected item from the single selector
         selected_item_id = item_options[selected_item]
+
+        # Get current amount for selected item
+        current_amount = indice.saldo_item(selected_item_id, saldos_servidor)
+        st.markdown(f"Quantidade em estoque atualmente: **{current_amount}**")
         
-        dados_grafico = preparar_dados_grafico(items_df, transactions_df, selected_item_id)
-        
-        # Filter data for the specific selected item
-        if selected_item and not dados_grafico.empty:
-            dados_grafico = dados_grafico[[selected_item]]
+        # Abertura/máxima/mínima/fechamento diários do item
+        candles = cache_por_item(
+            selected_item_id,
+            'candles',
+            lambda: preparar_dados_candlestick(items_df, indice.transacoes_item(selected_item_id), [selected_item_id]),
+            indice.transactions_df
+        )
         
-        if not dados_grafico.empty:
-            # Reset index to make date a column
-            dados_grafico = dados_grafico.reset_index()
-            
-            # Format dates for display
-            dados_grafico['date'] = pd.to_datetime(dados_grafico['date']).dt.strftime('%d/%m/%Y')
-            
-            # Get today's date in the same format
-            hoje = datetime.now(pytz.timezone('America/Sao_Paulo')).strftime('%d/%m/%Y')
-            
-            # Replace last date with "Hoje" only if it matches today's date
-            dates = dados_grafico['date'].tolist()
-            if dates and dates[-1] == hoje:
-                dates[-1] = "Hoje"
-            
-            # Prepare data for candlestick
-            values = dados_grafico[dados_grafico.columns[1]].values.astype(float).tolist()
-            candlestick_data = []
-            for i in range(len(values)):
-                if i == 0:
-                    # For first point: [open, close, min, max]
-                    candlestick_data.append([0, values[i], 0, values[i]])
-                else:
-                    # For other points: [previous close, current close, min(prev,current), max(prev,current)]
-                    candlestick_data.append([
-                        values[i-1],
-                        values[i],
-                        min(values[i-1], values[i]),
-                        max(values[i-1], values[i])
-                    ])
+        if not candles.empty:
+            # Período visível; candles agregados por semana/mês quando não cabem em PONTOS_GRAFICO
+            periodo_grafico = st.radio("Período", list(PERIODOS_GRAFICO), index=len(PERIODOS_GRAFICO) - 1, horizontal=True, key="periodo_grafico")
+            hoje = datetime.now(pytz.timezone('America/Sao_Paulo')).date()
+            dias_visiveis = PERIODOS_GRAFICO[periodo_grafico]
+            inicio_visivel = hoje - timedelta(days=dias_visiveis) if dias_visiveis else None
+            candles_grafico, periodo = cache_por_item(
+                selected_item_id,
+                ('candles_grafico', inicio_visivel, PONTOS_GRAFICO),
+                lambda: reduzir_candles(candles, inicio_visivel),
+                indice.transactions_df
+            )
             
             try:
-                # Convert data for Plotly
-                opens = [float(data[0]) for data in candlestick_data]
-                closes = [float(data[1]) for data in candlestick_data]
-                lows = [float(data[2]) for data in candlestick_data]
-                highs = [float(data[3]) for data in candlestick_data]
-                
-                # Create hover text
-                hover_texts = [
-                    f"Data: {date}<br>" +
-                    f"Início do dia: {open_val:.0f}<br>" +
-                    f"Final do dia: {close_val:.0f}"
-                    for date, open_val, close_val, low_val, high_val 
-                    in zip(dates, opens, closes, lows, highs)
-                ]
-                
-                # Create Plotly candlestick chart
-                fig = go.Figure()
-                fig.add_trace(go.Candlestick(
-                    x=dates,
-                    open=opens,
-                    high=highs,
-                    low=lows,
-                    close=closes,
-                    name='Quantidade',
-                    increasing=dict(line=dict(color='#91cc75')),  # green for increase
-                    decreasing=dict(line=dict(color='#ee6666')),  # red for decrease
-                    text=hover_texts,
-                    hoverinfo='text'
-                ))
-                
-                # Update layout
-                fig.update_layout(
-                    plot_bgcolor='white',
-                    xaxis=dict(
-                        showgrid=True,
-                        gridwidth=1,
-                        gridcolor='rgba(128,128,128,0.2)',
-                        showline=True,
-                        linewidth=1,
-                        linecolor='rgba(128,128,128,0.2)',
-                        rangeslider=dict(visible=False)  # Remove the range slider
-                    ),
-                    yaxis=dict(
-                        title='Quantidade',
-                        showgrid=True,
-                        gridwidth=1,
-                        gridcolor='rgba(128,128,128,0.2)',
-                        showline=True,
-                        linewidth=1,
-                        linecolor='rgba(128,128,128,0.2)'
-                    ),
-                    margin=dict(l=40, r=40, t=40, b=40)
-                )
-                
+                inicio_grafico = time.perf_counter()
+                fig = figura_candles(candles_grafico, periodo, hoje)
+                registrar("montar_grafico", time.perf_counter() - inicio_grafico, pontos=len(candles_grafico), periodo=periodo)
+
                 # Display the plot
+                inicio_grafico = time.perf_counter()
                 st.plotly_chart(fig, use_container_width=True)
+                registrar("enviar_grafico", time.perf_counter() - inicio_grafico, pontos=len(candles_grafico), periodo=periodo)
             except Exception as e:
                 st.error(f"Erro ao criar o gráfico: {str(e)}")
-                st.write("Dados do gráfico:", candlestick_data)
+                st.write("Dados do gráfico:", candles)
             
             # Add transaction history table
             st.subheader(f"Histórico de {selected_item.lower()}")
             
-            # Get transactions for the selected item
-            item_transactions = transactions_df[transactions_df['item'] == selected_item_id].copy()
+            # Get transactions for the selected item: as mais recentes primeiro, páginas mais antigas sob demanda
+            paginas_historico = st.session_state.setdefault('paginas_historico', {})
+            paginas = paginas_historico.get(selected_item_id, 1)
+            item_transactions = pd.concat([
+                carregar_historico(selected_item_id, limite=PAGINA_HISTORICO, deslocamento=pagina * PAGINA_HISTORICO)
+                for pagina in range(paginas)
+            ], ignore_index=True)
+            tem_mais = len(item_transactions) == paginas * PAGINA_HISTORICO
             if not item_transactions.empty:
+                # Inserções novas deslocam as páginas: não repetir linhas
+                item_transactions = item_transactions.drop_duplicates('id')
                 # Convert timestamp to datetime and format
-                item_transactions['timestamp'] = pd.to_datetime(item_transactions['timestamp'])
+                item_transactions['timestamp'] = como_datetime(item_transactions['timestamp'])
                 item_transactions = item_transactions.sort_values('timestamp', ascending=False)
                 item_transactions['timestamp'] = item_transactions['timestamp'].dt.strftime("%d/%m/%Y %H:%M:%S")
                 
@@ -350,14 +224,25 @@ def main():
                     hide_index=True,
                     use_container_width=True
                 )
+
+                if tem_mais and st.button("Carregar mais", key=f"carregar_mais_{selected_item_id}", use_container_width=True):
+                    paginas_historico[selected_item_id] = paginas + 1
+                    st.rerun()
             else:
                 st.info("Nenhuma movimentação encontrada para este item.")
             
             st.session_state.selected_item = selected_item
 
     # 2. List of items
-    st.subheader(f"Estoque atual de todos os itens de {setor.lower()}")
-    mostrar_estoque(items_df, transactions_df)
+    hoje = datetime.now(pytz.timezone('America/Sao_Paulo')).date()
+    dia_estoque = st.date_input("Estoque em", value=hoje, max_value=hoje, format="DD/MM/YYYY", key="dia_estoque")
+    if dia_estoque < hoje:
+        st.subheader(f"Estoque em {dia_estoque:%d/%m/%Y} de todos os itens de {setor.lower()}")
+        # Estoque no fim do dia escolhido (auditorias)
+        mostrar_estoque(items_df, transactions_df, saldos_em(transactions_df_full, dia_estoque, indice.acumulados))
+    else:
+        st.subheader(f"Estoque atual de todos os itens de {setor.lower()}")
+        mostrar_estoque(items_df, transactions_df, saldos_servidor)
 
     # 4. Register transaction
     st.subheader("Registrar nova movimentação")
@@ -369,7 +254,7 @@ def main():
         )
 
         # Project selection is now OUTSIDE the form to allow for immediate refresh
-        project_options = {row["name"]: row["id"] for _, row in projects_df.iterrows()}
+        project_options = indice.projeto_por_nome
         project_list = ["Nenhum"] + list(project_options.keys())
         selected_project = st.selectbox(
             "Projeto",
@@ -385,7 +270,7 @@ def main():
             
             with col2:
                 # Author selection
-                author_options = {row["name"]: row["id"] for _, row in people_df.iterrows()}
+                author_options = indice.pessoa_por_nome
                 selected_author = st.selectbox(
                     "Autor",
                     options=list(author_options.keys()),
@@ -414,60 +299,96 @@ def main():
                 tipo = "Entrada" if movimento_tipo == "Contagem inicial" else movimento_tipo
                 obs = observacao
                 
-                criar_movimentacao(
+                registrada = registrar_movimentacao(
                     item_options[selected_item],
                     quantidade,
                     tipo,
                     obs,
                     author_options[selected_author]
                 )
-                st.toast("Movimentação registrada com sucesso!", icon="✅")
-                # Reload transaction history
+                # Com a fila local, o envio ao banco acontece em segundo plano:
+                # esperar um pouco para o rerun já mostrar a movimentação nos saldos
+                envio = aguardar_envio(registrada)
+                if envio == "enviada":
+                    st.toast("Movimentação registrada com sucesso!", icon="✅")
+                elif envio == "erro":
+                    st.toast("Movimentação registrada, mas o banco a recusou. Veja o envio ao banco.", icon="⚠️")
+                else:
+                    st.toast("Movimentação registrada! Enviando ao banco...", icon="⏳")
+                # A linha gravada é aplicada aos dados em memória: o rerun só redesenha
                 st.rerun()
 
+        # Estado do envio das movimentações registradas neste servidor
+        fila = estado_fila()
+        if fila is not None and fila["recentes"]:
+            titulo = f"Envio ao banco: {fila['pendentes']} pendente(s)"
+            if fila["com_erro"]:
+                titulo += f", {fila['com_erro']} com erro"
+            with st.expander(titulo, expanded=fila["pendentes"] > 0 or fila["com_erro"] > 0):
+                estados = {"enviada": "Enviada", "pendente": "Pendente", "erro": "Erro"}
+                recentes = pd.DataFrame([{
+                    "Data/Hora": como_datetime(pd.Series([m["dados"]["timestamp"]])).dt.strftime("%d/%m/%Y %H:%M:%S").iloc[0],
+                    "Item": indice.nome_item.get(m["dados"]["item"], m["dados"]["item"]),
+                    "Qtd": m["dados"]["amount"],
+                    "Estado": estados.get(m["estado"], m["estado"]),
+                    "Tentativas": m["tentativas"],
+                    "Erro": m["erro"] or "",
+                } for m in fila["recentes"]])
+                st.dataframe(recentes, hide_index=True, use_container_width=True)
+                if fila["com_erro"] and st.button(f"Reenviar {fila['com_erro']} movimentação(ões) com erro", use_container_width=True):
+                    reenviar_movimentacoes_com_erro()
+                    st.rerun()
+                if fila["pendentes"] and st.button("Atualizar estado do envio", use_container_width=True):
+                    st.rerun()
+
+        # Importação em lote (contagens físicas, entregas de fornecedores)
+        with st.expander("Importar movimentações em lote (CSV/XLSX)"):
+            st.caption("Colunas: item (id), quantidade, tipo (Entrada, Saída ou Contagem inicial) e, opcionalmente, observacao e autor (id).")
+            # Chave nova a cada importação: o uploader volta vazio depois do rerun
+            envio = st.session_state.setdefault("importacao_envio", 0)
+            arquivo = st.file_uploader("Arquivo", type=["csv", "xlsx"], key=f"importacao_movimentacoes_{envio}")
+            if arquivo is not None:
+                # Um id por arquivo enviado: tentar de novo o mesmo envio não duplica,
+                # enviar o mesmo conteúdo outra vez (nova entrega, nova contagem) grava de novo
+                importacoes = st.session_state.setdefault("importacoes", {})
+                importacao = importacoes.setdefault(arquivo.file_id, str(uuid.uuid4()))
+                lote = ler_arquivo_movimentacoes(arquivo)
+                st.dataframe(lote, hide_index=True, use_container_width=True)
+                erros = validar_movimentacoes(lote, items_df_full, people_df)
+                if not erros.empty:
+                    st.error(f"{len(erros)} problema(s) encontrado(s) no arquivo:")
+                    st.dataframe(erros, hide_index=True, use_container_width=True)
+                elif st.button(f"Importar {len(lote)} movimentações", use_container_width=True):
+                    inseridas, novas = criar_movimentacoes_em_lote(lote, items_df_full, people_df, importacao)
+                    aplicar_movimentacoes(inseridas)
+                    importacoes.pop(arquivo.file_id, None)
+                    st.session_state.importacao_envio = envio + 1
+                    if novas == len(inseridas):
+                        st.toast(f"{novas} movimentações importadas com sucesso!", icon="✅")
+                    else:
+                        st.toast(f"{novas} movimentações importadas; {len(inseridas) - novas} já tinham sido gravadas na tentativa anterior.", icon="✅")
+                    st.rerun()
+
     # 6. Export daily report
-    # Carregar dados novamente sem filtro para o relatório
-    items_df_full, transactions_df_full, _, _ = carregar_dados()
-    saldo_df = calcular_saldo(items_df_full, transactions_df_full)
-    relatorio = saldo_df[["name", "unit", "Saldo Atual", "sector"]].rename(columns={
-        "name": "Nome", 
-        "unit": "Unidade",
-        "sector": "Setor"
-    })
-    
-    # Initialize empty DataFrame for transactions if none exist
-    if transactions_df_full.empty:
-        transacoes_hoje = pd.DataFrame(columns=["Data/Hora", "Quantidade", "Nome do Item", "Tipo de Movimentação", "Observação"])
-    else:
-        # Join transactions with items to get names for the report
-        transactions_df_full = pd.merge(transactions_df_full, items_df_full[["id", "name"]], left_on="item", right_on="id", how="left")
-        
-        # Renomear colunas para português antes de filtrar transações do dia
-        colunas_pt = {
-            "timestamp": "Data/Hora",
-            "amount": "Quantidade",
-            "name": "Nome do Item",
-            "transaction_type": "Tipo de Movimentação",
-            "observation": "Observação"
-        }
-        transacoes_hoje = transactions_df_full.rename(columns=colunas_pt).copy()
-        
-        # Filtrar transações do dia atual
-        hoje = datetime.now(pytz.timezone('America/Sao_Paulo')).date()
-        transacoes_hoje["Data/Hora"] = pd.to_datetime(transacoes_hoje["Data/Hora"], format='ISO8601')
-        transacoes_hoje = transacoes_hoje[transacoes_hoje["Data/Hora"].dt.date == hoje]
-        if not transacoes_hoje.empty:
-            transacoes_hoje["Data/Hora"] = transacoes_hoje["Data/Hora"].dt.strftime("%d/%m/%Y %H:%M:%S")
+    # Usa os dados completos (sem filtro de setor) e só gera o PDF quando pedido
+    dia_relatorio = st.date_input("Dia do relatório", value=hoje, max_value=hoje, format="DD/MM/YYYY", key="dia_relatorio")
+    # O pedido vale para estes dados e este dia: mudou um dos dois, pede de novo
+    chave_relatorio = (versao_dados(), dia_relatorio)
+    if st.button("Gerar relatório do dia", use_container_width=True):
+        st.session_state.relatorio_solicitado = chave_relatorio
+
+    if st.session_state.get('relatorio_solicitado') == chave_relatorio:
+        pdf_bytes = gerar_relatorio_pdf(versao_dados(), dia_relatorio, items_df_full, transactions_df_full, saldos_servidor, indice.acumulados)
+        now_str = datetime.now().strftime("%Y-%m-%d_%H-%M")
+        st.download_button(
+            label="Exportar estoque atual + transações do dia",
+            data=pdf_bytes,
+            file_name=f"relatorio_estoque_{now_str}.pdf",
+            mime="application/pdf",
+            use_container_width=True
+        )
 
-    pdf_buffer = gerar_pdf(transacoes_hoje, relatorio)
-    now_str = datetime.now().strftime("%Y-%m-%d_%H-%M")
-    st.download_button(
-        label="Exportar estoque atual + transações do dia",
-        data=pdf_buffer,
-        file_name=f"relatorio_estoque_{now_str}.pdf",
-        mime="application/pdf",
-        use_container_width=True
-    )
+    mostrar_painel_desempenho()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
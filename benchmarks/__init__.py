@@ -0,0 +1 @@
+# Benchmarks de desempenho: gerador de dados sintéticos e medições das funções principais
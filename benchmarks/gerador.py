@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+SETORES = ["Serigrafia", "Papelão", "Papéis", "Cola", "Outros"]
+UNIDADES = ["un", "kg", "m", "L", "cx"]
+TIMEZONE_OFFSET = "-03:00"
+
+def gerar_dados(n_transacoes, n_itens=200, n_pessoas=20, n_projetos=30, dias=730, seed=42, fim=None):
+    """
+    Gera um almoxarifado sintético e reprodutível (mesma seed, mesmos dados).
+
+    Retorna um dict com DataFrames items, people, projects e transactions no
+    mesmo formato das tabelas do Supabase (timestamps em ISO com offset local).
+    """
+    rng = np.random.default_rng(seed)
+
+    items = pd.DataFrame({
+        "id": np.arange(1, n_itens + 1),
+        "name": [f"Item {i:05d}" for i in range(1, n_itens + 1)],
+        "unit": rng.choice(UNIDADES, n_itens),
+        "sector": [SETORES[i % len(SETORES)] for i in range(n_itens)],
+    })
+    people = pd.DataFrame({
+        "id": np.arange(1, n_pessoas + 1),
+        "name": [f"Pessoa {i}" for i in range(1, n_pessoas + 1)],
+    })
+    projects = pd.DataFrame({
+        "id": np.arange(1, n_projetos + 1),
+        "name": [f"Projeto {i}" for i in range(1, n_projetos + 1)],
+    })
+
+    # Itens com popularidade desigual, como num almoxarifado de verdade
+    pesos = rng.zipf(1.5, n_itens).astype(float)
+    pesos /= pesos.sum()
+    item = rng.choice(items["id"].to_numpy(), n_transacoes, p=pesos)
+
+    # Cada item começa com uma contagem inicial; depois ~40% entradas e ~60% saídas
+    primeira = np.zeros(n_transacoes, dtype=bool)
+    _, primeiras_posicoes = np.unique(item, return_index=True)
+    primeira[primeiras_posicoes] = True
+    entrada = primeira | (rng.random(n_transacoes) < 0.4)
+    quantidade = np.where(primeira, rng.integers(100, 1000, n_transacoes), rng.integers(1, 50, n_transacoes))
+    amount = np.where(entrada, quantidade, -quantidade)
+
+    observation = np.full(n_transacoes, None, dtype=object)
+    com_projeto = ~entrada & (rng.random(n_transacoes) < 0.5)
+    observation[com_projeto] = projects["name"].to_numpy()[rng.integers(0, n_projetos, com_projeto.sum())]
+    observation[primeira] = "Contagem inicial"
+
+    fim = pd.Timestamp(fim) if fim is not None else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+    inicio = fim - pd.Timedelta(days=dias)
+    segundos = np.sort(rng.integers(0, dias * 86400, n_transacoes))
+    timestamps = (inicio + pd.to_timedelta(segundos, unit="s")).strftime("%Y-%m-%dT%H:%M:%S") + TIMEZONE_OFFSET
+
+    transactions = pd.DataFrame({
+        "id": np.arange(1, n_transacoes + 1),
+        "item": item,
+        "amount": amount,
+        "transaction_type": np.where(entrada, "Entrada", "Saída"),
+        "observation": observation,
+        "author": rng.integers(1, n_pessoas + 1, n_transacoes),
+        "timestamp": timestamps,
+    })
+
+    return {"items": items, "people": people, "projects": projects, "transactions": transactions}
@@ -0,0 +1,87 @@
+# Tamanho e tempo do gráfico do item com e sem a redução de pontos (grafico_utils).
+# Mede o JSON da figura Plotly, que é o que o st.plotly_chart envia ao navegador.
+# Uso:
+#   python -m benchmarks.grafico --transactions 200000 --days 3650
+#   python -m benchmarks.run --compare benchmarks/results/grafico-antes.json benchmarks/results/grafico-depois.json
+
+import argparse
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.run import RESULTS_DIR, _commit_atual, medir, salvar
+
+def gerar_historico(transacoes, dias, seed=42):
+    """
+    Transações de um único item espalhadas por `dias` dias até hoje
+    """
+    rng = np.random.default_rng(seed)
+    fim = pd.Timestamp.now(tz="America/Sao_Paulo")
+    segundos = rng.integers(0, dias * 24 * 3600, transacoes)
+    quantidades = rng.integers(1, 50, transacoes)
+    sinal = np.where(rng.random(transacoes) < 0.55, 1, -1)
+    return pd.DataFrame({
+        "id": np.arange(1, transacoes + 1),
+        "item": 1,
+        "amount": quantidades * sinal,
+        "timestamp": fim - pd.to_timedelta(segundos, unit="s"),
+    })
+
+def executar(transacoes=100_000, dias=3650, repeticoes=5, pontos_maximos=None):
+    # Importados aqui: plotly e o app só quando o benchmark roda
+    from utils.estoque_utils import preparar_dados_candlestick
+    from utils.grafico_utils import figura_candles, reduzir_candles
+
+    items_df = pd.DataFrame({"id": [1], "name": ["Item 1"]})
+    candles = preparar_dados_candlestick(items_df, gerar_historico(transacoes, dias), [1])
+    hoje = pd.Timestamp.now(tz="America/Sao_Paulo").date()
+
+    resultados = []
+    intervalos = {"1 mês": 31, "1 ano": 366, "Tudo": None}
+    for rotulo, dias_visiveis in intervalos.items():
+        inicio = hoje - timedelta(days=dias_visiveis) if dias_visiveis else None
+        diarios = candles[candles["date"] >= pd.Timestamp(inicio)] if inicio else candles
+
+        casos = {
+            # Antes: todos os candles diários do intervalo
+            "diário": lambda: (diarios, "D"),
+            # Depois: agregados no período que cabe no orçamento
+            "reduzido": lambda: reduzir_candles(candles, inicio, pontos_maximos),
+        }
+        for nome, reduzir in casos.items():
+            def renderizar():
+                dados, periodo = reduzir()
+                return figura_candles(dados, periodo, hoje).to_json()
+
+            melhor, mediana, _ = medir(renderizar, repeticoes)
+            dados, periodo = reduzir()
+            payload = len(renderizar().encode("utf-8"))
+            resultados.append({
+                "function": f"grafico {rotulo}: {nome}",
+                "transactions": transacoes,
+                "points": len(dados),
+                "period": periodo,
+                "payload_bytes": payload,
+                "best_s": round(melhor, 6),
+                "median_s": round(mediana, 6),
+            })
+            print(f"{rotulo:8s} {nome:9s} {len(dados):7d} pontos ({periodo})  {payload / 1024:9.1f} KB  {melhor * 1000:8.1f} ms")
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Pontos, tamanho do JSON e tempo do gráfico do item, antes e depois da redução.")
+    parser.add_argument("--transactions", type=int, default=100_000, help="transações do item")
+    parser.add_argument("--days", type=int, default=3650, help="dias de histórico")
+    parser.add_argument("--points", type=int, default=None, help="orçamento de pontos (padrão: ESTOQUE_GRAFICO_PONTOS)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="arquivo JSON (padrão: benchmarks/results/grafico-<commit>.json)")
+    args = parser.parse_args()
+
+    resultados = executar(args.transactions, args.days, args.repeat, args.points)
+    caminho = args.output or os.path.join(RESULTS_DIR, f"grafico-{_commit_atual()}.json")
+    print(f"Resultados salvos em {salvar(resultados, caminho)}")
+
+if __name__ == "__main__":
+    main()
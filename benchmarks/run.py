@@ -0,0 +1,175 @@
+# Uso:
+#   python -m benchmarks.run --sizes 10000 100000 1000000
+#   python -m benchmarks.run --compare benchmarks/results/antes.json benchmarks/results/depois.json
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.gerador import gerar_dados
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def medir(func, repeticoes=3):
+    """
+    Executa `func` algumas vezes e retorna (melhor tempo em s, mediana em s, pico de memória em MB)
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+
+    # Pico de memória numa execução separada: o tracemalloc distorce os tempos
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tempos.sort()
+    return tempos[0], tempos[len(tempos) // 2], pico / 1024 / 1024
+
+def _casos(dados):
+    # Importados aqui: dependem de streamlit e do backend escolhido abaixo
+    from storage import set_backend
+    from storage.sqlite_backend import SQLiteBackend
+    from utils.estoque_utils import _get_snapshot, carregar_dados, calcular_saldo, preparar_dados_grafico, preparar_dados_candlestick, mostrar_movimentacoes
+    from utils.relatorio_utils import gerar_pdf, preparar_relatorio
+
+    backend = SQLiteBackend()
+    backend.popular(**dados)
+    set_backend(backend)
+
+    # Mesmos tipos que o app usa depois do carregamento
+    _get_snapshot().limpar()
+    items_df, transactions_df, _, _ = carregar_dados()
+    item_mais_movimentado = transactions_df["item"].value_counts().idxmax()
+
+    def carregar_frio():
+        _get_snapshot().limpar()
+        carregar_dados()
+
+    def carregar_incremental():
+        _get_snapshot().invalidar()
+        carregar_dados()
+
+    ultimo_dia = transactions_df["timestamp"].max().date()
+    transacoes_hoje, relatorio = preparar_relatorio(items_df, transactions_df, dia=ultimo_dia)
+
+    return {
+        "carregar_dados (frio)": carregar_frio,
+        "carregar_dados (incremental)": carregar_incremental,
+        "calcular_saldo": lambda: calcular_saldo(items_df, transactions_df),
+        "preparar_dados_grafico": lambda: preparar_dados_grafico(items_df, transactions_df, item_mais_movimentado),
+        "preparar_dados_candlestick": lambda: preparar_dados_candlestick(items_df, transactions_df, [item_mais_movimentado]),
+        "mostrar_movimentacoes": lambda: mostrar_movimentacoes(transactions_df),
+        "gerar_pdf": lambda: gerar_pdf(transacoes_hoje, relatorio),
+    }
+
+def memoria_por_milhao(transacoes):
+    """
+    Bytes por milhão de transações: formato cru (como vem da API) e normalizado
+    """
+    from utils.normalizacao_utils import normalizar_transacoes
+
+    cru = transacoes.memory_usage(deep=True).sum()
+    normalizado = normalizar_transacoes(transacoes).memory_usage(deep=True).sum()
+    escala = 1_000_000 / len(transacoes)
+    return cru * escala, normalizado * escala
+
+def executar(tamanhos, repeticoes=3, seed=42, filtro=None):
+    resultados = []
+    for tamanho in tamanhos:
+        dados = gerar_dados(tamanho, seed=seed)
+        if not filtro or filtro in "memoria":
+            cru, normalizado = memoria_por_milhao(dados["transactions"])
+            resultados.append({
+                "function": "memoria por milhão de transações",
+                "transactions": tamanho,
+                "raw_mb_per_million": round(cru / 1024 / 1024, 1),
+                "normalized_mb_per_million": round(normalizado / 1024 / 1024, 1),
+            })
+            print(f"{'memória/1M transações':32s} {tamanho:>10d} linhas  cru {cru / 1024 / 1024:8.1f} MB  normalizado {normalizado / 1024 / 1024:8.1f} MB")
+        for nome, func in _casos(dados).items():
+            if filtro and filtro not in nome:
+                continue
+            melhor, mediana, pico_mb = medir(func, repeticoes)
+            resultados.append({
+                "function": nome,
+                "transactions": tamanho,
+                "best_s": round(melhor, 6),
+                "median_s": round(mediana, 6),
+                "rows_per_s": round(tamanho / melhor) if melhor > 0 else None,
+                "peak_mb": round(pico_mb, 2),
+            })
+            print(f"{nome:32s} {tamanho:>10d} linhas  {melhor * 1000:10.1f} ms  {pico_mb:8.1f} MB")
+    return resultados
+
+def _commit_atual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+def salvar(resultados, caminho=None):
+    commit = _commit_atual()
+    caminho = caminho or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "results": resultados,
+        }, f, indent=2)
+    return caminho
+
+def comparar(antes, depois):
+    """
+    Imprime a razão depois/antes do melhor tempo de cada função e tamanho
+    """
+    with open(antes) as f:
+        base = {(r["function"], r["transactions"]): r for r in json.load(f)["results"]}
+    with open(depois) as f:
+        novo = json.load(f)["results"]
+
+    for r in novo:
+        anterior = base.get((r["function"], r["transactions"]))
+        # Entradas sem tempo (ex.: memória) não entram na comparação
+        if anterior is None or not anterior.get("best_s") or "best_s" not in r:
+            continue
+        razao = r["best_s"] / anterior["best_s"]
+        marca = "  <-- regressão" if razao > 1.1 else ""
+        print(f"{r['function']:32s} {r['transactions']:>10d} linhas  {razao:6.2f}x{marca}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do estoque com dados sintéticos.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="números de transações a gerar (10k a 10M)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", default=None, help="roda só as funções cujo nome contém este texto")
+    parser.add_argument("--output", default=None, help="arquivo JSON (padrão: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="compara dois arquivos de resultado")
+    args = parser.parse_args()
+
+    if args.compare:
+        comparar(*args.compare)
+        return
+
+    resultados = executar(args.sizes, args.repeat, args.seed, args.only)
+    print(f"Resultados salvos em {salvar(resultados, args.output)}")
+
+if __name__ == "__main__":
+    main()
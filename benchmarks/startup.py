@@ -0,0 +1,118 @@
+# Tempo de partida do app: import dos módulos e primeira renderização.
+# Uso:
+#   python -m benchmarks.startup
+#   python -m benchmarks.run --compare benchmarks/results/startup-antes.json benchmarks/results/startup-depois.json
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.run import RESULTS_DIR, _commit_atual, salvar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cada medição roda num processo novo: é o custo de uma partida a frio
+MEDIR_IMPORT = """
+import time
+inicio = time.perf_counter()
+import app
+print(time.perf_counter() - inicio)
+"""
+
+MEDIR_RENDER = """
+import time
+from streamlit.testing.v1 import AppTest
+inicio = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120).run()
+print(time.perf_counter() - inicio)
+if at.exception:
+    raise SystemExit(str(at.exception))
+"""
+
+def _rodar(codigo, env):
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(saida.strip().splitlines()[-1])
+
+def _ambiente(sqlite_path):
+    # Backend SQLite local: mede o app, não a rede
+    return {
+        **os.environ,
+        "ESTOQUE_BACKEND": "sqlite",
+        "SQLITE_PATH": sqlite_path,
+        "ESTOQUE_WARMUP": "0",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+
+def _preparar_banco(caminho, transacoes):
+    from benchmarks.gerador import gerar_dados
+    from storage.sqlite_backend import SQLiteBackend
+
+    SQLiteBackend(caminho).popular(**gerar_dados(transacoes))
+
+def imports_mais_lentos(env, quantidade=15):
+    """
+    Módulos com maior tempo cumulativo de import (python -X importtime)
+    """
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"], cwd=RAIZ, env=env,
+        capture_output=True, text=True, check=True
+    ).stderr
+    modulos = []
+    for linha in saida.splitlines():
+        partes = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)", linha)
+        # O tempo de um pacote inclui o dos módulos que ele importa
+        if partes and partes.group(2) != "app":
+            modulos.append((int(partes.group(1)) / 1_000_000, partes.group(2)))
+    return sorted(modulos, reverse=True)[:quantidade]
+
+def executar(repeticoes=5, transacoes=10_000, renderizar=True):
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "estoque.sqlite")
+        _preparar_banco(caminho, transacoes)
+        env = _ambiente(caminho)
+
+        casos = {"import app": MEDIR_IMPORT}
+        if renderizar:
+            casos["primeira renderização"] = MEDIR_RENDER
+
+        for nome, codigo in casos.items():
+            try:
+                tempos = sorted(_rodar(codigo, env) for _ in range(repeticoes))
+            except subprocess.CalledProcessError as e:
+                print(f"{nome:32s} falhou: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+                continue
+            resultados.append({
+                "function": f"startup: {nome}",
+                "transactions": transacoes,
+                "best_s": round(tempos[0], 6),
+                "median_s": round(statistics.median(tempos), 6),
+            })
+            print(f"{nome:32s} {tempos[0] * 1000:10.1f} ms (mediana {statistics.median(tempos) * 1000:.1f} ms)")
+
+        print("\nImports mais lentos:")
+        for segundos, modulo in imports_mais_lentos(env):
+            print(f"  {modulo:40s} {segundos * 1000:8.1f} ms")
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import e de primeira renderização do app.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--transactions", type=int, default=10_000, help="transações no banco SQLite usado na renderização")
+    parser.add_argument("--no-render", action="store_true", help="mede só o import (sem streamlit.testing)")
+    parser.add_argument("--output", default=None, help="arquivo JSON (padrão: benchmarks/results/startup-<commit>.json)")
+    args = parser.parse_args()
+
+    resultados = executar(args.repeat, args.transactions, not args.no_render)
+    caminho = args.output or os.path.join(RESULTS_DIR, f"startup-{_commit_atual()}.json")
+    print(f"Resultados salvos em {salvar(resultados, caminho)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,19 @@
-from supabase import create_client
-import os
 import streamlit as st
+from config import supabase_config
 
-# Get Supabase credentials from environment variables
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Cliente do app: o mesmo de config/supabase_config (pool, timeouts e retentativas),
+# com os erros de configuração/conexão mostrados na página.
 
-if not all([SUPABASE_URL, SUPABASE_KEY]):
-    st.error("Missing required Supabase environment variables. Please set SUPABASE_URL and SUPABASE_KEY.")
-    st.stop()
+def get_supabase_client():
+    try:
+        return supabase_config.get_supabase_client()
+    except Exception as e:
+        # Fora de uma página do Streamlit (linha de comando), a exceção segue
+        if not st.runtime.exists():
+            raise
+        st.error(str(e) if isinstance(e, ValueError) else f"Failed to connect to Supabase: {str(e)}")
+        st.stop()
 
-try:
-    # Initialize Supabase client
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    
-    # Test the connection
-    response = supabase.table('items').select("*").limit(1).execute()
-    
-    # Create a function to get the client
-    def get_supabase_client():
-        return supabase
-        
-except Exception as e:
-    st.error(f"Failed to connect to Supabase: {str(e)}")
-    st.stop()
\ No newline at end of file
+def testar_conexao():
+    # Test the connection (e abre a conexão HTTP para as próximas consultas)
+    get_supabase_client().table('items').select("id").limit(1).execute()
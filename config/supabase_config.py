@@ -1,18 +1,136 @@
-from supabase import create_client
+import logging
 import os
+import random
+import threading
+import time
+from collections import deque
 
-# Configurações do Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+import httpx
+from supabase import ClientOptions, create_client
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Missing required Supabase environment variables. Please set SUPABASE_URL and SUPABASE_KEY.")
+# Fábrica única do cliente Supabase do processo (app, storage e supabase_utils).
+# O cliente HTTP é compartilhado: pool com keep-alive, timeouts configuráveis,
+# retentativas com backoff exponencial nas leituras e latência de cada requisição.
+TIMEOUT_CONEXAO = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+TIMEOUT_LEITURA = float(os.getenv("SUPABASE_READ_TIMEOUT", "30"))
+MAX_CONEXOES = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "10"))
+KEEPALIVE = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+RETENTATIVAS = int(os.getenv("SUPABASE_READ_RETRIES", "3"))
+BACKOFF = float(os.getenv("SUPABASE_RETRY_BACKOFF", "0.25"))
 
-# Criar cliente Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Só leituras são repetidas: um POST (insert, rpc) pode ter sido aplicado mesmo sem resposta
+METODOS_IDEMPOTENTES = {"GET", "HEAD", "OPTIONS"}
+STATUS_TRANSITORIOS = {408, 429, 502, 503, 504}
+
+logger = logging.getLogger("estoque.http")
+
+_cliente = None
+_lock = threading.Lock()
+_latencias = deque(maxlen=500)
+_ouvintes = []
+
+class TransporteComRetentativas(httpx.BaseTransport):
+    """
+    Transporte httpx que repete leituras com falha transitória (erro de
+    rede, timeout, 429/5xx de gateway) com backoff exponencial e jitter,
+    e registra método, caminho, status, tempo e bytes de cada requisição.
+    """
+
+    def __init__(self, transporte, retentativas=RETENTATIVAS, backoff=BACKOFF):
+        self.transporte = transporte
+        self.retentativas = retentativas
+        self.backoff = backoff
+
+    def handle_request(self, request):
+        pode_repetir = request.method in METODOS_IDEMPOTENTES
+        tentativa = 0
+        inicio = time.perf_counter()
+        while True:
+            try:
+                resposta = self.transporte.handle_request(request)
+                # Ler o corpo aqui: a latência medida inclui a transferência
+                resposta.read()
+            except httpx.TransportError as erro:
+                if not pode_repetir or tentativa >= self.retentativas:
+                    _registrar(request, None, inicio, 0, tentativa + 1, erro)
+                    raise
+                logger.warning("Retrying %s %s after %s", request.method, request.url.path, type(erro).__name__)
+            else:
+                if not (pode_repetir and resposta.status_code in STATUS_TRANSITORIOS and tentativa < self.retentativas):
+                    _registrar(request, resposta.status_code, inicio, len(resposta.content), tentativa + 1)
+                    return resposta
+                resposta.close()
+                logger.warning("Retrying %s %s after HTTP %s", request.method, request.url.path, resposta.status_code)
+            time.sleep(self.backoff * 2 ** tentativa * random.uniform(0.5, 1))
+            tentativa += 1
+
+    def close(self):
+        self.transporte.close()
+
+def criar_cliente_http():
+    """
+    Cliente httpx com pool de conexões reaproveitadas (keep-alive) e timeouts
+    """
+    transporte = httpx.HTTPTransport(limits=httpx.Limits(
+        max_connections=MAX_CONEXOES,
+        max_keepalive_connections=MAX_CONEXOES,
+        keepalive_expiry=KEEPALIVE,
+    ))
+    return httpx.Client(
+        transport=TransporteComRetentativas(transporte),
+        timeout=httpx.Timeout(TIMEOUT_LEITURA, connect=TIMEOUT_CONEXAO),
+        follow_redirects=True,
+    )
+
+def criar_cliente(url=None, key=None):
+    """
+    Cria um cliente Supabase sobre o cliente HTTP de criar_cliente_http.
+    Só o PostgREST (tabelas, views e rpc) é usado: storage e functions
+    mudariam a base_url do cliente HTTP compartilhado.
+    """
+    url = url or os.getenv("SUPABASE_URL")
+    key = key or os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise ValueError("Missing required Supabase environment variables. Please set SUPABASE_URL and SUPABASE_KEY.")
+    return create_client(url, key, options=ClientOptions(httpx_client=criar_cliente_http()))
 
 def get_supabase_client():
     """
-    Retorna o cliente Supabase configurado
+    Retorna o cliente Supabase do processo, criado na primeira chamada
     """
-    return supabase 
\ No newline at end of file
+    global _cliente
+    if _cliente is None:
+        with _lock:
+            if _cliente is None:
+                _cliente = criar_cliente()
+    return _cliente
+
+def ouvir_requisicoes(funcao):
+    """
+    Chama `funcao(medicao)` a cada requisição concluída (ex.: painel de desempenho)
+    """
+    if funcao not in _ouvintes:
+        _ouvintes.append(funcao)
+
+def latencias():
+    # Últimas requisições: metodo, caminho, status, ms, bytes, tentativas
+    return list(_latencias)
+
+def _registrar(request, status, inicio, tamanho, tentativas, erro=None):
+    medicao = {
+        "metodo": request.method,
+        "caminho": request.url.path,
+        "status": status,
+        "ms": round((time.perf_counter() - inicio) * 1000, 3),
+        "bytes": tamanho,
+        "tentativas": tentativas,
+    }
+    if erro is not None:
+        medicao["erro"] = type(erro).__name__
+    _latencias.append(medicao)
+    logger.debug("%s", medicao)
+    for funcao in _ouvintes:
+        try:
+            funcao(medicao)
+        except Exception as e:
+            print(f"Error in request listener: {str(e)}")
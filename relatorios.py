@@ -0,0 +1,165 @@
+# Relatórios diários em PDF sem o Streamlit, para rodar à noite (cron).
+# Gera um PDF por setor e por dia do intervalo, em paralelo em vários processos.
+# Uso:
+#   python relatorios.py --inicio 2024-05-01 --fim 2024-05-31 --saida /srv/relatorios
+#   python relatorios.py --setores Cola Todos --workers 4
+
+import argparse
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from storage import set_backend, criar_backend
+from storage.base import TIMEZONE
+from utils.estoque_utils import carregar_dados
+from utils.indice_utils import IndiceEstoque
+from utils.normalizacao_utils import como_datetime
+from utils.relatorio_utils import gerar_pdf, preparar_relatorio
+
+# Dados compartilhados com os processos de trabalho (herdados no fork ou enviados uma vez por processo)
+_dados = None
+
+def _iniciar_processo(dados):
+    global _dados
+    _dados = dados
+
+def preparar_dados(items_df, transactions_df, people_df=None, projects_df=None):
+    """
+    Monta, uma vez no processo principal, o que cada relatório consulta:
+    índice por setor, saldos acumulados e as transações ordenadas por horário
+    """
+    people_df = people_df if people_df is not None else pd.DataFrame(columns=["id", "name"])
+    projects_df = projects_df if projects_df is not None else pd.DataFrame(columns=["id", "name"])
+    indice = IndiceEstoque(items_df, transactions_df, people_df, projects_df)
+
+    # Ordenadas por horário: as transações de um dia são uma fatia contínua (busca binária)
+    if transactions_df.empty:
+        transacoes = transactions_df
+        instantes = np.array([], dtype=np.int64)
+    else:
+        transacoes = transactions_df.assign(timestamp=como_datetime(transactions_df["timestamp"]))
+        transacoes = transacoes.sort_values("timestamp", kind="stable").reset_index(drop=True)
+        instantes = pd.DatetimeIndex(transacoes["timestamp"]).asi8
+
+    return {
+        "indice": indice,
+        "acumulados": indice.acumulados,
+        "transacoes": transacoes,
+        "instantes": instantes,
+    }
+
+def _transacoes_do_dia(dados, dia, itens):
+    # Fatia [início do dia, início do dia seguinte) no horário de São Paulo, só dos itens do setor
+    inicio = pd.Timestamp(dia).tz_localize(TIMEZONE)
+    fim = pd.Timestamp(dia + timedelta(days=1)).tz_localize(TIMEZONE)
+    lo, hi = np.searchsorted(dados["instantes"], [inicio.value, fim.value])
+    transacoes = dados["transacoes"].iloc[lo:hi]
+    transacoes = transacoes[transacoes["item"].isin(itens)]
+    # Mais recentes primeiro, como vêm de carregar_historico
+    return transacoes.iloc[::-1]
+
+def gerar_relatorio(dados, setor, dia, pasta):
+    """
+    Gera o PDF de um setor ("Todos" = todos os itens) com as movimentações
+    do dia e o saldo de cada item no fim do dia; retorna o caminho do arquivo
+    """
+    indice = dados["indice"]
+    itens = indice.itens(setor)
+    saldos = dados["acumulados"].em(dia)
+    transacoes_dia = _transacoes_do_dia(dados, dia, itens["id"])
+
+    transacoes, relatorio = preparar_relatorio(itens, dados["transacoes"], saldos, dia, transacoes_dia)
+    pdf = gerar_pdf(transacoes, relatorio, dia)
+
+    caminho = os.path.join(pasta, f"relatorio_{_slug(setor)}_{dia:%Y-%m-%d}.pdf")
+    # Grava num temporário e troca: um cron interrompido não deixa PDF pela metade
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(pdf.getbuffer())
+    os.replace(temporario, caminho)
+    return caminho
+
+def _gerar_no_processo(tarefa):
+    setor, dia, pasta = tarefa
+    return gerar_relatorio(_dados, setor, dia, pasta)
+
+def gerar_relatorios(dados, setores, dias, pasta, workers=None):
+    """
+    Gera um relatório por (setor, dia) em `workers` processos; retorna os caminhos
+    """
+    os.makedirs(pasta, exist_ok=True)
+    tarefas = [(setor, dia, pasta) for dia in dias for setor in setores]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(tarefas) == 1:
+        _iniciar_processo(dados)
+        return [_gerar_no_processo(tarefa) for tarefa in tarefas]
+
+    workers = min(workers, len(tarefas))
+    # Lotes de tarefas por envio: menos idas e voltas entre os processos
+    lote = max(1, len(tarefas) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_processo, initargs=(dados,)) as executor:
+        return list(executor.map(_gerar_no_processo, tarefas, chunksize=lote))
+
+def _slug(texto):
+    # Nome de arquivo seguro: sem acentos, espaços ou barras
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", texto.lower()).strip("-") or "sem-setor"
+
+def _data(texto):
+    return datetime.strptime(texto, "%Y-%m-%d").date()
+
+def _dias(inicio, fim):
+    return [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+
+def main():
+    ontem = datetime.now(pytz.timezone(TIMEZONE)).date() - timedelta(days=1)
+
+    parser = argparse.ArgumentParser(description="Gera os relatórios diários em PDF por setor e por dia, em paralelo.")
+    parser.add_argument("--inicio", type=_data, default=None, help="primeiro dia (AAAA-MM-DD; padrão: ontem)")
+    parser.add_argument("--fim", type=_data, default=None, help="último dia, inclusive (padrão: --inicio)")
+    parser.add_argument("--setores", nargs="+", default=None, help='setores a gerar; "Todos" gera um relatório com todos os itens (padrão: cada setor)')
+    parser.add_argument("--saida", default="relatorios", help="pasta dos PDFs")
+    parser.add_argument("--workers", type=int, default=None, help="processos em paralelo (padrão: número de CPUs)")
+    parser.add_argument("--backend", default=None, help="supabase, postgres ou sqlite (padrão: ESTOQUE_BACKEND)")
+    args = parser.parse_args()
+
+    inicio = args.inicio or ontem
+    fim = args.fim or inicio
+    if fim < inicio:
+        parser.error("--fim must not be before --inicio")
+
+    if args.backend:
+        set_backend(criar_backend(args.backend))
+
+    carga = time.perf_counter()
+    items_df, transactions_df, people_df, projects_df = carregar_dados()
+    dados = preparar_dados(items_df, transactions_df, people_df, projects_df)
+    carga = time.perf_counter() - carga
+
+    setores = args.setores or sorted(map(str, dados["indice"].linhas_por_setor)) or ["Todos"]
+    desconhecidos = [s for s in setores if s != "Todos" and s not in dados["indice"].linhas_por_setor]
+    if desconhecidos:
+        parser.error(f"unknown sector(s): {', '.join(desconhecidos)}")
+
+    dias = _dias(inicio, fim)
+    geracao = time.perf_counter()
+    caminhos = gerar_relatorios(dados, setores, dias, args.saida, args.workers)
+    geracao = time.perf_counter() - geracao
+
+    for caminho in caminhos:
+        print(caminho)
+    print(
+        f"{len(caminhos)} relatório(s) em {geracao:.1f} s "
+        f"({len(caminhos) / geracao if geracao else 0:.1f}/s; dados carregados em {carga:.1f} s)"
+    )
+
+if __name__ == "__main__":
+    main()
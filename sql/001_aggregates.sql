@@ -0,0 +1,21 @@
+-- Agregações do estoque calculadas no banco, para não baixar o histórico inteiro.
+-- Usadas por SupabaseBackend.saldos() e SupabaseBackend.serie_diaria().
+
+-- Saldo atual por item
+create or replace view item_balances as
+select item, sum(amount) as amount
+from transactions
+group by item;
+
+-- Saldo acumulado ao fim de cada dia (horário de São Paulo), por item
+create or replace view item_daily_balances as
+select item,
+       day as date,
+       sum(daily) over (partition by item order by day) as cumulative_amount
+from (
+    select item,
+           ("timestamp" at time zone 'America/Sao_Paulo')::date as day,
+           sum(amount) as daily
+    from transactions
+    group by item, day
+) as diario;
@@ -0,0 +1,57 @@
+-- Checkpoints de saldo: o saldo de cada item consolidado até uma transação.
+-- Saldo atual = checkpoint + transações com id maior que last_transaction_id,
+-- então o custo depende só da atividade recente e não do histórico inteiro.
+
+create table if not exists item_checkpoints (
+    item bigint primary key references items(id),
+    balance numeric not null,
+    as_of timestamptz not null,
+    last_transaction_id bigint not null
+);
+
+-- Busca das transações posteriores ao checkpoint de cada item
+create index if not exists transactions_item_id_idx on transactions (item, id);
+
+-- Substitui a view de sql/001_aggregates.sql
+create or replace view item_balances as
+select item, sum(amount) as amount
+from (
+    select item, balance as amount from item_checkpoints
+    union all
+    select t.item, t.amount
+    from transactions t
+    left join item_checkpoints c on c.item = t.item
+    where t.id > coalesce(c.last_transaction_id, 0)
+) as saldo
+group by item;
+
+-- Avança os checkpoints até p_until. Chamado por storage/compactar.py
+-- (ou agendado no banco, ex.: pg_cron diário).
+create or replace function compact_item_checkpoints(p_until timestamptz default now() - interval '1 day')
+returns integer
+language plpgsql
+as $$
+declare
+    corte_id bigint;
+    atualizados integer;
+begin
+    select max(id) into corte_id from transactions where "timestamp" <= p_until;
+    if corte_id is null then
+        return 0;
+    end if;
+
+    insert into item_checkpoints (item, balance, as_of, last_transaction_id)
+    select t.item, coalesce(max(c.balance), 0) + sum(t.amount), p_until, corte_id
+    from transactions t
+    left join item_checkpoints c on c.item = t.item
+    where t.id > coalesce(c.last_transaction_id, 0) and t.id <= corte_id
+    group by t.item
+    on conflict (item) do update set
+        balance = excluded.balance,
+        as_of = excluded.as_of,
+        last_transaction_id = excluded.last_transaction_id;
+
+    get diagnostics atualizados = row_count;
+    return atualizados;
+end;
+$$;
@@ -0,0 +1,7 @@
+-- Histórico paginado por item e relatório do dia (consultar_transacoes):
+-- filtro por item e intervalo de datas, mais recentes primeiro, sem varrer a tabela.
+
+create index if not exists transactions_item_timestamp_idx on transactions (item, "timestamp" desc, id desc);
+
+-- Transações de um dia sem filtro de item (relatório diário)
+create index if not exists transactions_timestamp_idx on transactions ("timestamp" desc, id desc);
@@ -0,0 +1,7 @@
+-- Chave de idempotência gerada pelo cliente (fila de envio de movimentações):
+-- reenviar uma movimentação já gravada não cria uma linha duplicada.
+
+alter table transactions add column if not exists idempotency_key uuid;
+
+-- Único: insert ... on conflict (idempotency_key) do nothing. Linhas antigas ficam com null.
+create unique index if not exists transactions_idempotency_key_idx on transactions (idempotency_key);
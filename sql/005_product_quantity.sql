@@ -0,0 +1,30 @@
+-- Alterações atômicas de quantidade em products (utils/supabase_utils.py):
+-- o incremento acontece num único UPDATE no banco, sem ler-modificar-gravar
+-- no cliente, então escritas concorrentes não se perdem.
+
+create or replace function increment_product_quantity(p_id bigint, p_delta numeric)
+returns setof products
+language sql
+as $$
+    update products
+    set quantity = quantity + p_delta
+    where id = p_id
+    returning *;
+$$;
+
+-- Vários produtos numa chamada: p_changes = [{"id": 1, "delta": 5}, ...].
+-- Deltas repetidos do mesmo id são somados antes do UPDATE.
+create or replace function increment_product_quantities(p_changes jsonb)
+returns setof products
+language sql
+as $$
+    update products p
+    set quantity = p.quantity + d.delta
+    from (
+        select (c->>'id')::bigint as id, sum((c->>'delta')::numeric) as delta
+        from jsonb_array_elements(p_changes) as c
+        group by 1
+    ) as d
+    where p.id = d.id
+    returning p.*;
+$$;
@@ -0,0 +1,25 @@
+-- Sincronização incremental (TransactionStore.sync): transações novas e o
+-- resumo da tabela numa chamada só. A contagem sozinha não vê uma quantidade
+-- editada nem uma remoção seguida de um insert; as somas de conferência veem.
+
+create or replace function transactions_delta(p_desde_id bigint default 0)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'resumo', (
+            select jsonb_build_object(
+                'linhas', count(*),
+                'soma', coalesce(sum(amount), 0),
+                'assinatura', coalesce(sum(id * amount), 0),
+                'assinatura_item', coalesce(sum(id * item), 0)
+            )
+            from transactions
+        ),
+        'linhas', coalesce(
+            (select jsonb_agg(t order by t.id) from transactions t where t.id > p_desde_id),
+            '[]'::jsonb
+        )
+    );
+$$;
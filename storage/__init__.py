@@ -0,0 +1,65 @@
+# Backends de armazenamento: escolhido pela variável ESTOQUE_BACKEND (supabase, postgres ou sqlite)
+
+import os
+import threading
+
+from .base import EstoqueBackend
+
+_backend = None
+_backend_lock = threading.Lock()
+_aquecimento = None
+
+def criar_backend(nome=None):
+    """
+    Cria um backend pelo nome (padrão: variável ESTOQUE_BACKEND ou "supabase")
+    """
+    nome = (nome or os.getenv("ESTOQUE_BACKEND", "supabase")).lower()
+    if nome == "supabase":
+        from .supabase_backend import SupabaseBackend
+        return SupabaseBackend()
+    if nome == "postgres":
+        from .sql_backend import PostgresBackend
+        return PostgresBackend()
+    if nome == "sqlite":
+        from .sqlite_backend import SQLiteBackend
+        return SQLiteBackend(os.getenv("SQLITE_PATH", ":memory:"))
+    raise ValueError(f"Unknown storage backend: {nome}. Use supabase, postgres or sqlite.")
+
+def get_backend():
+    """
+    Retorna o backend do processo, criado na primeira chamada
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = criar_backend()
+    return _backend
+
+def aquecer_em_segundo_plano():
+    """
+    Cria o backend e abre a conexão numa thread, uma vez por processo, para a
+    primeira consulta não pagar o handshake. Desligado com ESTOQUE_WARMUP=0.
+    """
+    global _aquecimento
+    if _aquecimento is not None or os.getenv("ESTOQUE_WARMUP", "1") == "0":
+        return _aquecimento
+    with _backend_lock:
+        if _aquecimento is None:
+            _aquecimento = threading.Thread(target=_aquecer, name="estoque-warmup", daemon=True)
+            _aquecimento.start()
+    return _aquecimento
+
+def _aquecer():
+    try:
+        get_backend().aquecer()
+    except Exception as e:
+        # A primeira consulta de verdade vai mostrar o erro
+        print(f"Backend warm-up failed: {str(e)}")
+
+def set_backend(backend):
+    """
+    Substitui o backend do processo (ex.: SQLiteBackend populado para testes offline)
+    """
+    global _backend
+    _backend = backend
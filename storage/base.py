@@ -0,0 +1,210 @@
+from abc import ABC, abstractmethod
+import pandas as pd
+
+TIMEZONE = 'America/Sao_Paulo'
+
+def como_instante(momento):
+    """
+    datetime, Timestamp ou data (meia-noite) como Timestamp com fuso; sem fuso = horário de São Paulo
+    """
+    momento = pd.Timestamp(momento)
+    return momento.tz_localize(TIMEZONE) if momento.tzinfo is None else momento.tz_convert(TIMEZONE)
+
+# Códigos de "tabela/view/função não existe": PostgREST (schema cache) e Postgres (SQLSTATE)
+CODIGOS_INEXISTENTE = {"PGRST202", "PGRST205", "42P01", "42883"}
+
+def codigo_erro(erro):
+    """
+    Código do erro do banco: SQLSTATE (psycopg, direto ou dentro do erro do
+    SQLAlchemy) ou o `code` do PostgREST; None se não houver
+    """
+    if hasattr(erro, "orig"):
+        # SQLAlchemy: o `code` dele é um link de documentação, não do banco
+        return getattr(erro.orig, "pgcode", None)
+    return getattr(erro, "pgcode", None) or getattr(erro, "code", None)
+
+def objeto_inexistente(erro):
+    """
+    True se o erro diz que a view, tabela ou função consultada não existe no
+    banco (migração não aplicada), e não uma falha passageira (rede, timeout)
+    """
+    codigo = codigo_erro(erro)
+    if codigo in CODIGOS_INEXISTENTE:
+        return True
+    # SQLite: "no such table/function" (sqlite3.OperationalError)
+    return type(erro).__name__ == "OperationalError" and "no such" in str(erro)
+
+# Classes SQLSTATE de falhas passageiras: conexão (08), transação desfeita
+# (40, ex.: deadlock), recursos (53) e intervenção do operador (57, ex.: restart)
+CLASSES_TRANSITORIAS = ("08", "40", "53", "57")
+# Exceções de rede/conexão (httpx, sqlite3, SQLAlchemy/psycopg), pelo nome da classe
+TIPOS_TRANSITORIOS = {"TransportError", "TimeoutException", "OperationalError", "InterfaceError", "DisconnectionError"}
+
+def erro_transitorio(erro):
+    """
+    True se reenviar pode dar certo (rede, timeout, banco indisponível ou sem
+    a migração); False se o banco recusou os dados (ex.: chave estrangeira,
+    valor inválido), que voltariam a falhar a cada tentativa
+    """
+    if isinstance(erro, OSError) or objeto_inexistente(erro):
+        return True
+    codigo = codigo_erro(erro)
+    if isinstance(codigo, str) and codigo:
+        # PGRST000-PGRST003: PostgREST sem conexão com o banco
+        return codigo.startswith(CLASSES_TRANSITORIAS) or codigo.startswith("PGRST00")
+    if any(classe.__name__ in TIPOS_TRANSITORIOS for classe in type(erro).__mro__):
+        return True
+    # Integridade/dados (sqlite3, SQLAlchemy): recusa
+    if any(classe.__name__ in ("IntegrityError", "DataError") for classe in type(erro).__mro__):
+        return False
+    # Sem código nem tipo conhecido (ex.: resposta 5xx sem corpo): tentar de novo
+    return True
+
+class EstoqueBackend(ABC):
+    """
+    Interface de acesso aos dados do estoque (items, transactions, people, projects)
+    """
+
+    def identificador(self):
+        """
+        Identifica a origem dos dados para caches em disco; None desativa esses caches
+        """
+        return None
+
+    def aquecer(self):
+        """
+        Abre a conexão antes da primeira consulta (chamado em segundo plano)
+        """
+
+    @abstractmethod
+    def carregar_itens(self):
+        """
+        Retorna todos os itens
+        """
+
+    @abstractmethod
+    def carregar_transacoes(self, desde_id=None):
+        """
+        Retorna as transações ordenadas por id, opcionalmente só as com id > desde_id
+        """
+
+    def carregar_delta(self, desde_id=None):
+        """
+        Retorna (transações com id > desde_id, resumo da tabela inteira). O
+        resumo tem "linhas" e, quando o backend calcula, as somas de conferência
+        "soma" (amount), "assinatura" (id * amount) e "assinatura_item"
+        (id * item), que mudam com edições e remoções. Aqui são duas consultas;
+        os backends juntam numa só.
+        """
+        return self.carregar_transacoes(desde_id=desde_id), {"linhas": self.contar_transacoes()}
+
+    def consultar_transacoes(self, item_id=None, inicio=None, fim=None, limite=None, deslocamento=0):
+        """
+        Retorna as transações mais recentes primeiro (timestamp e id decrescentes),
+        opcionalmente de um item e no intervalo [inicio, fim), paginadas por
+        limite/deslocamento. Os backends fazem o filtro no banco; aqui é em pandas.
+        """
+        df = self.carregar_transacoes()
+        if df.empty:
+            return df
+        timestamps = pd.to_datetime(df['timestamp'], utc=True, format='ISO8601')
+        mascara = pd.Series(True, index=df.index)
+        if item_id is not None:
+            mascara &= df['item'] == item_id
+        if inicio is not None:
+            mascara &= timestamps >= como_instante(inicio)
+        if fim is not None:
+            mascara &= timestamps < como_instante(fim)
+        df = df[mascara].assign(_ordem=timestamps[mascara]).sort_values(['_ordem', 'id'], ascending=False)
+        fim_pagina = deslocamento + limite if limite is not None else None
+        return df.drop(columns='_ordem').iloc[deslocamento:fim_pagina].reset_index(drop=True)
+
+    @abstractmethod
+    def contar_transacoes(self):
+        """
+        Retorna o número total de transações
+        """
+
+    @abstractmethod
+    def carregar_pessoas(self):
+        """
+        Retorna as pessoas (id, name)
+        """
+
+    @abstractmethod
+    def carregar_projetos(self):
+        """
+        Retorna os projetos (id, name)
+        """
+
+    @abstractmethod
+    def inserir_transacao(self, transacao):
+        """
+        Insere uma transação e retorna a linha gravada (com id)
+        """
+
+    def inserir_transacoes(self, transacoes):
+        """
+        Insere várias transações numa só requisição e retorna as linhas gravadas
+        """
+        return [self.inserir_transacao(transacao) for transacao in transacoes]
+
+    def inserir_transacoes_idempotentes(self, transacoes):
+        """
+        Insere transações com `idempotency_key`, ignorando as chaves já gravadas
+        (reenvio seguro). Retorna as linhas gravadas de todas as chaves, novas ou não.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support idempotent inserts")
+
+    def incrementar_quantidades(self, mudancas):
+        """
+        Soma deltas à quantidade de produtos ({id: delta} ou lista de (id,
+        delta)) numa única operação atômica no banco, sem ler antes: escritas
+        concorrentes não se perdem. Retorna os produtos atualizados.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support product quantities")
+
+    def incrementar_quantidade(self, product_id, delta):
+        """
+        Soma `delta` à quantidade de um produto (atômico); retorna o produto atualizado
+        """
+        linhas = self.incrementar_quantidades([(product_id, delta)])
+        return linhas[0] if linhas else None
+
+    def saldos(self):
+        """
+        Retorna o saldo por item (colunas item, amount)
+        """
+        df = self.carregar_transacoes()
+        if df.empty:
+            return pd.DataFrame(columns=['item', 'amount'])
+        return df.groupby('item')['amount'].sum().reset_index()
+
+    def carregar_checkpoints(self):
+        """
+        Retorna o saldo consolidado por item (colunas item, balance, as_of, last_transaction_id)
+        """
+        return pd.DataFrame(columns=['item', 'balance', 'as_of', 'last_transaction_id'])
+
+    def compactar_checkpoints(self, ate):
+        """
+        Consolida nos checkpoints as transações até o instante `ate`
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support checkpoints")
+
+    def serie_diaria(self, item_id=None):
+        """
+        Retorna o saldo acumulado ao fim de cada dia (colunas date, item, cumulative_amount)
+        """
+        df = self.carregar_transacoes()
+        if item_id is not None and not df.empty:
+            df = df[df['item'] == item_id]
+        if df.empty:
+            return pd.DataFrame(columns=['date', 'item', 'cumulative_amount'])
+
+        # Aceita timestamps em texto ISO ou já convertidos (normalizar_transacoes)
+        dias = pd.to_datetime(df['timestamp'], utc=True, format='ISO8601').dt.tz_convert(TIMEZONE).dt.tz_localize(None).dt.normalize()
+        diario = df.groupby([df['item'], dias.rename('date')])['amount'].sum().reset_index()
+        diario = diario.sort_values(['item', 'date'])
+        diario['cumulative_amount'] = diario.groupby('item')['amount'].cumsum()
+        return diario[['date', 'item', 'cumulative_amount']].reset_index(drop=True)
@@ -0,0 +1,28 @@
+# Job de compactação: consolida nos checkpoints as transações mais antigas que N dias.
+# Uso: python -m storage.compactar --dias 1
+
+import argparse
+from datetime import datetime, timedelta
+import pytz
+
+from storage import criar_backend
+from storage.base import TIMEZONE
+
+def compactar(backend, dias=1):
+    """
+    Avança os checkpoints de todos os itens até agora menos `dias` dias
+    """
+    ate = datetime.now(pytz.timezone(TIMEZONE)) - timedelta(days=dias)
+    return backend.compactar_checkpoints(ate)
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolida o histórico de transações em checkpoints por item.")
+    parser.add_argument("--dias", type=float, default=1, help="manter as transações dos últimos N dias fora do checkpoint")
+    parser.add_argument("--backend", default=None, help="supabase, postgres ou sqlite (padrão: ESTOQUE_BACKEND)")
+    args = parser.parse_args()
+
+    resultado = compactar(criar_backend(args.backend), args.dias)
+    print(f"Checkpoints atualizados: {resultado}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import os
+from abc import abstractmethod
+import pandas as pd
+from storage.base import EstoqueBackend, como_instante
+
+# Resumo da tabela de transações (ver EstoqueBackend.carregar_delta)
+COLUNAS_RESUMO = ["linhas", "soma", "assinatura", "assinatura_item"]
+
+class SqlBackend(EstoqueBackend):
+    """
+    Consultas SQL comuns aos backends relacionais (Postgres e SQLite).
+
+    As subclasses implementam `_ler` (SELECT -> DataFrame), `_gravar`
+    (INSERT ... RETURNING -> lista de dicts), `_executar` (-> linhas
+    afetadas) e a expressão do dia local em `DIA_SQL`.
+    """
+
+    DIA_SQL = None
+    # LIMIT que não limita (para OFFSET sem LIMIT)
+    SEM_LIMITE = "ALL"
+
+    @abstractmethod
+    def _ler(self, sql, params=None):
+        """
+        SELECT -> DataFrame
+        """
+
+    @abstractmethod
+    def _gravar(self, sql, params):
+        """
+        INSERT/UPDATE ... RETURNING -> lista de dicts
+        """
+
+    @abstractmethod
+    def _executar(self, sql, params=None):
+        """
+        Comando sem retorno -> linhas afetadas
+        """
+
+    def _instante(self, momento):
+        # Como um datetime é passado como parâmetro para comparar com "timestamp"
+        return momento
+
+    def carregar_itens(self):
+        return self._ler("SELECT * FROM items ORDER BY id")
+
+    def carregar_transacoes(self, desde_id=None):
+        if desde_id is None:
+            return self._ler("SELECT * FROM transactions ORDER BY id")
+        return self._ler("SELECT * FROM transactions WHERE id > :desde_id ORDER BY id", {"desde_id": int(desde_id)})
+
+    def carregar_delta(self, desde_id=None):
+        # Uma consulta só: o resumo vem repetido em cada linha do delta (ou
+        # numa linha vazia, sem delta), lido no mesmo instante que as linhas
+        df = self._ler("""
+            SELECT r.linhas AS _linhas, r.soma AS _soma, r.assinatura AS _assinatura, r.assinatura_item AS _assinatura_item, t.*
+            FROM (
+                SELECT COUNT(*) AS linhas,
+                       COALESCE(SUM(amount), 0) AS soma,
+                       COALESCE(SUM(id * amount), 0) AS assinatura,
+                       COALESCE(SUM(id * item), 0) AS assinatura_item
+                FROM transactions
+            ) AS r
+            LEFT JOIN transactions t ON t.id > :desde_id
+            ORDER BY t.id
+        """, {"desde_id": int(desde_id) if desde_id is not None else 0})
+        resumo = {coluna: df[f"_{coluna}"].iloc[0] for coluna in COLUNAS_RESUMO}
+        delta = df.drop(columns=[f"_{coluna}" for coluna in COLUNAS_RESUMO])
+        return delta[delta["id"].notna()].reset_index(drop=True), resumo
+
+    def consultar_transacoes(self, item_id=None, inicio=None, fim=None, limite=None, deslocamento=0):
+        # Usa o índice (item, "timestamp") de sql/003_history_index.sql
+        condicoes = []
+        params = {}
+        if item_id is not None:
+            condicoes.append("item = :item_id")
+            params["item_id"] = int(item_id)
+        if inicio is not None:
+            condicoes.append('"timestamp" >= :inicio')
+            params["inicio"] = self._instante(como_instante(inicio).to_pydatetime())
+        if fim is not None:
+            condicoes.append('"timestamp" < :fim')
+            params["fim"] = self._instante(como_instante(fim).to_pydatetime())
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+        paginacao = ""
+        if limite is not None or deslocamento:
+            paginacao = f"LIMIT {int(limite) if limite is not None else self.SEM_LIMITE} OFFSET :deslocamento"
+            params["deslocamento"] = int(deslocamento)
+
+        return self._ler(f'SELECT * FROM transactions {where} ORDER BY "timestamp" DESC, id DESC {paginacao}', params)
+
+    def contar_transacoes(self):
+        return int(self._ler("SELECT COUNT(*) AS total FROM transactions")["total"].iloc[0])
+
+    def carregar_pessoas(self):
+        return self._ler("SELECT id, name FROM people ORDER BY id")
+
+    def carregar_projetos(self):
+        return self._ler("SELECT id, name FROM projects ORDER BY id")
+
+    def inserir_transacao(self, transacao):
+        linhas = self.inserir_transacoes([transacao])
+        return linhas[0] if linhas else None
+
+    def inserir_transacoes(self, transacoes):
+        if not transacoes:
+            return []
+        sql, params = _insert_transacoes(transacoes)
+        return self._gravar(f"{sql} RETURNING *", params)
+
+    def inserir_transacoes_idempotentes(self, transacoes):
+        if not transacoes:
+            return []
+        # Chaves já gravadas (reenvio) são ignoradas pelo índice único de sql/004_idempotency.sql
+        sql, params = _insert_transacoes(transacoes)
+        self._executar(f"{sql} ON CONFLICT (idempotency_key) DO NOTHING", params)
+
+        chaves = {f"chave_{i}": transacao["idempotency_key"] for i, transacao in enumerate(transacoes)}
+        return self._ler(
+            f"SELECT * FROM transactions WHERE idempotency_key IN ({', '.join(':' + c for c in chaves)}) ORDER BY id",
+            chaves
+        ).to_dict("records")
+
+    def incrementar_quantidades(self, mudancas):
+        # Mesmo efeito de increment_product_quantities (sql/005_product_quantity.sql):
+        # deltas do mesmo id somados e um único UPDATE quantity = quantity + delta
+        deltas = {}
+        for product_id, delta in (mudancas.items() if isinstance(mudancas, dict) else mudancas):
+            deltas[int(product_id)] = deltas.get(int(product_id), 0) + delta
+        if not deltas:
+            return []
+        params = {}
+        casos = []
+        for i, (product_id, delta) in enumerate(deltas.items()):
+            casos.append(f"WHEN :id_{i} THEN :delta_{i}")
+            params.update({f"id_{i}": product_id, f"delta_{i}": delta})
+        ids = ", ".join(f":id_{i}" for i in range(len(deltas)))
+        return self._gravar(
+            f"UPDATE products SET quantity = quantity + CASE id {' '.join(casos)} END WHERE id IN ({ids}) RETURNING *",
+            params
+        )
+
+    def saldos(self):
+        # Checkpoint de cada item + transações posteriores a ele
+        return self._ler("""
+            SELECT item, SUM(amount) AS amount
+            FROM (
+                SELECT item, balance AS amount FROM item_checkpoints
+                UNION ALL
+                SELECT t.item, t.amount
+                FROM transactions t
+                LEFT JOIN item_checkpoints c ON c.item = t.item
+                WHERE t.id > COALESCE(c.last_transaction_id, 0)
+            ) AS saldo
+            GROUP BY item
+            ORDER BY item
+        """)
+
+    def carregar_checkpoints(self):
+        return self._ler("SELECT item, balance, as_of, last_transaction_id FROM item_checkpoints ORDER BY item")
+
+    def compactar_checkpoints(self, ate):
+        corte = self._ler(
+            'SELECT MAX(id) AS corte_id FROM transactions WHERE "timestamp" <= :ate',
+            {"ate": self._instante(ate)}
+        )["corte_id"].iloc[0]
+        if pd.isna(corte):
+            return 0
+
+        return self._executar("""
+            INSERT INTO item_checkpoints (item, balance, as_of, last_transaction_id)
+            SELECT t.item, COALESCE(MAX(c.balance), 0) + SUM(t.amount), :as_of, :corte_id
+            FROM transactions t
+            LEFT JOIN item_checkpoints c ON c.item = t.item
+            WHERE t.id > COALESCE(c.last_transaction_id, 0) AND t.id <= :corte_id
+            GROUP BY t.item
+            ON CONFLICT (item) DO UPDATE SET
+                balance = excluded.balance,
+                as_of = excluded.as_of,
+                last_transaction_id = excluded.last_transaction_id
+        """, {"as_of": self._instante(ate), "corte_id": int(corte)})
+
+    def serie_diaria(self, item_id=None):
+        filtro = "WHERE item = :item_id" if item_id is not None else ""
+        sql = f"""
+            SELECT day AS date, item,
+                   SUM(daily) OVER (PARTITION BY item ORDER BY day) AS cumulative_amount
+            FROM (
+                SELECT item, {self.DIA_SQL} AS day, SUM(amount) AS daily
+                FROM transactions {filtro}
+                GROUP BY item, {self.DIA_SQL}
+            ) AS diario
+            ORDER BY item, day
+        """
+        df = self._ler(sql, {"item_id": item_id} if item_id is not None else None)
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+def _insert_transacoes(transacoes):
+    # Um único INSERT com várias linhas em VALUES
+    colunas = list(transacoes[0].keys())
+    valores = []
+    params = {}
+    for i, transacao in enumerate(transacoes):
+        valores.append("(" + ", ".join(f":{c}_{i}" for c in colunas) + ")")
+        params.update({f"{c}_{i}": transacao.get(c) for c in colunas})
+
+    sql = f"INSERT INTO transactions ({', '.join(_quote(c) for c in colunas)}) VALUES {', '.join(valores)}"
+    return sql, params
+
+def _quote(coluna):
+    # "timestamp" é palavra reservada em SQL
+    return f'"{coluna}"'
+
+class PostgresBackend(SqlBackend):
+    """
+    Backend direto no Postgres via SQLAlchemy/psycopg2, com pool de conexões
+    """
+
+    DIA_SQL = "(\"timestamp\" AT TIME ZONE 'America/Sao_Paulo')::date"
+
+    def __init__(self, database_url=None, pool_size=None, max_overflow=None):
+        from sqlalchemy import create_engine
+
+        database_url = database_url or os.getenv("DATABASE_URL")
+        if not database_url:
+            raise ValueError("Missing required DATABASE_URL environment variable for the postgres backend.")
+
+        self.engine = create_engine(
+            database_url,
+            pool_size=pool_size or int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=max_overflow or int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_pre_ping=True,
+            pool_recycle=1800,
+        )
+
+    def aquecer(self):
+        # Abre a primeira conexão do pool
+        with self.engine.connect():
+            pass
+
+    def identificador(self):
+        # URL sem a senha
+        return f"postgres:{self.engine.url.render_as_string(hide_password=True)}"
+
+    def _ler(self, sql, params=None):
+        from sqlalchemy import text
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(sql), conn, params=params)
+
+    def _gravar(self, sql, params):
+        from sqlalchemy import text
+        with self.engine.begin() as conn:
+            rows = conn.execute(text(sql), params).mappings().all()
+        return [dict(row) for row in rows]
+
+    def _executar(self, sql, params=None):
+        from sqlalchemy import text
+        with self.engine.begin() as conn:
+            return conn.execute(text(sql), params or {}).rowcount
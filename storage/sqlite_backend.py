@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+from storage.base import TIMEZONE
+from storage.sql_backend import SqlBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    unit TEXT,
+    sector TEXT
+);
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    price REAL,
+    quantity INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item INTEGER NOT NULL REFERENCES items(id),
+    amount INTEGER NOT NULL,
+    transaction_type TEXT NOT NULL,
+    observation TEXT,
+    author INTEGER REFERENCES people(id),
+    "timestamp" TEXT NOT NULL,
+    idempotency_key TEXT
+);
+CREATE TABLE IF NOT EXISTS item_checkpoints (
+    item INTEGER PRIMARY KEY REFERENCES items(id),
+    balance INTEGER NOT NULL,
+    as_of TEXT NOT NULL,
+    last_transaction_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_item_timestamp_idx ON transactions (item, "timestamp");
+CREATE INDEX IF NOT EXISTS transactions_timestamp_idx ON transactions ("timestamp");
+CREATE UNIQUE INDEX IF NOT EXISTS transactions_idempotency_key_idx ON transactions (idempotency_key);
+"""
+
+class SQLiteBackend(SqlBackend):
+    """
+    Backend SQLite (em memória por padrão) para testes e benchmarks offline
+    """
+
+    # Os timestamps são gravados em ISO com o offset local: os 10 primeiros caracteres são o dia
+    DIA_SQL = "substr(\"timestamp\", 1, 10)"
+    SEM_LIMITE = "-1"
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # carregar_dados consulta as tabelas em paralelo
+        self.lock = threading.Lock()
+        with self.lock:
+            # Arquivos criados antes da coluna idempotency_key
+            colunas = [linha["name"] for linha in self.conn.execute("PRAGMA table_info(transactions)")]
+            if colunas and "idempotency_key" not in colunas:
+                self.conn.execute("ALTER TABLE transactions ADD COLUMN idempotency_key TEXT")
+            self.conn.executescript(SCHEMA)
+
+    def identificador(self):
+        # Banco em memória não sobrevive ao processo: nada a guardar em disco
+        return None if self.path == ":memory:" else f"sqlite:{os.path.abspath(self.path)}"
+
+    def _ler(self, sql, params=None):
+        with self.lock:
+            return pd.read_sql(sql, self.conn, params=params)
+
+    def _gravar(self, sql, params):
+        with self.lock, self.conn:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def _executar(self, sql, params=None):
+        with self.lock, self.conn:
+            return self.conn.execute(sql, params or {}).rowcount
+
+    def _instante(self, momento):
+        # Os timestamps são texto ISO no horário local: comparar no mesmo formato
+        momento = pd.Timestamp(momento)
+        if momento.tzinfo is not None:
+            momento = momento.tz_convert(TIMEZONE)
+        return momento.isoformat()
+
+    def popular(self, items=None, people=None, projects=None, transactions=None, products=None):
+        """
+        Insere dados em massa (DataFrames ou listas de dicts) nas tabelas
+        """
+        tabelas = {'items': items, 'people': people, 'projects': projects, 'transactions': transactions, 'products': products}
+        with self.lock, self.conn:
+            for tabela, dados in tabelas.items():
+                if dados is None:
+                    continue
+                df = pd.DataFrame(dados)
+                if df.empty:
+                    continue
+                colunas = ', '.join(f'"{c}"' for c in df.columns)
+                marcadores = ', '.join('?' for _ in df.columns)
+                self.conn.executemany(
+                    f"INSERT INTO {tabela} ({colunas}) VALUES ({marcadores})",
+                    df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+                )
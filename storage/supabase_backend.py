@@ -0,0 +1,138 @@
+import os
+import pandas as pd
+from storage.base import EstoqueBackend, como_instante, objeto_inexistente
+from utils.fetch_utils import buscar_tabela
+
+def _registrar_requisicao(medicao):
+    from utils.desempenho_utils import registrar
+    registrar(f"http {medicao['metodo']} {medicao['caminho']}", medicao['ms'] / 1000,
+              status=medicao['status'], bytes=medicao['bytes'], tentativas=medicao['tentativas'])
+
+class SupabaseBackend(EstoqueBackend):
+    """
+    Backend via API HTTP do Supabase (PostgREST)
+    """
+
+    def __init__(self, supabase=None):
+        if supabase is None:
+            # Importado aqui para que os outros backends funcionem sem credenciais
+            try:
+                from config.connection import get_supabase_client
+            except ImportError:
+                # Sem Streamlit: mesmo cliente, sem as mensagens na página
+                from config.supabase_config import get_supabase_client
+            supabase = get_supabase_client()
+        self.supabase = supabase
+        self._delta_disponivel = True
+
+        # Latência de cada requisição HTTP vai para as medições de desempenho
+        from config.supabase_config import ouvir_requisicoes
+        ouvir_requisicoes(_registrar_requisicao)
+
+    def aquecer(self):
+        from config.connection import testar_conexao
+        testar_conexao()
+
+    def identificador(self):
+        return f"supabase:{os.getenv('SUPABASE_URL')}"
+
+    def carregar_itens(self):
+        return buscar_tabela(self.supabase, 'items')
+
+    def carregar_transacoes(self, desde_id=None):
+        filtro = (lambda query: query.gt("id", desde_id)) if desde_id is not None else None
+        return buscar_tabela(self.supabase, 'transactions', filtro=filtro)
+
+    def carregar_delta(self, desde_id=None):
+        # Delta e resumo numa chamada (RPC de sql/006_transactions_delta.sql);
+        # sem a função no banco, duas consultas e só a contagem
+        if self._delta_disponivel:
+            try:
+                response = self.supabase.rpc('transactions_delta', {'p_desde_id': int(desde_id) if desde_id is not None else 0}).execute()
+                return pd.DataFrame(response.data['linhas']), response.data['resumo']
+            except Exception as e:
+                if not objeto_inexistente(e):
+                    raise
+                print(f"RPC transactions_delta unavailable, using separate count query: {str(e)}")
+                self._delta_disponivel = False
+        return super().carregar_delta(desde_id)
+
+    def consultar_transacoes(self, item_id=None, inicio=None, fim=None, limite=None, deslocamento=0):
+        # Filtro e ordenação no banco, pelo índice (item, "timestamp") de sql/003_history_index.sql
+        def filtro(query):
+            if item_id is not None:
+                query = query.eq("item", item_id)
+            if inicio is not None:
+                query = query.gte("timestamp", como_instante(inicio).isoformat())
+            if fim is not None:
+                query = query.lt("timestamp", como_instante(fim).isoformat())
+            return query
+
+        if limite is None:
+            # Sem limite (ex.: transações de um dia): todas as páginas, ordenadas aqui
+            df = buscar_tabela(self.supabase, 'transactions', filtro=filtro)
+            if df.empty:
+                return df
+            df = df.assign(_ordem=pd.to_datetime(df['timestamp'], utc=True, format='ISO8601')).sort_values(['_ordem', 'id'], ascending=False)
+            return df.drop(columns='_ordem').iloc[deslocamento:].reset_index(drop=True)
+
+        query = filtro(self.supabase.table('transactions').select('*'))
+        response = query.order('timestamp', desc=True).order('id', desc=True).range(deslocamento, deslocamento + limite - 1).execute()
+        return pd.DataFrame(response.data)
+
+    def contar_transacoes(self):
+        response = self.supabase.table('transactions').select("id", count="exact").limit(1).execute()
+        return response.count
+
+    def carregar_pessoas(self):
+        return buscar_tabela(self.supabase, 'people', 'id, name')
+
+    def carregar_projetos(self):
+        return buscar_tabela(self.supabase, 'projects', 'id, name')
+
+    def inserir_transacao(self, transacao):
+        response = self.supabase.table('transactions').insert(transacao).execute()
+        return response.data[0] if response.data else None
+
+    def inserir_transacoes(self, transacoes):
+        if not transacoes:
+            return []
+        response = self.supabase.table('transactions').insert(transacoes).execute()
+        return response.data
+
+    def inserir_transacoes_idempotentes(self, transacoes):
+        if not transacoes:
+            return []
+        # Chaves já gravadas (reenvio) são ignoradas pelo índice único de sql/004_idempotency.sql
+        self.supabase.table('transactions').upsert(
+            transacoes, on_conflict='idempotency_key', ignore_duplicates=True, returning='minimal'
+        ).execute()
+        chaves = [transacao['idempotency_key'] for transacao in transacoes]
+        response = self.supabase.table('transactions').select('*').in_('idempotency_key', chaves).order('id').execute()
+        return response.data
+
+    def incrementar_quantidades(self, mudancas):
+        # RPC de sql/005_product_quantity.sql, em lotes (utils/supabase_utils.py)
+        from utils.supabase_utils import increment_product_quantities
+        return increment_product_quantities(mudancas, supabase=self.supabase)
+
+    # Agregações calculadas no banco pelas views de sql/001_aggregates.sql
+    # e sql/002_checkpoints.sql
+
+    def saldos(self):
+        return buscar_tabela(self.supabase, 'item_balances', 'item, amount', order='item')
+
+    def serie_diaria(self, item_id=None):
+        filtro = (lambda query: query.eq("item", item_id)) if item_id is not None else None
+        df = buscar_tabela(self.supabase, 'item_daily_balances', 'date, item, cumulative_amount', filtro=filtro, order='item,date')
+        if df.empty:
+            return pd.DataFrame(columns=['date', 'item', 'cumulative_amount'])
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def carregar_checkpoints(self):
+        return buscar_tabela(self.supabase, 'item_checkpoints', 'item, balance, as_of, last_transaction_id', order='item')
+
+    def compactar_checkpoints(self, ate):
+        response = self.supabase.rpc('compact_item_checkpoints', {'p_until': ate.isoformat()}).execute()
+        return response.data
@@ -0,0 +1,33 @@
+import pytest
+
+from benchmarks.gerador import gerar_dados
+from storage import set_backend
+from storage.sqlite_backend import SQLiteBackend
+
+@pytest.fixture
+def dados():
+    # Poucos dados, mesmo gerador dos benchmarks
+    return gerar_dados(2000, seed=7)
+
+@pytest.fixture
+def backend(dados):
+    """
+    SQLite em memória populado, como backend do processo
+    """
+    backend = SQLiteBackend()
+    backend.popular(**dados)
+    set_backend(backend)
+    yield backend
+    set_backend(None)
+
+@pytest.fixture
+def snapshot(backend):
+    """
+    Snapshot compartilhado (estoque_utils) zerado, lendo do `backend`
+    """
+    from utils.estoque_utils import _get_snapshot
+
+    snapshot = _get_snapshot()
+    snapshot.limpar()
+    yield snapshot
+    snapshot.limpar()
@@ -0,0 +1,98 @@
+import threading
+from types import SimpleNamespace
+
+class ClienteFalso:
+    """
+    Cliente Supabase em memória com o pedaço do PostgREST que o app usa:
+    select com count/filtros/order/range (cortado em `max_rows`, como o
+    servidor), insert, upsert, rpc. Guarda as requisições em `requisicoes`.
+    """
+
+    def __init__(self, tabelas=None, max_rows=1000, rpcs=None):
+        self.tabelas = {nome: [dict(linha) for linha in linhas] for nome, linhas in (tabelas or {}).items()}
+        self.max_rows = max_rows
+        self.rpcs = rpcs or {}
+        self.requisicoes = []
+        self.lock = threading.Lock()
+
+    def table(self, nome):
+        return _Consulta(self, nome)
+
+    def rpc(self, nome, params):
+        return _Execucao(lambda: self._registrar(("rpc", nome, params), lambda: self.rpcs[nome](self, params)))
+
+    def _registrar(self, requisicao, executar):
+        with self.lock:
+            self.requisicoes.append(requisicao)
+            return SimpleNamespace(data=executar(), count=None)
+
+class _Execucao:
+    def __init__(self, executar):
+        self.execute = executar
+
+class _Consulta:
+    def __init__(self, cliente, tabela):
+        self.cliente = cliente
+        self.tabela = tabela
+        self.filtros = []
+        self.ordem = None
+        self.intervalo = None
+        self.count = None
+
+    def select(self, columns="*", count=None):
+        self.count = count
+        return self
+
+    def gt(self, coluna, valor):
+        self.filtros.append(lambda linha: linha[coluna] > valor)
+        return self
+
+    def eq(self, coluna, valor):
+        self.filtros.append(lambda linha: linha[coluna] == valor)
+        return self
+
+    def order(self, coluna):
+        self.ordem = coluna
+        return self
+
+    def range(self, inicio, fim):
+        self.intervalo = (inicio, fim)
+        return self
+
+    def insert(self, linhas):
+        linhas = linhas if isinstance(linhas, list) else [linhas]
+        return _Execucao(lambda: self.cliente._registrar(("insert", self.tabela, linhas), lambda: self._gravar(linhas)))
+
+    def upsert(self, linhas, **opcoes):
+        return _Execucao(lambda: self.cliente._registrar(("upsert", self.tabela, linhas), lambda: self._gravar(linhas)))
+
+    def _gravar(self, linhas):
+        tabela = self.cliente.tabelas.setdefault(self.tabela, [])
+        gravadas = []
+        for linha in linhas:
+            linha = dict(linha)
+            existente = next((t for t in tabela if "id" in linha and t["id"] == linha["id"]), None)
+            if existente is not None:
+                existente.update(linha)
+                gravadas.append(dict(existente))
+                continue
+            linha.setdefault("id", max((t["id"] for t in tabela), default=0) + 1)
+            tabela.append(linha)
+            gravadas.append(dict(linha))
+        return gravadas
+
+    def execute(self):
+        def selecionar():
+            linhas = [dict(l) for l in self.cliente.tabelas.get(self.tabela, []) if all(f(l) for f in self.filtros)]
+            if self.ordem:
+                linhas.sort(key=lambda l: l[self.ordem])
+            total = len(linhas)
+            inicio, fim = self.intervalo or (0, total - 1)
+            # O servidor nunca devolve mais que max_rows, seja qual for o range pedido
+            pagina = linhas[inicio:min(fim + 1, inicio + self.cliente.max_rows)]
+            return pagina, total
+
+        with self.cliente.lock:
+            self.cliente.requisicoes.append(("select", self.tabela, self.intervalo))
+            pagina, total = selecionar()
+        return SimpleNamespace(data=pagina, count=total if self.count == "exact" else None)
@@ -0,0 +1,83 @@
+import threading
+
+import httpx
+import pytest
+
+import api
+from utils.estoque_utils import aplicar_movimentacoes, montar_movimentacao
+
+@pytest.fixture
+def cliente(backend, snapshot):
+    api._respostas.clear()
+    servidor = api.criar_servidor("127.0.0.1", 0, backend=backend)
+    thread = threading.Thread(target=servidor.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    with httpx.Client(base_url=f"http://127.0.0.1:{servidor.server_address[1]}") as cliente:
+        yield cliente
+    servidor.shutdown()
+    servidor.server_close()
+
+@pytest.fixture
+def itens(dados):
+    # Os dois itens com mais movimentações
+    return [int(i) for i in dados["transactions"]["item"].value_counts().index[:2]]
+
+@pytest.mark.parametrize("caminho", ["/saldos", "/saldos?setor=Cola", "/setores", "/itens/{0}", "/itens/{0}/historico?limite=5", "/itens/{0}/serie", "/itens/{0}/acumulado"])
+def test_rotas_respondem_200_com_etag(cliente, itens, caminho):
+    resposta = cliente.get(caminho.format(*itens))
+
+    assert resposta.status_code == 200
+    assert resposta.headers["ETag"]
+    assert resposta.headers["Content-Type"].startswith("application/json")
+    assert resposta.json()
+
+def test_saldo_do_item_confere_com_as_transacoes(cliente, itens, dados):
+    transacoes = dados["transactions"]
+    esperado = int(transacoes.loc[transacoes["item"] == itens[0], "amount"].sum())
+
+    assert cliente.get(f"/itens/{itens[0]}").json()["saldo"] == esperado
+
+def test_etag_igual_responde_304(cliente, itens):
+    primeira = cliente.get(f"/itens/{itens[0]}/serie")
+
+    resposta = cliente.get(f"/itens/{itens[0]}/serie", headers={"If-None-Match": primeira.headers["ETag"]})
+
+    assert resposta.status_code == 304
+    assert resposta.content == b""
+    assert cliente.get(f"/itens/{itens[0]}/serie", headers={"If-None-Match": '"outro"'}).status_code == 200
+
+@pytest.mark.parametrize("caminho, status", [
+    ("/itens/abc", 400),
+    ("/itens/{0}/historico?limite=0", 400),
+    ("/itens/{0}/historico?inicio=ontem", 400),
+    ("/itens/999999", 404),
+    ("/saldos?setor=Inexistente", 404),
+    ("/itens/{0}/outra", 404),
+    ("/desconhecida", 404),
+])
+def test_erros(cliente, itens, caminho, status):
+    resposta = cliente.get(caminho.format(*itens))
+
+    assert resposta.status_code == status
+    assert "erro" in resposta.json()
+
+def test_escrita_muda_o_etag_so_do_item(cliente, backend, itens):
+    alterado, outro = itens
+    antes = {item: cliente.get(f"/itens/{item}") for item in itens}
+
+    aplicar_movimentacoes([backend.inserir_transacao(montar_movimentacao(alterado, 5, "Entrada"))])
+
+    depois = {item: cliente.get(f"/itens/{item}") for item in itens}
+    assert depois[alterado].headers["ETag"] != antes[alterado].headers["ETag"]
+    assert depois[alterado].json()["saldo"] == antes[alterado].json()["saldo"] + 5
+    assert depois[outro].headers["ETag"] == antes[outro].headers["ETag"]
+    assert cliente.get(f"/itens/{outro}", headers={"If-None-Match": antes[outro].headers["ETag"]}).status_code == 304
+
+def test_acumulado_reduzido_a_pontos(cliente, itens):
+    completo = cliente.get(f"/itens/{itens[0]}/acumulado").json()["dias"]
+    reduzido = cliente.get(f"/itens/{itens[0]}/acumulado?pontos=20").json()["dias"]
+
+    assert len(completo) > 20 >= len(reduzido) >= 3
+    # LTTB mantém o primeiro e o último dia
+    assert reduzido[0] == completo[0] and reduzido[-1] == completo[-1]
+    assert cliente.get(f"/itens/{itens[0]}/acumulado?pontos=2").status_code == 400
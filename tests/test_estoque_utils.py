@@ -0,0 +1,153 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from utils import estoque_utils
+from utils.estoque_utils import (
+    calcular_saldo, carregar_dados, carregar_saldos, carregar_serie_diaria, preparar_dados_grafico, saldos_em
+)
+
+@pytest.fixture
+def sem_cache_de_agregacoes(snapshot):
+    estoque_utils._agregacoes_indisponiveis.clear()
+    yield
+    estoque_utils._agregacoes_indisponiveis.clear()
+
+def _saldos(items_df, transactions_df, saldos_df=None):
+    return calcular_saldo(items_df, transactions_df, saldos_df).set_index("id")["Saldo Atual"].sort_index()
+
+def test_saldos_do_banco_iguais_ao_calculo_local(backend, sem_cache_de_agregacoes):
+    items_df, transactions_df, _, _ = carregar_dados()
+    saldos_df = carregar_saldos(transactions_df)
+
+    assert saldos_df is not None
+    pd.testing.assert_series_equal(
+        _saldos(items_df, transactions_df, saldos_df), _saldos(items_df, transactions_df), check_dtype=False
+    )
+
+def test_saldos_com_checkpoints_iguais_ao_calculo_local(backend, sem_cache_de_agregacoes):
+    items_df, transactions_df, _, _ = carregar_dados()
+    backend.compactar_checkpoints(transactions_df["timestamp"].median())
+
+    saldos_df = estoque_utils._carregar_saldos(transactions_df)
+
+    pd.testing.assert_series_equal(
+        _saldos(items_df, transactions_df, saldos_df), _saldos(items_df, transactions_df), check_dtype=False
+    )
+
+def _ate_o_fim_do_dia(timestamps):
+    # Data: vale até o fim do dia em São Paulo
+    dia = timestamps.sort_values().iloc[len(timestamps) // 2].date()
+    return dia, timestamps < pd.Timestamp(dia, tz="America/Sao_Paulo") + pd.Timedelta(days=1)
+
+def _ate_um_horario_sem_fuso(timestamps):
+    # Sem fuso: horário de São Paulo, inclusive
+    instante = timestamps.sort_values().iloc[len(timestamps) // 3]
+    return instante.tz_localize(None).to_pydatetime(), timestamps <= instante
+
+def _ate_um_horario_em_utc(timestamps):
+    instante = timestamps.sort_values().iloc[2 * len(timestamps) // 3].tz_convert("UTC")
+    return instante.to_pydatetime(), timestamps <= instante
+
+def _antes_da_primeira(timestamps):
+    instante = timestamps.min() - pd.Timedelta(seconds=1)
+    return instante, timestamps <= instante
+
+@pytest.mark.parametrize("ate", [_ate_o_fim_do_dia, _ate_um_horario_sem_fuso, _ate_um_horario_em_utc, _antes_da_primeira])
+def test_saldos_em_iguais_a_somar_as_transacoes_ate_o_instante(backend, snapshot, ate):
+    items_df, transactions_df, _, _ = carregar_dados()
+    instante, ate_o_instante = ate(transactions_df["timestamp"])
+
+    pd.testing.assert_series_equal(
+        _saldos(items_df, transactions_df, saldos_em(transactions_df, instante)),
+        _saldos(items_df, transactions_df[ate_o_instante]),
+        check_dtype=False,
+    )
+
+def test_serie_diaria_do_banco_igual_ao_calculo_local(backend, sem_cache_de_agregacoes):
+    items_df, transactions_df, _, _ = carregar_dados()
+    for item_id in transactions_df["item"].value_counts().index[:5]:
+        local = preparar_dados_grafico(items_df, transactions_df, item_id)
+        servidor = preparar_dados_grafico(items_df, transactions_df, item_id, carregar_serie_diaria(item_id))
+
+        pd.testing.assert_frame_equal(servidor, local, check_dtype=False, check_freq=False)
+
+def test_falha_passageira_nao_desliga_a_agregacao(backend, sem_cache_de_agregacoes, monkeypatch):
+    saldos = backend.saldos
+    monkeypatch.setattr(backend, "saldos", lambda: (_ for _ in ()).throw(ConnectionError("timeout")))
+    assert estoque_utils._carregar_saldos() is None
+
+    monkeypatch.setattr(backend, "saldos", saldos)
+    assert estoque_utils._carregar_saldos() is not None
+
+def test_view_inexistente_desliga_a_agregacao(backend, sem_cache_de_agregacoes, monkeypatch):
+    monkeypatch.setattr(backend, "saldos", lambda: (_ for _ in ()).throw(sqlite3.OperationalError("no such table: saldos")))
+    assert estoque_utils._carregar_saldos() is None
+
+    monkeypatch.undo()
+    assert estoque_utils._carregar_saldos() is None
+    assert "saldos" in estoque_utils._agregacoes_indisponiveis
+
+def test_reimportar_lote_depois_de_falha_nao_duplica(backend, snapshot, monkeypatch):
+    items_df, _, people_df, _ = carregar_dados()
+    antes = backend.contar_transacoes()
+    lote = pd.DataFrame({"item": items_df["id"].iloc[:10].tolist(), "quantidade": range(1, 11), "tipo": "Entrada"})
+
+    inserir = backend.inserir_transacoes_idempotentes
+    blocos = []
+    def falhar_no_segundo_bloco(transacoes):
+        blocos.append(transacoes)
+        if len(blocos) == 2:
+            raise ConnectionError("timeout")
+        return inserir(transacoes)
+    monkeypatch.setattr(backend, "inserir_transacoes_idempotentes", falhar_no_segundo_bloco)
+    with pytest.raises(ConnectionError):
+        estoque_utils.criar_movimentacoes_em_lote(lote, items_df, people_df, "envio-1", chunk_size=4)
+    assert backend.contar_transacoes() == antes + 4
+
+    # Mesma importação de novo: só o que faltou
+    monkeypatch.setattr(backend, "inserir_transacoes_idempotentes", inserir)
+    inseridas, novas = estoque_utils.criar_movimentacoes_em_lote(lote, items_df, people_df, "envio-1", chunk_size=4)
+
+    assert (len(inseridas), novas) == (10, 6)
+    assert backend.contar_transacoes() == antes + 10
+
+def test_mesmo_conteudo_em_outra_importacao_grava_de_novo(backend, snapshot):
+    items_df, _, people_df, _ = carregar_dados()
+    antes = backend.contar_transacoes()
+    lote = pd.DataFrame({"item": [items_df["id"].iloc[0]], "quantidade": [12], "tipo": ["Entrada"]})
+
+    primeira, novas_primeira = estoque_utils.criar_movimentacoes_em_lote(lote, items_df, people_df)
+    segunda, novas_segunda = estoque_utils.criar_movimentacoes_em_lote(lote, items_df, people_df)
+
+    # Entrega semanal igual à anterior: duas transações, não uma
+    assert (novas_primeira, novas_segunda) == (1, 1)
+    assert primeira[0]["id"] != segunda[0]["id"]
+    assert backend.contar_transacoes() == antes + 2
+
+def test_candles_diarios_com_maxima_e_minima_dentro_do_dia():
+    items_df = pd.DataFrame({"id": [1, 2], "name": ["Cola", "Papel"]})
+    transacoes = pd.DataFrame([
+        (1, 10, "2026-03-01T08:00:00-03:00"),
+        (1, -4, "2026-03-01T09:00:00-03:00"),
+        # 22:30 em São Paulo: ainda é dia 1
+        (1, 6, "2026-03-02T01:30:00+00:00"),
+        (1, -15, "2026-03-02T10:00:00-03:00"),
+        (1, 5, "2026-03-02T11:00:00-03:00"),
+        (2, 5, "2026-03-01T12:00:00-03:00"),
+        (2, -2, "2026-03-03T12:00:00-03:00"),
+        (2, 1, "2026-03-03T13:00:00-03:00"),
+    ], columns=["item", "amount", "timestamp"])
+
+    candles = estoque_utils.preparar_dados_candlestick(items_df, transacoes)
+
+    assert candles[["item", "date", "open", "high", "low", "close"]].values.tolist() == [
+        # Abertura = fechamento do dia anterior (0 no primeiro dia); máxima/mínima pelos saldos do dia
+        [1, pd.Timestamp("2026-03-01"), 0.0, 12.0, 0.0, 12.0],
+        [1, pd.Timestamp("2026-03-02"), 12.0, 12.0, -3.0, 2.0],
+        [2, pd.Timestamp("2026-03-01"), 0.0, 5.0, 0.0, 5.0],
+        [2, pd.Timestamp("2026-03-03"), 5.0, 5.0, 3.0, 4.0],
+    ]
+    assert candles["name"].tolist() == ["Cola", "Cola", "Papel", "Papel"]
+    assert estoque_utils.preparar_dados_candlestick(items_df, transacoes, [2])["item"].unique().tolist() == [2]
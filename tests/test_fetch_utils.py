@@ -0,0 +1,44 @@
+import pytest
+
+from tests.supabase_falso import ClienteFalso
+from utils.fetch_utils import buscar_registros, buscar_tabela
+
+def _cliente(linhas, max_rows=1000):
+    # Inseridas fora de ordem: a ordem da resposta vem do `order`
+    return ClienteFalso({"transactions": [{"id": i, "amount": i * 10} for i in reversed(range(1, linhas + 1))]}, max_rows)
+
+def _selects(cliente):
+    return [r[2] for r in cliente.requisicoes if r[0] == "select"]
+
+def test_paginas_remontadas_em_ordem():
+    cliente = _cliente(2500)
+
+    linhas = buscar_registros(cliente, "transactions", page_size=1000, max_workers=4)
+
+    assert [l["id"] for l in linhas] == list(range(1, 2501))
+    assert sorted(_selects(cliente)) == [(0, 999), (1000, 1999), (2000, 2999)]
+
+def test_limite_do_servidor_menor_que_a_pagina():
+    cliente = _cliente(2500, max_rows=300)
+
+    linhas = buscar_registros(cliente, "transactions", page_size=1000)
+
+    assert [l["id"] for l in linhas] == list(range(1, 2501))
+    # Depois da primeira página, pede no tamanho que o servidor devolve
+    assert all(fim - inicio + 1 == 300 for inicio, fim in _selects(cliente)[1:])
+
+def test_filtro_busca_so_o_delta():
+    cliente = _cliente(2500)
+
+    linhas = buscar_registros(cliente, "transactions", filtro=lambda q: q.gt("id", 2200), page_size=100)
+
+    assert [l["id"] for l in linhas] == list(range(2201, 2501))
+    assert len(_selects(cliente)) == 3
+
+@pytest.mark.parametrize("filtro", [None, lambda q: q.gt("id", 10)])
+def test_tabela_vazia(filtro):
+    cliente = _cliente(0)
+
+    assert buscar_registros(cliente, "transactions", filtro=filtro) == []
+    assert buscar_tabela(cliente, "transactions", filtro=filtro).empty
+    assert len(_selects(cliente)) == 2
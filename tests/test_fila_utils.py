@@ -0,0 +1,98 @@
+import sqlite3
+
+import pytest
+
+from utils import fila_utils
+from utils.fila_utils import FilaMovimentacoes
+
+@pytest.fixture
+def fila():
+    return FilaMovimentacoes(":memory:")
+
+def _movimentacao(item=1, amount=1):
+    return {"item": item, "amount": amount, "transaction_type": "Entrada", "timestamp": "2026-01-01T10:00:00-03:00"}
+
+def test_linha_recusada_nao_segura_as_seguintes(fila, backend, monkeypatch):
+    monkeypatch.setattr(fila_utils, "TAMANHO_LOTE", 8)
+    chaves = [fila.enfileirar(_movimentacao(amount=None if i == 5 else i + 1)) for i in range(10)]
+    aplicadas = []
+
+    enviadas = fila.enviar_pendentes(backend.inserir_transacoes_idempotentes, aplicadas.extend)
+
+    assert enviadas == 9
+    assert sorted(linha["idempotency_key"] for linha in aplicadas) == sorted(chaves[:5] + chaves[6:])
+    assert fila.estado(chaves[5]) == "erro"
+    assert "NOT NULL" in fila.resumo()["recentes"][0]["erro"]
+    assert fila.resumo()["com_erro"] == 1 and fila.resumo()["pendentes"] == 0
+
+def test_falha_passageira_fica_pendente_ate_esgotar_as_tentativas(fila, monkeypatch):
+    monkeypatch.setattr(fila_utils, "MAX_TENTATIVAS", 3)
+    chave = fila.enfileirar(_movimentacao())
+
+    def fora_do_ar(lote):
+        raise ConnectionError("connection refused")
+
+    for tentativa in range(3):
+        assert fila.estado(chave) == "pendente"
+        with pytest.raises(ConnectionError):
+            fila.enviar_pendentes(fora_do_ar)
+    assert fila.estado(chave) == "erro"
+    assert fila.resumo()["recentes"][0]["tentativas"] == 3
+
+def test_reenviar_com_erro(fila, backend):
+    chave = fila.enfileirar(_movimentacao(amount=None))
+    fila.enviar_pendentes(backend.inserir_transacoes_idempotentes)
+    assert fila.estado(chave) == "erro"
+
+    assert fila.reenviar_com_erro() == 1
+    assert fila.estado(chave) == "pendente"
+
+def test_aguardar_retorna_depois_de_aplicar(fila, backend):
+    aplicadas = []
+    fila.iniciar(backend.inserir_transacoes_idempotentes, aplicadas.extend)
+
+    chave = fila.enfileirar(_movimentacao())
+
+    assert fila.aguardar(chave, timeout=5) == "enviada"
+    assert [linha["idempotency_key"] for linha in aplicadas] == [chave]
+
+def test_aguardar_respeita_o_limite(fila):
+    chave = fila.enfileirar(_movimentacao())
+    assert fila.aguardar(chave, timeout=0.05) == "pendente"
+
+def test_registrar_e_aguardar_aparece_nos_saldos(backend, snapshot, monkeypatch):
+    from utils import estoque_utils
+
+    monkeypatch.setattr(estoque_utils, "USAR_FILA", True)
+    fila = FilaMovimentacoes(":memory:")
+    monkeypatch.setattr(estoque_utils, "_get_fila", lambda: fila)
+    fila.iniciar(backend.inserir_transacoes_idempotentes, estoque_utils.aplicar_movimentacoes)
+    items_df, transactions_df, _, _ = estoque_utils.carregar_dados()
+    antes = estoque_utils.calcular_saldo(items_df, transactions_df).set_index("id").loc[1, "Saldo Atual"]
+
+    chave = estoque_utils.registrar_movimentacao(1, 7, "Entrada")
+    assert estoque_utils.aguardar_envio(chave) == "enviada"
+
+    items_df, transactions_df, _, _ = estoque_utils.carregar_dados()
+    assert estoque_utils.calcular_saldo(items_df, transactions_df).set_index("id").loc[1, "Saldo Atual"] == antes + 7
+
+class _ErroPostgrest(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+@pytest.mark.parametrize("erro, transitorio", [
+    (ConnectionError("reset"), True),
+    (TimeoutError(), True),
+    (_ErroPostgrest("PGRST001"), True),
+    (_ErroPostgrest("08006"), True),
+    (_ErroPostgrest("40P01"), True),
+    (_ErroPostgrest("23503"), False),
+    (_ErroPostgrest("22P02"), False),
+    (_ErroPostgrest("PGRST202"), True),
+    (sqlite3.IntegrityError("NOT NULL constraint failed"), False),
+    (sqlite3.OperationalError("database is locked"), True),
+])
+def test_erro_transitorio(erro, transitorio):
+    from storage.base import erro_transitorio
+    assert erro_transitorio(erro) is transitorio
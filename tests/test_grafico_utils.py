@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from utils.grafico_utils import lttb, reduzir_candles
+
+def _candles(datas, fechamentos, item=1):
+    fechamentos = np.asarray(fechamentos, dtype=float)
+    aberturas = np.concatenate([[0.0], fechamentos[:-1]])
+    return pd.DataFrame({
+        "date": pd.to_datetime(datas),
+        "item": item,
+        "name": f"Item {item}",
+        "open": aberturas,
+        "high": np.maximum(aberturas, fechamentos),
+        "low": np.minimum(aberturas, fechamentos),
+        "close": fechamentos,
+    })
+
+def test_item_parado_mostra_o_saldo_no_inicio_do_intervalo():
+    candles = _candles(["2026-01-05", "2026-02-10"], [10, 25])
+
+    reduzidos, periodo = reduzir_candles(candles, pd.Timestamp("2026-09-01"))
+
+    assert periodo == "D"
+    assert reduzidos[["date", "open", "high", "low", "close"]].values.tolist() == [
+        [pd.Timestamp("2026-09-01"), 25.0, 25.0, 25.0, 25.0]
+    ]
+
+def test_candle_parado_antes_do_primeiro_movimento_do_intervalo():
+    candles = pd.concat([
+        _candles(["2026-01-05", "2026-03-10"], [10, 25], item=1),
+        _candles(["2026-03-01", "2026-03-10"], [4, 6], item=2),
+    ], ignore_index=True)
+
+    reduzidos, _ = reduzir_candles(candles, pd.Timestamp("2026-03-01"))
+
+    assert reduzidos[["item", "date", "open", "close"]].values.tolist() == [
+        [1, pd.Timestamp("2026-03-01"), 10.0, 10.0],
+        [1, pd.Timestamp("2026-03-10"), 10.0, 25.0],
+        [2, pd.Timestamp("2026-03-01"), 0.0, 4.0],
+        [2, pd.Timestamp("2026-03-10"), 4.0, 6.0],
+    ]
+
+def test_lttb_mantem_extremos_e_picos():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[500] = 100
+
+    escolhidos = lttb(x, y, 50)
+
+    assert len(escolhidos) == 50
+    assert escolhidos[0] == 0 and escolhidos[-1] == 999
+    assert 500 in escolhidos
@@ -0,0 +1,84 @@
+import time
+
+import pandas as pd
+
+from utils.snapshot_utils import carregar_snapshot, persistir_no_disco, restaurar_do_disco, salvar_snapshot
+from utils.sync_utils import TransactionStore
+
+ORIGEM = "sqlite::memory:"
+
+def _salvo(backend, tmp_path):
+    store = TransactionStore(resync_interval=3600)
+    store.sync(backend)
+    caminho = str(tmp_path / "transactions.arrow")
+    salvar_snapshot(caminho, store.df, store.max_id, ORIGEM, store.last_full_sync)
+    return store, caminho
+
+def test_snapshot_volta_igual_sem_copiar_as_colunas_numericas(backend, tmp_path):
+    store, caminho = _salvo(backend, tmp_path)
+
+    df, max_id, sincronizado_em = carregar_snapshot(caminho, ORIGEM)
+
+    pd.testing.assert_frame_equal(df, store.df)
+    assert max_id == store.max_id
+    assert sincronizado_em == store.last_full_sync
+    # Somente leitura: a coluna aponta para o arquivo mapeado
+    assert not df["amount"].to_numpy().flags.writeable
+
+def test_restaurar_guarda_quando_a_copia_foi_sincronizada(backend, tmp_path, monkeypatch):
+    store, caminho = _salvo(backend, tmp_path)
+    monkeypatch.setattr("utils.snapshot_utils.caminho_snapshot", lambda origem: caminho)
+
+    restaurado = TransactionStore(resync_interval=3600)
+    assert restaurar_do_disco(restaurado, ORIGEM)
+    assert restaurado.last_full_sync == store.last_full_sync
+
+def test_snapshot_antigo_que_confere_segue_so_com_o_delta(backend, tmp_path):
+    _, caminho = _salvo(backend, tmp_path)
+    df, max_id, sincronizado_em = carregar_snapshot(caminho, ORIGEM)
+
+    restaurado = TransactionStore(resync_interval=60)
+    restaurado.restaurar(df, max_id, sincronizado_em - 3600)
+    restaurado.sync(backend)
+
+    assert restaurado.itens_alterados == set()
+    assert restaurado.last_full_sync == sincronizado_em - 3600
+
+def test_snapshot_que_nao_confere_recarrega_tudo(backend, tmp_path):
+    _, caminho = _salvo(backend, tmp_path)
+    backend._executar("UPDATE transactions SET amount = amount + 1 WHERE id = 1")
+
+    restaurado = TransactionStore(resync_interval=3600)
+    restaurado.restaurar(*carregar_snapshot(caminho, ORIGEM))
+    restaurado.sync(backend)
+
+    assert restaurado.itens_alterados is None
+    pd.testing.assert_frame_equal(restaurado.df, TransactionStore().full_sync(backend))
+
+def test_snapshot_restaurado_segue_com_o_delta(backend, tmp_path):
+    store, caminho = _salvo(backend, tmp_path)
+    linha = backend.inserir_transacao({
+        "item": 1, "amount": 5, "transaction_type": "Entrada", "timestamp": "2026-01-01T10:00:00-03:00",
+    })
+
+    restaurado = TransactionStore(resync_interval=3600)
+    restaurado.restaurar(*carregar_snapshot(caminho, ORIGEM))
+    restaurado.sync(backend)
+
+    assert restaurado.itens_alterados == {1}
+    assert restaurado.max_id == linha["id"]
+    assert len(restaurado.df) == len(store.df) + 1
+
+def test_persistir_grava_em_segundo_plano(backend, tmp_path, monkeypatch):
+    caminho = str(tmp_path / "transactions.arrow")
+    monkeypatch.setattr("utils.snapshot_utils.caminho_snapshot", lambda origem: caminho)
+    store = TransactionStore(resync_interval=3600)
+    store.sync(backend)
+
+    thread = persistir_no_disco(store, ORIGEM)
+    thread.join(timeout=10)
+
+    df, max_id, _ = carregar_snapshot(caminho, ORIGEM)
+    pd.testing.assert_frame_equal(df, store.df)
+    # Mesma versão: não grava de novo
+    assert persistir_no_disco(store, ORIGEM) is None
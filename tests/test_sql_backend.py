@@ -0,0 +1,44 @@
+import pytest
+
+from storage.sql_backend import SqlBackend
+
+def test_sql_backend_exige_as_consultas():
+    with pytest.raises(TypeError, match="_executar|_gravar|_ler"):
+        SqlBackend()
+
+def test_incrementos_concorrentes_nao_se_perdem(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from storage.sqlite_backend import SQLiteBackend
+
+    caminho = str(tmp_path / "estoque.sqlite")
+    SQLiteBackend(caminho).popular(products=[
+        {"id": 1, "name": "Cola branca", "quantity": 0},
+        {"id": 2, "name": "Papelão", "quantity": 100},
+    ])
+    escritores, incrementos = 8, 50
+
+    def escrever(escritor):
+        # Uma conexão por escritor, como processos diferentes do app
+        backend = SQLiteBackend(caminho)
+        if escritor % 2:
+            for _ in range(incrementos):
+                backend.incrementar_quantidade(1, 1)
+        else:
+            # Em lote, com o mesmo id repetido e outro produto junto
+            for _ in range(incrementos // 10):
+                backend.incrementar_quantidades([(1, 1)] * 10 + [(2, -1)])
+
+    with ThreadPoolExecutor(max_workers=escritores) as executor:
+        list(executor.map(escrever, range(escritores)))
+
+    quantidades = SQLiteBackend(caminho)._ler("SELECT id, quantity FROM products ORDER BY id")
+    assert quantidades["quantity"].tolist() == [escritores * incrementos, 100 - (escritores // 2) * (incrementos // 10)]
+
+def test_incrementar_quantidades_soma_ids_repetidos(backend):
+    backend.popular(products=[{"id": 7, "name": "Tinta", "quantity": 3}])
+
+    linhas = backend.incrementar_quantidades({7: 2})
+    assert [(linha["id"], linha["quantity"]) for linha in linhas] == [(7, 5)]
+    assert backend.incrementar_quantidades([(7, 1), (7, 1), (7, -4)])[0]["quantity"] == 3
+    assert backend.incrementar_quantidade(99, 1) is None
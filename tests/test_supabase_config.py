@@ -0,0 +1,81 @@
+import httpx
+import pytest
+
+from config import supabase_config
+from config.supabase_config import RETENTATIVAS, TransporteComRetentativas
+
+URL = "https://exemplo.supabase.co/rest/v1/transactions"
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    esperas = []
+    monkeypatch.setattr(supabase_config.time, "sleep", esperas.append)
+    return esperas
+
+def _cliente(respostas, retentativas=RETENTATIVAS):
+    """
+    Cliente cujo servidor devolve `respostas` em ordem (status ou exceção);
+    retorna (cliente, chamadas)
+    """
+    chamadas = []
+
+    def servidor(request):
+        chamadas.append(request.method)
+        resposta = respostas[min(len(chamadas), len(respostas)) - 1]
+        if isinstance(resposta, Exception):
+            raise resposta
+        return httpx.Response(resposta, json=[])
+
+    transporte = TransporteComRetentativas(httpx.MockTransport(servidor), retentativas=retentativas, backoff=0.01)
+    return httpx.Client(transport=transporte), chamadas
+
+@pytest.mark.parametrize("status", [502, 503, 504])
+def test_get_repete_em_erro_de_gateway(status):
+    cliente, chamadas = _cliente([status, status, 200])
+
+    assert cliente.get(URL).status_code == 200
+    assert len(chamadas) == 3
+
+def test_get_repete_em_erro_de_conexao():
+    cliente, chamadas = _cliente([httpx.ConnectError("recusada"), httpx.ReadTimeout("lento"), 200])
+
+    assert cliente.get(URL).status_code == 200
+    assert len(chamadas) == 3
+
+@pytest.mark.parametrize("metodo", ["POST", "PATCH"])
+def test_escrita_nao_repete(metodo):
+    cliente, chamadas = _cliente([503, 200])
+    assert cliente.request(metodo, URL, json={}).status_code == 503
+    assert chamadas == [metodo]
+
+    cliente, chamadas = _cliente([httpx.ConnectError("recusada"), 200])
+    with pytest.raises(httpx.ConnectError):
+        cliente.request(metodo, URL, json={})
+    assert chamadas == [metodo]
+
+def test_retentativas_limitadas(sem_espera):
+    cliente, chamadas = _cliente([503], retentativas=RETENTATIVAS)
+
+    assert cliente.get(URL).status_code == 503
+    assert len(chamadas) == RETENTATIVAS + 1
+    assert len(sem_espera) == RETENTATIVAS
+
+    cliente, chamadas = _cliente([httpx.ConnectError("recusada")], retentativas=2)
+    with pytest.raises(httpx.ConnectError):
+        cliente.get(URL)
+    assert len(chamadas) == 3
+
+def test_backoff_exponencial(sem_espera):
+    cliente, _ = _cliente([503], retentativas=3)
+    cliente.get(URL)
+
+    # Jitter entre metade e o total de backoff * 2^tentativa
+    for tentativa, espera in enumerate(sem_espera):
+        assert 0.01 * 2 ** tentativa * 0.5 <= espera <= 0.01 * 2 ** tentativa
+
+def test_erro_do_servidor_nao_repete():
+    # 500 do PostgREST é erro da consulta, não do gateway
+    cliente, chamadas = _cliente([500, 200])
+
+    assert cliente.get(URL).status_code == 500
+    assert len(chamadas) == 1
@@ -0,0 +1,80 @@
+import pytest
+
+from storage.supabase_backend import SupabaseBackend
+from tests.supabase_falso import ClienteFalso
+from utils import supabase_utils
+from utils.supabase_utils import increment_product_quantities, increment_product_quantity, upsert_products
+
+def _incrementar(cliente, params):
+    # Mesmo efeito da função de sql/005_product_quantity.sql
+    produtos = {produto["id"]: produto for produto in cliente.tabelas["products"]}
+    alterados = []
+    for mudanca in params["p_changes"]:
+        produto = produtos.get(mudanca["id"])
+        if produto is not None:
+            produto["quantity"] += mudanca["delta"]
+            alterados.append(dict(produto))
+    return alterados
+
+@pytest.fixture
+def cliente(monkeypatch):
+    cliente = ClienteFalso(
+        {"products": [{"id": i, "name": f"Produto {i}", "quantity": 10} for i in range(1, 8)]},
+        rpcs={"increment_product_quantities": _incrementar},
+    )
+    monkeypatch.setattr(supabase_utils, "get_supabase_client", lambda: cliente)
+    return cliente
+
+def _quantidades(cliente):
+    return {produto["id"]: produto["quantity"] for produto in cliente.tabelas["products"]}
+
+def _lotes(cliente):
+    return [params["p_changes"] for tipo, nome, params in cliente.requisicoes if tipo == "rpc"]
+
+def test_incrementos_em_lotes(cliente):
+    produtos = increment_product_quantities({i: i for i in range(1, 8)}, chunk_size=3)
+
+    assert [len(lote) for lote in _lotes(cliente)] == [3, 3, 1]
+    assert sorted(p["id"] for p in produtos) == list(range(1, 8))
+    assert _quantidades(cliente) == {i: 10 + i for i in range(1, 8)}
+
+def test_incrementos_do_mesmo_produto_somados_antes_dos_lotes(cliente):
+    increment_product_quantities([(1, 5), (2, 1), (1, -2), (3, 4)], chunk_size=2)
+
+    assert _lotes(cliente) == [[{"id": 1, "delta": 3}, {"id": 2, "delta": 1}], [{"id": 3, "delta": 4}]]
+    assert _quantidades(cliente)[1] == 13
+
+def test_sem_incrementos_nao_chama_o_banco(cliente):
+    assert increment_product_quantities([]) == []
+    assert cliente.requisicoes == []
+
+def test_incremento_de_um_produto(cliente):
+    produtos = increment_product_quantity(4, -3)
+
+    assert _lotes(cliente) == [[{"id": 4, "delta": -3}]]
+    assert produtos == [{"id": 4, "name": "Produto 4", "quantity": 7}]
+
+def test_backend_usa_a_mesma_implementacao_em_lotes(cliente):
+    backend = SupabaseBackend(supabase=cliente)
+
+    assert backend.incrementar_quantidade(5, 2)["quantity"] == 12
+    backend.incrementar_quantidades({i: 1 for i in range(1, supabase_utils.CHUNK_SIZE + 2)})
+
+    assert [len(lote) for lote in _lotes(cliente)] == [1, supabase_utils.CHUNK_SIZE, 1]
+    assert _quantidades(cliente)[5] == 13
+
+def test_upsert_separa_produtos_com_e_sem_id(cliente):
+    produtos = [{"id": 1, "name": "Renomeado", "quantity": 0}]
+    produtos += [{"name": f"Novo {i}", "quantity": i} for i in range(5)]
+    produtos += [{"id": 2, "name": "Outro", "quantity": 1}, {"id": None, "name": "Sem id", "quantity": 2}]
+
+    gravados = upsert_products(produtos, chunk_size=4)
+
+    escritas = [(tipo, len(linhas)) for tipo, tabela, linhas in cliente.requisicoes if tipo in ("insert", "upsert")]
+    assert escritas == [("upsert", 2), ("insert", 4), ("insert", 2)]
+    # Mesmas colunas em todas as linhas de uma requisição: sem 'id' nas inserções
+    assert all("id" in linha for tipo, _, linhas in cliente.requisicoes if tipo == "upsert" for linha in linhas)
+    assert not any("id" in linha for tipo, _, linhas in cliente.requisicoes if tipo == "insert" for linha in linhas)
+    assert len(gravados) == len(produtos)
+    assert len(cliente.tabelas["products"]) == 7 + 6
+    assert cliente.tabelas["products"][0]["name"] == "Renomeado"
@@ -0,0 +1,99 @@
+from utils.sync_utils import TransactionStore, resumo_transacoes
+
+def _sincronizado(backend):
+    store = TransactionStore(resync_interval=3600)
+    store.sync(backend)
+    return store
+
+def test_sync_incremental_sem_mudancas_nao_recarrega(backend):
+    store = _sincronizado(backend)
+    ultima_completa = store.last_full_sync
+
+    store.sync(backend)
+
+    assert store.last_full_sync == ultima_completa
+    assert store.itens_alterados == set()
+
+def test_sync_busca_so_o_delta(backend):
+    store = _sincronizado(backend)
+    linha = backend.inserir_transacao({
+        "item": 1, "amount": 5, "transaction_type": "Entrada", "timestamp": "2026-01-01T10:00:00-03:00",
+    })
+
+    store.sync(backend)
+
+    assert store.itens_alterados == {1}
+    assert store.max_id == linha["id"]
+    assert resumo_transacoes(store.df) == resumo_transacoes(backend.carregar_transacoes())
+
+def test_sync_detecta_quantidade_editada(backend):
+    store = _sincronizado(backend)
+    backend._executar("UPDATE transactions SET amount = amount + 7 WHERE id = 10")
+
+    store.sync(backend)
+
+    # Mesma contagem: só a soma de conferência denuncia a edição
+    assert store.itens_alterados is None
+    assert store.df.loc[store.df["id"] == 10, "amount"].item() == backend.carregar_transacoes().set_index("id").loc[10, "amount"]
+
+def test_sync_detecta_remocao_com_insercao(backend):
+    store = _sincronizado(backend)
+    backend._executar("DELETE FROM transactions WHERE id = 20")
+    backend.inserir_transacao({
+        "item": 2, "amount": 3, "transaction_type": "Entrada", "timestamp": "2026-01-01T10:00:00-03:00",
+    })
+
+    store.sync(backend)
+
+    assert 20 not in set(store.df["id"])
+    assert resumo_transacoes(store.df) == resumo_transacoes(backend.carregar_transacoes())
+
+def _movimentacao(item_id, quantidade=1):
+    from utils.estoque_utils import montar_movimentacao
+    return montar_movimentacao(item_id, quantidade, "Entrada")
+
+def test_cache_por_item_nao_guarda_calculo_com_dados_antigos(backend, snapshot):
+    from utils.estoque_utils import aplicar_movimentacoes, cache_por_item, carregar_dados, versao_item
+
+    _, antigas, _, _ = carregar_dados()
+    # Outra sessão grava no item 3 enquanto esta ainda calcula com `antigas`
+    aplicar_movimentacoes([backend.inserir_transacao(_movimentacao(3))])
+    _, atuais, _, _ = carregar_dados()
+
+    assert versao_item(3, antigas) != versao_item(3, atuais) == versao_item(3)
+    assert cache_por_item(3, "n", lambda: "antigo", antigas) == "antigo"
+    assert cache_por_item(3, "n", lambda: "novo", atuais) == "novo"
+    assert cache_por_item(3, "n", lambda: "recalculado", atuais) == "novo"
+
+def test_cache_por_item_aproveita_dados_antigos_de_item_sem_mudanca(backend, snapshot):
+    from utils.estoque_utils import aplicar_movimentacoes, cache_por_item, carregar_dados
+
+    _, antigas, _, _ = carregar_dados()
+    aplicar_movimentacoes([backend.inserir_transacao(_movimentacao(3))])
+    _, atuais, _, _ = carregar_dados()
+
+    assert cache_por_item(4, "n", lambda: "calculado", antigas) == "calculado"
+    assert cache_por_item(4, "n", lambda: "recalculado", atuais) == "calculado"
+
+def test_versao_de_dados_desconhecidos_e_none(backend, snapshot):
+    import pandas as pd
+    from utils.estoque_utils import cache_por_item, carregar_dados, versao_dados, versao_item
+
+    carregar_dados()
+    outras = pd.DataFrame(columns=["id", "item", "amount"])
+
+    assert versao_item(3, outras) is None
+    assert versao_dados(outras) is None
+    assert cache_por_item(3, "n", lambda: "sem cache", outras) == "sem cache"
+    assert cache_por_item(3, "n", lambda: "de novo", outras) == "de novo"
+
+def test_cache_por_item_limitado(backend, snapshot, monkeypatch):
+    from utils.estoque_utils import cache_por_item, carregar_dados
+
+    monkeypatch.setattr(snapshot, "MAX_CACHE_ITENS", 3)
+    carregar_dados()
+    for dia in range(10):
+        cache_por_item(1, ("candles_grafico", dia), lambda: dia)
+    cache_por_item(1, ("candles_grafico", 7), lambda: "recalculado")
+
+    assert list(snapshot.cache_itens) == [(1, ("candles_grafico", 8)), (1, ("candles_grafico", 9)), (1, ("candles_grafico", 7))]
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+# Medições de tempo das etapas (busca das tabelas, saldos, gráficos, PDF).
+# Desligadas por padrão: com ESTOQUE_PERF=1 cada medição vira uma linha JSON
+# no log "estoque.desempenho" e aparece no painel lateral do app.
+ATIVO = os.getenv("ESTOQUE_PERF", "0").lower() in ("1", "true", "sim")
+MAX_MEDICOES = 200
+
+logger = logging.getLogger("estoque.desempenho")
+_local = threading.local()
+
+class _Medicao:
+    __slots__ = ("nome", "campos", "inicio")
+
+    def __init__(self, nome, campos):
+        self.nome = nome
+        self.campos = campos
+
+    def registrar(self, **campos):
+        # Anexa contagens conhecidas só depois do trabalho (linhas, bytes)
+        self.campos.update(campos)
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registrar(self.nome, time.perf_counter() - self.inicio, **self.campos)
+        return False
+
+class _MedicaoInativa:
+    # Usada quando as medições estão desligadas: não mede nem aloca nada
+    def registrar(self, **campos):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_INATIVA = _MedicaoInativa()
+
+def ativar(ativo=True):
+    global ATIVO
+    ATIVO = ativo
+    if ativo:
+        _configurar_logger()
+
+def medir(nome, **campos):
+    """
+    Context manager que mede o bloco: with medir("grafico", pontos=n) as m: ...
+    """
+    if not ATIVO:
+        return _INATIVA
+    return _Medicao(nome, campos)
+
+def medido(nome=None):
+    """
+    Decorador: mede cada chamada da função e anota o tamanho do resultado
+    """
+    def decorador(func):
+        rotulo = nome or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ATIVO:
+                return func(*args, **kwargs)
+            with medir(rotulo) as medicao:
+                resultado = func(*args, **kwargs)
+                medicao.registrar(**tamanho(resultado))
+                return resultado
+        return wrapper
+    return decorador
+
+def tamanho(valor):
+    """
+    Linhas e bytes (em memória) de um DataFrame/Series, ou bytes de um buffer
+    """
+    if hasattr(valor, "memory_usage") and hasattr(valor, "shape"):
+        uso = valor.memory_usage(index=True)
+        return {"linhas": len(valor), "bytes": int(uso.sum() if hasattr(uso, "sum") else uso)}
+    if hasattr(valor, "getbuffer"):
+        return {"bytes": valor.getbuffer().nbytes}
+    if isinstance(valor, (bytes, bytearray)):
+        return {"bytes": len(valor)}
+    return {}
+
+def registrar(nome, segundos, **campos):
+    """
+    Registra uma medição já feita (ex.: tempos das buscas em paralelo)
+    """
+    if not ATIVO:
+        return
+    medicao = {"span": nome, "ms": round(segundos * 1000, 3), **campos}
+    _medicoes().append(medicao)
+    logger.info(json.dumps(medicao, default=str))
+
+def iniciar_execucao():
+    # Cada rerun do Streamlit roda numa thread: começar a lista dela do zero
+    _local.medicoes = deque(maxlen=MAX_MEDICOES)
+
+def medicoes_da_execucao():
+    return list(_medicoes())
+
+def _medicoes():
+    if not hasattr(_local, "medicoes"):
+        iniciar_execucao()
+    return _local.medicoes
+
+def _configurar_logger():
+    # Uma linha JSON por medição, sem depender da configuração de logging do app
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+def mostrar_painel_desempenho():
+    """
+    Painel lateral com as medições deste rerun (só com ESTOQUE_PERF=1)
+    """
+    if not ATIVO:
+        return
+    # Importados aqui: o módulo também é usado fora do Streamlit
+    import pandas as pd
+    import streamlit as st
+
+    medicoes = medicoes_da_execucao()
+    with st.sidebar.expander("Desempenho", expanded=True):
+        if not medicoes:
+            st.caption("Nenhuma etapa medida neste carregamento.")
+            return
+        df = pd.DataFrame(medicoes)
+        st.dataframe(df, hide_index=True, use_container_width=True)
+        st.caption(f"Total medido: {df['ms'].sum():.1f} ms")
+
+if ATIVO:
+    _configurar_logger()
@@ -1,52 +1,167 @@
+import functools
+import uuid
 import pandas as pd
-import streamlit as st
-from config.connection import get_supabase_client
+from storage import get_backend
+from storage.base import objeto_inexistente
+from utils.sync_utils import SharedSnapshot
+from utils.indice_utils import IndiceEstoque, SaldosAcumulados
+from utils.fila_utils import FilaMovimentacoes
+from utils.normalizacao_utils import como_datetime, normalizar_itens, normalizar_transacoes
+from utils.snapshot_utils import restaurar_do_disco, persistir_no_disco
+from utils.desempenho_utils import medido, registrar, tamanho
+from utils.grafico_utils import reduzir_serie
+import os
 import pytz
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-def carregar_dados():
-    supabase = get_supabase_client()
-    
-    # Carregar items
-    items_response = supabase.table('items').select("*").execute()
-    items_df = pd.DataFrame(items_response.data)
-    
-    # Carregar transações
-    transactions_response = supabase.table('transactions').select("*").execute()
-    transactions_df = pd.DataFrame(transactions_response.data)
-    
-    # Carregar pessoas - explicitly select all columns
-    try:
-        people_response = supabase.table('people').select('id, name').execute()
-        people_df = pd.DataFrame(people_response.data)
-    except Exception as e:
-        print(f"Error fetching people data: {str(e)}")
-        people_df = pd.DataFrame(columns=['id', 'name'])
+try:
+    import streamlit as st
+    _por_processo = st.cache_resource
+except ImportError:
+    # Sem Streamlit (ex.: relatorios.py pela linha de comando): um por processo do mesmo jeito
+    st = None
+    _por_processo = functools.cache
+
+def _falhar(mensagem):
+    # Na página, mostra o erro e para o script; fora dela (linha de comando), exceção
+    if st is not None and st.runtime.exists():
+        st.error(mensagem)
+        st.stop()
+    raise ValueError(mensagem)
+
+@_por_processo
+def _get_snapshot():
+    # Um snapshot por processo, compartilhado por todas as sessões
+    return SharedSnapshot()
+
+@_por_processo
+def _get_fila():
+    # Uma fila por processo, com a thread que envia as movimentações pendentes
+    fila = FilaMovimentacoes()
+    snapshot = _get_snapshot()
+    fila.iniciar(
+        lambda lote: get_backend().inserir_transacoes_idempotentes(lote),
+        lambda linhas: aplicar_movimentacoes(linhas, snapshot)
+    )
+    return fila
+
+# Com ESTOQUE_FILA=0 as movimentações vão direto ao banco, bloqueando até a resposta
+USAR_FILA = os.getenv("ESTOQUE_FILA", "1") != "0"
+
+def versao_dados(transactions_df=None):
+    # Versão das transações em memória (muda a cada sincronização ou escrita);
+    # com `transactions_df`, a versão desses dados (None se forem antigos demais)
+    snapshot = _get_snapshot()
+    return snapshot.versao if transactions_df is None else snapshot.versao_de(transactions_df)
+
+def versao_item(item_id, transactions_df=None):
+    # Versão das transações de um item (muda só quando ele é alterado ou tudo é recarregado);
+    # com `transactions_df`, a versão nesses dados (None se forem antigos demais)
+    return _get_snapshot().versao_item(item_id, transactions_df)
 
-    # Carregar projetos
+def invalidar_dados():
+    # Força a próxima leitura a ir ao banco
+    _get_snapshot().invalidar()
+
+def cache_por_item(item_id, nome, calcular, transactions_df=None):
+    """
+    Guarda um valor derivado de um item (ex.: dados do gráfico), compartilhado
+    entre as sessões. É recalculado só quando as transações daquele item mudam.
+    `transactions_df` são as transações que `calcular()` usa (as de carregar_dados).
+    """
+    return _get_snapshot().cache_por_item(item_id, nome, calcular, transactions_df)
+
+def obter_indice(items_df, transactions_df, people_df, projects_df):
+    """
+    Índice por item e setor dos dados atuais (IndiceEstoque), montado uma vez
+    por versão dos DataFrames e compartilhado entre as sessões
+    """
+    snapshot = _get_snapshot()
+    guardado = snapshot.cache.get('indice')
+    if (guardado is not None and guardado.items_df is items_df and guardado.transactions_df is transactions_df
+            and guardado.people_df is people_df and guardado.projects_df is projects_df):
+        return guardado
+
+    # Só os cadastros mudaram: reaproveitar as posições das transações
+    posicoes = guardado.posicoes if guardado is not None and guardado.transactions_df is transactions_df else None
+    indice = IndiceEstoque(items_df, transactions_df, people_df, projects_df, posicoes)
+    snapshot.cache['indice'] = indice
+    return indice
+
+def _executar_medindo(loader):
+    # Roda um carregamento e devolve (resultado, erro, segundos)
+    inicio = time.perf_counter()
     try:
-        projects_response = supabase.table('projects').select('id, name').execute()
-        projects_df = pd.DataFrame(projects_response.data)
+        return loader(), None, time.perf_counter() - inicio
     except Exception as e:
-        print(f"Error fetching projects data: {str(e)}")
-        projects_df = pd.DataFrame(columns=['id', 'name'])
+        return None, e, time.perf_counter() - inicio
+
+def carregar_dados():
+    dados, _ = carregar_dados_com_tempos()
+    return dados
+
+def carregar_dados_com_tempos():
+    # Os DataFrames devolvidos são compartilhados entre sessões: não alterar no lugar
+    (items_df, people_df, projects_df), transactions_df, tempos = _get_snapshot().obter(_carregar_tabelas)
 
     # Ensure required columns exist in items
     if not all(col in items_df.columns for col in ['id', 'name', 'unit']):
-        st.error("Items table is missing required columns: id, name, unit")
-        st.stop()
+        _falhar("Items table is missing required columns: id, name, unit")
     
     # Only check transaction columns if there are transactions
     if not transactions_df.empty:
         if not all(col in transactions_df.columns for col in ['item', 'amount', 'transaction_type']):
-            st.error("Transactions table is missing required columns: item, amount, transaction_type")
-            st.stop()
+            _falhar("Transactions table is missing required columns: item, amount, transaction_type")
     
-    return items_df, transactions_df, people_df, projects_df
+    return (items_df, transactions_df, people_df, projects_df), tempos
+
+def _carregar_tabelas(store):
+    backend = get_backend()
+    inicio = time.perf_counter()
+
+    # Partida a frio: começar do snapshot em disco e buscar só o delta
+    restaurar_do_disco(store, backend.identificador())
+
+    loaders = {
+        # Carregar items
+        'items': lambda: normalizar_itens(backend.carregar_itens()),
+        # Carregar transações (apenas as novas desde a última sincronização)
+        'transactions': lambda: store.sync(backend),
+        # Carregar pessoas - explicitly select all columns
+        'people': backend.carregar_pessoas,
+        # Carregar projetos
+        'projects': backend.carregar_projetos,
+    }
 
-def mostrar_estoque(df, transactions_df=None):
+    # As quatro consultas são independentes: rodar em paralelo
+    with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+        futures = {nome: executor.submit(_executar_medindo, loader) for nome, loader in loaders.items()}
+
+    resultados = {}
+    tempos = {}
+    for nome, future in futures.items():
+        resultado, erro, tempos[nome] = future.result()
+        if erro is None:
+            resultados[nome] = resultado
+            registrar(f"carregar_{nome}", tempos[nome], **tamanho(resultado))
+        elif nome in ('people', 'projects'):
+            print(f"Error fetching {nome} data: {str(erro)}")
+            resultados[nome] = pd.DataFrame(columns=['id', 'name'])
+        else:
+            raise erro
+    tempos['total'] = time.perf_counter() - inicio
+
+    # Grava numa thread à parte para não segurar o lock de carga
+    persistir_no_disco(store, backend.identificador())
+
+    # As transações ficam no store (já sincronizado acima)
+    return (resultados['items'], resultados['people'], resultados['projects']), tempos
+
+def mostrar_estoque(df, transactions_df=None, saldos_df=None):
     if transactions_df is not None:
-        saldo_df = calcular_saldo(df, transactions_df)
+        saldo_df = calcular_saldo(df, transactions_df, saldos_df)
         # Renomear colunas para português
         colunas_pt = {
             "name": "Nome",
@@ -64,25 +179,37 @@ def mostrar_estoque(df, transactions_df=None):
         df = df.rename(columns=colunas_pt)
         st.dataframe(df[["Nome", "Unidade"]], hide_index=True, use_container_width=True)
 
-def mostrar_movimentacoes(df):
+PAGINA_HISTORICO = 50
+
+@medido()
+def carregar_historico(item_id=None, inicio=None, fim=None, limite=None, deslocamento=0):
+    """
+    Transações mais recentes primeiro, filtradas por item e pelo intervalo
+    [inicio, fim) e paginadas no banco, sem passar pelo histórico inteiro.
+    As páginas de um item ficam em cache até as transações dele mudarem.
+    """
+    def consultar():
+        return normalizar_transacoes(get_backend().consultar_transacoes(item_id, inicio, fim, limite, deslocamento))
+
+    if item_id is None:
+        return consultar()
+    return cache_por_item(item_id, ('historico', inicio, fim, limite, deslocamento), consultar)
+
+def mostrar_movimentacoes(df=None, limite=10):
+    # Sem df, as últimas movimentações vêm direto do banco (carregar_historico)
+    if df is None:
+        df = carregar_historico(limite=limite)
     if not df.empty:
+        # Só as `limite` mais recentes, sem ordenar o histórico inteiro
+        timestamps = como_datetime(df['timestamp'])
+        df = df.assign(timestamp=timestamps).loc[timestamps.nlargest(limite).index]
+
         # Get items data to join with transactions
-        supabase = get_supabase_client()
-        items_response = supabase.table('items').select("id,name").execute()
-        items_df = pd.DataFrame(items_response.data)
+        items_df = get_backend().carregar_itens()[["id", "name"]]
         
         # Join transactions with items to get names
         df = pd.merge(df, items_df, left_on="item", right_on="id", how="left")
         
-        # Convert timestamp to datetime and format for display
-        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
-        
-        # Sort transactions by timestamp in descending order
-        df = df.sort_values(by="timestamp", ascending=False)
-        
-        # Display only the last 10 most recent transactions
-        df = df.head(10)
-        
         df['timestamp'] = df['timestamp'].dt.strftime("%d/%m/%Y %H:%M:%S")
         
         # Verificar quais colunas existem no DataFrame
@@ -108,11 +235,69 @@ def mostrar_movimentacoes(df):
     else:
         st.write("Nenhuma movimentação encontrada.")
 
+def registrar_movimentacao(item_id, quantidade, tipo, observacao=None, author_id=None):
+    """
+    Grava a movimentação na fila local e retorna na hora (a idempotency_key);
+    a thread da fila envia ao banco e atualiza os dados em memória. Sem a
+    fila (ESTOQUE_FILA=0), insere direto e retorna a linha gravada.
+    """
+    transacao = montar_movimentacao(item_id, quantidade, tipo, observacao, author_id)
+    if USAR_FILA:
+        return _get_fila().enfileirar(transacao)
+    linha = get_backend().inserir_transacao(transacao)
+    aplicar_movimentacoes([linha])
+    return linha
+
+def estado_fila():
+    """
+    Pendentes, enviadas, com erro e as movimentações recentes da fila (None sem a fila)
+    """
+    return _get_fila().resumo() if USAR_FILA else None
+
+# Quanto o registro espera o envio antes do rerun da página: só o bastante
+# para um banco rápido confirmar; o resto aparece como pendente no painel da fila
+ESPERA_ENVIO = float(os.getenv("ESTOQUE_FILA_ESPERA", "0.3"))
+
+def aguardar_envio(chave, timeout=ESPERA_ENVIO):
+    """
+    Espera até `timeout` segundos a movimentação da fila chegar ao banco e
+    aos dados em memória; retorna o estado ('enviada', 'pendente' ou 'erro')
+    """
+    return _get_fila().aguardar(chave, timeout) if USAR_FILA else "enviada"
+
+def reenviar_movimentacoes_com_erro():
+    # Volta as movimentações com erro para a fila de envio
+    return _get_fila().reenviar_com_erro() if USAR_FILA else 0
+
+def aplicar_movimentacoes(linhas, snapshot=None):
+    """
+    Aplica linhas recém-inseridas ao snapshot de transações, ao cache de
+    saldos e invalida os caches apenas dos itens afetados
+    """
+    snapshot = snapshot or _get_snapshot()
+    # Reenvios idempotentes devolvem também linhas já gravadas (e talvez já sincronizadas)
+    linhas = [linha for linha in linhas if linha]
+    ids = [linha["id"] for linha in linhas]
+    if ids:
+        ja_aplicados = set(snapshot.store.df.loc[snapshot.store.df["id"].isin(ids), "id"].tolist()) if not snapshot.store.df.empty else set()
+        linhas = [linha for linha in linhas if linha["id"] not in ja_aplicados]
+    if not linhas:
+        return
+    versao_anterior, versao_nova = snapshot.aplicar(linhas)
+
+    # Saldos em cache: somar as quantidades novas em vez de consultar de novo
+    cache_saldos = snapshot.cache.get('saldos')
+    if cache_saldos is not None and cache_saldos[0] == versao_anterior and cache_saldos[1] is not None:
+        novas = pd.DataFrame(linhas).groupby("item")["amount"].sum()
+        saldos = cache_saldos[1].set_index("item")["amount"].add(novas, fill_value=0).rename("amount").rename_axis("item").reset_index()
+        snapshot.cache['saldos'] = (versao_nova, saldos)
+
 def criar_movimentacao(item_id, quantidade, tipo, observacao=None, author_id=None):
-    supabase = get_supabase_client()
-    
+    return get_backend().inserir_transacao(montar_movimentacao(item_id, quantidade, tipo, observacao, author_id))
+
+def montar_movimentacao(item_id, quantidade, tipo, observacao=None, author_id=None):
     # Create transaction with ISO format timestamp
-    transaction_data = {
+    return {
         "item": item_id,
         "amount": quantidade if tipo == "Entrada" else -quantidade,
         "transaction_type": tipo,
@@ -120,16 +305,166 @@ def criar_movimentacao(item_id, quantidade, tipo, observacao=None, author_id=Non
         "author": author_id,
         "timestamp": datetime.now(pytz.timezone('America/Sao_Paulo')).isoformat()
     }
-    
-    supabase.table('transactions').insert(transaction_data).execute()
 
-def calcular_saldo(items_df, transactions_df):
-    if transactions_df.empty:
-        items_df["Saldo Atual"] = 0
-        return items_df
-    
-    # Calculate total transactions per item
-    saldo = transactions_df.groupby("item")["amount"].sum().reset_index()
+TIPOS_MOVIMENTACAO = ["Entrada", "Saída", "Contagem inicial"]
+COLUNAS_IMPORTACAO = ["item", "quantidade", "tipo", "observacao", "autor"]
+
+def validar_movimentacoes(movimentacoes, items_df, people_df):
+    """
+    Valida um lote de movimentações (colunas item, quantidade, tipo e,
+    opcionalmente, observacao e autor). Retorna um DataFrame com a linha e o
+    erro de cada problema encontrado; vazio se o lote estiver correto.
+    """
+    df = pd.DataFrame(movimentacoes)
+    faltando = [c for c in ["item", "quantidade", "tipo"] if c not in df.columns]
+    if faltando:
+        return pd.DataFrame({"linha": [None], "erro": [f"Colunas obrigatórias ausentes: {', '.join(faltando)}"]})
+
+    quantidade = pd.to_numeric(df["quantidade"], errors="coerce")
+    item = pd.to_numeric(df["item"], errors="coerce")
+    checagens = {
+        "Item desconhecido": ~item.isin(items_df["id"]),
+        "Quantidade deve ser um inteiro positivo": ~((quantidade > 0) & (quantidade % 1 == 0)),
+        f"Tipo deve ser um de: {', '.join(TIPOS_MOVIMENTACAO)}": ~df["tipo"].isin(TIPOS_MOVIMENTACAO),
+    }
+    if "autor" in df.columns:
+        autor = pd.to_numeric(df["autor"], errors="coerce")
+        checagens["Autor desconhecido"] = df["autor"].notna() & ~autor.isin(people_df["id"])
+
+    erros = [
+        pd.DataFrame({"linha": df.index[mascara] + 1, "erro": mensagem})
+        for mensagem, mascara in checagens.items() if mascara.any()
+    ]
+    if not erros:
+        return pd.DataFrame(columns=["linha", "erro"])
+    return pd.concat(erros, ignore_index=True).sort_values("linha", kind="stable").reset_index(drop=True)
+
+# Namespace das chaves de idempotência das importações em lote
+NAMESPACE_IMPORTACAO = uuid.UUID("5b0f6f0e-8c1a-4d52-9a57-2f4f1f3c9e21")
+
+def criar_movimentacoes_em_lote(movimentacoes, items_df, people_df, importacao=None, chunk_size=200):
+    """
+    Valida e insere um lote de movimentações em requisições de até
+    `chunk_size` linhas. Nada é inserido se alguma linha for inválida.
+
+    `importacao` identifica esta importação (ex.: um uuid4 por arquivo
+    enviado; padrão: um novo) e, com a posição, forma a idempotency_key de
+    cada linha: repetir a mesma importação depois de uma falha no meio grava
+    só o que faltou, e importar de novo o mesmo conteúdo (outra `importacao`)
+    grava tudo outra vez. Retorna (linhas gravadas, quantas são novas).
+    """
+    erros = validar_movimentacoes(movimentacoes, items_df, people_df)
+    if not erros.empty:
+        raise ValueError(f"{len(erros)} invalid movement(s): " + "; ".join(
+            f"row {linha}: {erro}" for linha, erro in erros.head(10).itertuples(index=False)
+        ))
+
+    df = pd.DataFrame(movimentacoes).reset_index(drop=True)
+    quantidade = pd.to_numeric(df["quantidade"]).astype(int)
+    observacao = df["observacao"] if "observacao" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    autor = df["autor"] if "autor" in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+    # Mesmas regras de criar_movimentacao: contagem inicial é uma entrada com observação fixa
+    contagem = df["tipo"] == "Contagem inicial"
+    agora = datetime.now(pytz.timezone('America/Sao_Paulo')).isoformat()
+    transacoes = pd.DataFrame({
+        "item": pd.to_numeric(df["item"]).astype(int),
+        "amount": quantidade.where(df["tipo"] != "Saída", -quantidade),
+        "transaction_type": df["tipo"].where(~contagem, "Entrada"),
+        "observation": observacao.where(~contagem, "Contagem inicial"),
+        "author": pd.to_numeric(autor, errors="coerce").astype("Int64"),
+        "timestamp": agora
+    })
+    importacao = importacao or str(uuid.uuid4())
+    transacoes["idempotency_key"] = [str(uuid.uuid5(NAMESPACE_IMPORTACAO, f"{importacao}:{i}")) for i in range(len(df))]
+    registros = transacoes.astype(object).where(transacoes.notna(), None).to_dict("records")
+
+    backend = get_backend()
+    inseridas = []
+    for inicio in range(0, len(registros), chunk_size):
+        inseridas.extend(backend.inserir_transacoes_idempotentes(registros[inicio:inicio + chunk_size]))
+
+    # Linhas de uma tentativa anterior voltam com o horário daquela tentativa
+    if not inseridas:
+        return inseridas, 0
+    horarios = como_datetime(pd.Series([linha["timestamp"] for linha in inseridas]))
+    return inseridas, int((horarios == como_datetime(pd.Series([agora])).iloc[0]).sum())
+
+def ler_arquivo_movimentacoes(arquivo):
+    """
+    Lê um CSV ou XLSX de movimentações enviado pelo st.file_uploader
+    """
+    if arquivo.name.lower().endswith(".xlsx"):
+        df = pd.read_excel(arquivo)
+    else:
+        df = pd.read_csv(arquivo)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+def carregar_saldos(transactions_df=None):
+    # Reaproveitar enquanto as transações em memória não mudarem
+    snapshot = _get_snapshot()
+    versao = snapshot.versao
+    cache_saldos = snapshot.cache.get('saldos')
+    if cache_saldos is not None and cache_saldos[0] == versao:
+        return cache_saldos[1]
+
+    saldos = _carregar_saldos(transactions_df)
+    snapshot.cache['saldos'] = (versao, saldos)
+    return saldos
+
+@medido("carregar_saldos")
+def _carregar_saldos(transactions_df=None):
+    # Saldo por item agregado no banco; None se a agregação não estiver disponível
+    saldos = _agregar_no_servidor('saldos', lambda backend: backend.saldos())
+    if saldos is None and transactions_df is not None and not transactions_df.empty:
+        # Sem a view, ainda dá para partir dos checkpoints e somar só o que veio depois
+        checkpoints = _agregar_no_servidor('checkpoints', lambda backend: backend.carregar_checkpoints())
+        if checkpoints is not None and not checkpoints.empty:
+            saldos = saldo_com_checkpoints(checkpoints, transactions_df)
+    return saldos
+
+def saldo_com_checkpoints(checkpoints_df, transactions_df):
+    # Saldo = checkpoint do item + transações com id posterior ao último consolidado
+    ultimo_id = transactions_df["item"].map(checkpoints_df.set_index("item")["last_transaction_id"]).fillna(0)
+    recentes = transactions_df.loc[transactions_df["id"] > ultimo_id, ["item", "amount"]]
+    saldo = pd.concat([
+        checkpoints_df[["item", "balance"]].rename(columns={"balance": "amount"}),
+        recentes
+    ], ignore_index=True)
+    return saldo.groupby("item")["amount"].sum().reset_index()
+
+def carregar_serie_diaria(item_id=None):
+    # Saldo acumulado por dia agregado no banco; None se não estiver disponível
+    return _agregar_no_servidor('serie_diaria', lambda backend: backend.serie_diaria(item_id))
+
+_agregacoes_indisponiveis = set()
+
+def _agregar_no_servidor(nome, consulta):
+    # Sem a view/RPC no banco, lembrar da falha e usar o cálculo local em pandas;
+    # outras falhas (rede, timeout) usam o pandas só nesta chamada
+    if nome in _agregacoes_indisponiveis:
+        return None
+    try:
+        return consulta(get_backend())
+    except Exception as e:
+        if objeto_inexistente(e):
+            print(f"Server-side aggregation '{nome}' unavailable, using pandas: {str(e)}")
+            _agregacoes_indisponiveis.add(nome)
+        else:
+            print(f"Server-side aggregation '{nome}' failed, using pandas this time: {str(e)}")
+        return None
+
+@medido()
+def calcular_saldo(items_df, transactions_df, saldos_df=None):
+    if saldos_df is not None:
+        # Saldo já agregado no banco (carregar_saldos)
+        saldo = saldos_df[["item", "amount"]]
+    elif transactions_df.empty:
+        return items_df.assign(**{"Saldo Atual": 0})
+    else:
+        # Calculate total transactions per item
+        saldo = transactions_df.groupby("item")["amount"].sum().reset_index()
     
     # Merge with items using 'id' from items and 'item' from transactions
     result = pd.merge(items_df, saldo, left_on="id", right_on="item", how="left")
@@ -141,29 +476,50 @@ def calcular_saldo(items_df, transactions_df):
     
     return result
 
-def preparar_dados_grafico(items_df, transactions_df, selected_item_id=None):
-    if transactions_df.empty:
-        return pd.DataFrame()
-    
-    # Convert timestamp to datetime
-    transactions_df['timestamp'] = pd.to_datetime(transactions_df['timestamp'])
-    
-    # Merge transactions with items to get names
-    df = pd.merge(transactions_df, items_df[['id', 'name']], left_on='item', right_on='id', how='left')
-    
-    # Filter for the selected item if provided
-    if selected_item_id is not None:
-        df = df[df['item'] == selected_item_id]
+def saldos_em(transactions_df, instante, acumulados=None):
+    """
+    Saldo de cada item em `instante` (DataFrame item/amount, como carregar_saldos).
+    `acumulados` (ex.: indice.acumulados) evita refazer a ordenação a cada consulta.
+    """
+    acumulados = acumulados if acumulados is not None else SaldosAcumulados(transactions_df)
+    return acumulados.em(instante)
+
+@medido()
+def preparar_dados_grafico(items_df, transactions_df, selected_item_id=None, serie_df=None, pontos_maximos=None):
+    """
+    Saldo acumulado por dia (índice date, uma coluna por item). Com
+    `pontos_maximos`, a série é reduzida com LTTB (grafico_utils).
+    """
+    if serie_df is not None:
+        # Série diária já agregada no banco (carregar_serie_diaria)
+        df = pd.merge(serie_df, items_df[['id', 'name']], left_on='item', right_on='id', how='left')
+        if selected_item_id is not None:
+            df = df[df['item'] == selected_item_id]
         if df.empty:
             return pd.DataFrame()
-    
-    # Calculate cumulative sum for each item
-    df = df.sort_values('timestamp')
-    df['cumulative_amount'] = df.groupby('item')['amount'].cumsum()
-    
-    # Aggregate data by day and ensure dates are in datetime format
-    df['date'] = pd.to_datetime(df['timestamp'].dt.date)
-    df = df.groupby(['date', 'name'])['cumulative_amount'].last().reset_index()
+    else:
+        if transactions_df.empty:
+            return pd.DataFrame()
+        
+        # Convert timestamp to datetime
+        transactions_df = transactions_df.assign(timestamp=como_datetime(transactions_df['timestamp']))
+        
+        # Merge transactions with items to get names
+        df = pd.merge(transactions_df, items_df[['id', 'name']], left_on='item', right_on='id', how='left')
+        
+        # Filter for the selected item if provided
+        if selected_item_id is not None:
+            df = df[df['item'] == selected_item_id]
+            if df.empty:
+                return pd.DataFrame()
+        
+        # Calculate cumulative sum for each item
+        df = df.sort_values('timestamp')
+        df['cumulative_amount'] = df.groupby('item')['amount'].cumsum()
+        
+        # Aggregate data by day and ensure dates are in datetime format
+        df['date'] = pd.to_datetime(df['timestamp'].dt.date)
+        df = df.groupby(['date', 'name'])['cumulative_amount'].last().reset_index()
     
     # Create a pivot table with date as index and items as columns
     pivot_df = df.pivot_table(
@@ -176,5 +532,42 @@ def preparar_dados_grafico(items_df, transactions_df, selected_item_id=None):
     # If no data after pivot, return empty DataFrame
     if pivot_df.empty:
         return pd.DataFrame()
-    
-    return pivot_df
\ No newline at end of file
+
+    if pontos_maximos is not None:
+        pivot_df = reduzir_serie(pivot_df, pontos_maximos)
+    return pivot_df
+
+@medido()
+def preparar_dados_candlestick(items_df, transactions_df, item_ids=None):
+    """
+    Abertura, máxima, mínima e fechamento diários do saldo de cada item.
+
+    Abertura é o fechamento do dia anterior (0 no primeiro dia); máxima e
+    mínima consideram o saldo após cada transação do dia, não só os
+    fechamentos. Retorna colunas date, item, name, open, high, low, close.
+    """
+    colunas = ['date', 'item', 'name', 'open', 'high', 'low', 'close']
+    if transactions_df.empty:
+        return pd.DataFrame(columns=colunas)
+
+    df = transactions_df[['item', 'amount', 'timestamp']]
+    if item_ids is not None:
+        df = df[df['item'].isin(item_ids)]
+        if df.empty:
+            return pd.DataFrame(columns=colunas)
+
+    # Dia local de cada transação
+    timestamps = como_datetime(df['timestamp'])
+    df = df.assign(timestamp=timestamps, date=timestamps.dt.tz_localize(None).dt.normalize())
+    df = df.sort_values(['item', 'timestamp'], kind='stable')
+
+    # Saldo após cada transação
+    df['balance'] = df.groupby('item')['amount'].cumsum()
+
+    diario = df.groupby(['item', 'date'], sort=True)['balance'].agg(close='last', high='max', low='min').reset_index()
+    diario['open'] = diario.groupby('item')['close'].shift(1).fillna(0)
+    diario['high'] = diario[['high', 'open']].max(axis=1)
+    diario['low'] = diario[['low', 'open']].min(axis=1)
+
+    diario = pd.merge(diario, items_df[['id', 'name']], left_on='item', right_on='id', how='left')
+    return diario[colunas].astype({'open': float, 'high': float, 'low': float, 'close': float})
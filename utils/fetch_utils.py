@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+# PostgREST corta cada resposta em `max-rows` linhas (1000 por padrão no Supabase)
+PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", "1000"))
+MAX_WORKERS = int(os.getenv("SUPABASE_FETCH_WORKERS", "4"))
+
+def buscar_registros(supabase, table, columns="*", filtro=None, order="id", page_size=None, max_workers=None):
+    """
+    Busca todas as linhas de uma tabela em páginas (ranges) buscadas em paralelo.
+
+    A primeira página já traz a contagem total; as demais são buscadas num
+    pool limitado a `max_workers` threads e remontadas na ordem de `order`.
+    `filtro` recebe a query e devolve a query filtrada (ex.: lambda q: q.gt("id", 10)).
+    """
+    page_size = page_size or PAGE_SIZE
+    max_workers = max_workers or MAX_WORKERS
+
+    def montar_query(count=None):
+        query = supabase.table(table).select(columns, count=count)
+        if filtro is not None:
+            query = filtro(query)
+        return query.order(order)
+
+    first = montar_query(count="exact").range(0, page_size - 1).execute()
+    rows = list(first.data)
+    total = first.count if first.count is not None else len(rows)
+
+    # Se o servidor devolveu menos linhas que o pedido, o limite dele é menor
+    if len(rows) < page_size and len(rows) < total:
+        page_size = len(rows)
+    if not rows or total <= len(rows):
+        return rows
+
+    starts = range(len(rows), total, page_size)
+
+    def buscar_pagina(start):
+        return montar_query().range(start, start + page_size - 1).execute().data
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for page in executor.map(buscar_pagina, starts):
+            rows.extend(page)
+
+    return rows
+
+def buscar_tabela(supabase, table, columns="*", filtro=None, order="id", page_size=None, max_workers=None):
+    """
+    Mesmo que `buscar_registros`, mas já monta o DataFrame
+    """
+    return pd.DataFrame(buscar_registros(supabase, table, columns, filtro, order, page_size, max_workers))
@@ -0,0 +1,244 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from storage.base import erro_transitorio
+
+# Fila local (SQLite) das movimentações registradas no app: gravar aqui é
+# imediato e sobrevive a quedas de rede e reinícios. Uma thread envia as
+# pendentes em lotes com a idempotency_key de cada uma, então reenviar um
+# lote que já tinha chegado ao banco não duplica nada. Uma linha que o banco
+# recusa (ou que esgota as tentativas) vai para o estado 'erro' sem segurar
+# as que vêm depois dela.
+FILA_PATH = os.getenv("ESTOQUE_FILA_PATH", os.path.join(os.path.expanduser("~"), ".cache", "estoque", "fila.sqlite"))
+TAMANHO_LOTE = int(os.getenv("ESTOQUE_FILA_LOTE", "100"))
+INTERVALO = float(os.getenv("ESTOQUE_FILA_INTERVALO", "5"))
+# Com a espera exponencial (até ESPERA_MAXIMA), 20 tentativas cobrem cerca de uma hora fora do ar
+MAX_TENTATIVAS = int(os.getenv("ESTOQUE_FILA_TENTATIVAS", "20"))
+ESPERA_MAXIMA = 300
+MANTER_ENVIADAS = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movimentacoes (
+    chave TEXT PRIMARY KEY,
+    dados TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendente',
+    criado_em REAL NOT NULL,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    erro TEXT,
+    enviado_em REAL,
+    transacao_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS movimentacoes_estado_idx ON movimentacoes (estado, criado_em);
+"""
+
+class FilaMovimentacoes:
+    """
+    Fila durável de transações a inserir, com envio em segundo plano.
+
+    `enfileirar` grava a transação com uma idempotency_key nova e retorna na
+    hora. `iniciar(enviar, ao_enviar)` sobe a thread que chama
+    `enviar(lote)` (insert idempotente no backend) e, em caso de sucesso,
+    `ao_enviar(linhas gravadas)`. Falhas passageiras (rede, banco fora)
+    ficam na fila e são tentadas de novo com espera exponencial, até
+    MAX_TENTATIVAS. Se o banco recusa um lote, ele é dividido ao meio até
+    isolar a linha recusada, que vai para o estado 'erro'.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or FILA_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self.acordar = threading.Event()
+        # Avisa quem espera uma movimentação (aguardar) que o estado dela mudou
+        self.mudou = threading.Condition()
+        self.thread = None
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+    def enfileirar(self, transacao):
+        """
+        Grava a transação na fila e retorna a idempotency_key dela
+        """
+        chave = str(uuid.uuid4())
+        dados = {**transacao, "idempotency_key": chave}
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO movimentacoes (chave, dados, criado_em) VALUES (?, ?, ?)",
+                (chave, json.dumps(dados, default=str), time.time())
+            )
+        self.acordar.set()
+        return chave
+
+    def pendentes(self, limite=None):
+        with self.lock:
+            linhas = self.conn.execute(
+                "SELECT chave, dados FROM movimentacoes WHERE estado = 'pendente' ORDER BY criado_em LIMIT ?",
+                (limite or -1,)
+            ).fetchall()
+        return [json.loads(linha["dados"]) for linha in linhas]
+
+    def marcar_enviadas(self, linhas):
+        agora = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE movimentacoes SET estado = 'enviada', enviado_em = ?, transacao_id = ?, erro = NULL WHERE chave = ?",
+                [(agora, linha.get("id"), linha["idempotency_key"]) for linha in linhas]
+            )
+
+    def marcar_erro(self, chaves, erro):
+        # Falha passageira: continua pendente até esgotar as tentativas
+        with self.lock:
+            self.conn.executemany(
+                """
+                UPDATE movimentacoes
+                SET tentativas = tentativas + 1, erro = ?,
+                    estado = CASE WHEN tentativas + 1 >= ? THEN 'erro' ELSE estado END
+                WHERE chave = ?
+                """,
+                [(erro, MAX_TENTATIVAS, chave) for chave in chaves]
+            )
+        self._avisar()
+
+    def marcar_recusada(self, chave, erro):
+        # O banco recusou os dados: reenviar não adianta
+        with self.lock:
+            self.conn.execute(
+                "UPDATE movimentacoes SET tentativas = tentativas + 1, erro = ?, estado = 'erro' WHERE chave = ?",
+                (erro, chave)
+            )
+        self._avisar()
+
+    def reenviar_com_erro(self):
+        """
+        Volta as movimentações com erro para pendente (ex.: depois de corrigir
+        o cadastro); retorna quantas
+        """
+        with self.lock:
+            total = self.conn.execute(
+                "UPDATE movimentacoes SET estado = 'pendente', tentativas = 0 WHERE estado = 'erro'"
+            ).rowcount
+        self.acordar.set()
+        return total
+
+    def estado(self, chave):
+        with self.lock:
+            linha = self.conn.execute("SELECT estado FROM movimentacoes WHERE chave = ?", (chave,)).fetchone()
+        return linha["estado"] if linha else None
+
+    def aguardar(self, chave, timeout):
+        """
+        Espera até `timeout` segundos a movimentação sair de 'pendente'
+        (enviada e aplicada pelo `ao_enviar`, ou com erro); retorna o estado
+        """
+        limite = time.monotonic() + timeout
+        with self.mudou:
+            while True:
+                estado = self.estado(chave)
+                restante = limite - time.monotonic()
+                if estado != "pendente" or restante <= 0:
+                    return estado
+                self.mudou.wait(restante)
+
+    def _avisar(self):
+        with self.mudou:
+            self.mudou.notify_all()
+
+    def resumo(self, limite=20):
+        """
+        Contagem por estado e as movimentações com erro e mais recentes (para a interface)
+        """
+        with self.lock:
+            contagem = dict(self.conn.execute("SELECT estado, COUNT(*) FROM movimentacoes GROUP BY estado").fetchall())
+            recentes = self.conn.execute(
+                "SELECT chave, dados, estado, criado_em, tentativas, erro, enviado_em FROM movimentacoes ORDER BY estado = 'erro' DESC, criado_em DESC LIMIT ?",
+                (limite,)
+            ).fetchall()
+        return {
+            "pendentes": contagem.get("pendente", 0),
+            "enviadas": contagem.get("enviada", 0),
+            "com_erro": contagem.get("erro", 0),
+            "recentes": [{**dict(linha), "dados": json.loads(linha["dados"])} for linha in recentes],
+        }
+
+    def limpar_enviadas(self, mais_antigas_que=MANTER_ENVIADAS):
+        with self.lock:
+            return self.conn.execute(
+                "DELETE FROM movimentacoes WHERE estado = 'enviada' AND enviado_em < ?",
+                (time.time() - mais_antigas_que,)
+            ).rowcount
+
+    def enviar_pendentes(self, enviar, ao_enviar=None):
+        """
+        Envia as pendentes em lotes de TAMANHO_LOTE; retorna quantas foram enviadas.
+        Falhas passageiras sobem depois de marcar o erro no lote; linhas
+        recusadas vão para 'erro' e o envio continua com as seguintes.
+        """
+        total = 0
+        anteriores = set()
+        while True:
+            lote = self.pendentes(TAMANHO_LOTE)
+            chaves = {transacao["idempotency_key"] for transacao in lote}
+            # Vazia, ou o banco não devolveu alguma chave do lote anterior: não repetir em laço
+            if not lote or chaves & anteriores:
+                return total
+            total += self._enviar_lote(lote, enviar, ao_enviar)
+            anteriores = chaves
+
+    def _enviar_lote(self, lote, enviar, ao_enviar):
+        try:
+            linhas = enviar(lote)
+        except Exception as e:
+            if erro_transitorio(e):
+                self.marcar_erro([transacao["idempotency_key"] for transacao in lote], str(e))
+                raise
+            if len(lote) == 1:
+                print(f"Movement {lote[0]['idempotency_key']} rejected by the backend: {str(e)}")
+                self.marcar_recusada(lote[0]["idempotency_key"], str(e))
+                return 0
+            # Dividir ao meio até isolar a(s) linha(s) recusada(s)
+            meio = len(lote) // 2
+            return self._enviar_lote(lote[:meio], enviar, ao_enviar) + self._enviar_lote(lote[meio:], enviar, ao_enviar)
+
+        # Aplicar antes de marcar: quem espera (aguardar) já encontra a linha nos dados
+        if ao_enviar is not None:
+            ao_enviar(linhas)
+        self.marcar_enviadas(linhas)
+        self._avisar()
+
+        faltando = {transacao["idempotency_key"] for transacao in lote} - {linha["idempotency_key"] for linha in linhas}
+        if faltando:
+            self.marcar_erro(faltando, "not returned by the backend")
+        return len(linhas)
+
+    def iniciar(self, enviar, ao_enviar=None):
+        """
+        Sobe a thread de envio (uma por fila); ela também envia o que ficou
+        pendente de execuções anteriores
+        """
+        if self.thread is not None:
+            return self.thread
+        self.thread = threading.Thread(target=self._loop, args=(enviar, ao_enviar), name="estoque-fila", daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def _loop(self, enviar, ao_enviar):
+        espera = INTERVALO
+        while True:
+            self.acordar.wait(espera)
+            self.acordar.clear()
+            try:
+                self.enviar_pendentes(enviar, ao_enviar)
+                self.limpar_enviadas()
+                espera = INTERVALO
+            except Exception as e:
+                # Sem rede ou banco fora: esperar cada vez mais (até ESPERA_MAXIMA)
+                espera = min(espera * 2, ESPERA_MAXIMA)
+                print(f"Error flushing movement queue (retrying in {espera:.0f}s): {str(e)}")
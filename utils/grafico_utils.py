@@ -0,0 +1,199 @@
+import os
+import numpy as np
+import pandas as pd
+from utils.desempenho_utils import medido
+
+# Redução dos pontos enviados ao navegador: históricos de anos viram candles
+# semanais/mensais (OHLC por período) e as séries de linha passam pelo LTTB,
+# sempre dentro de um orçamento de pontos por gráfico.
+PONTOS_GRAFICO = int(os.getenv("ESTOQUE_GRAFICO_PONTOS", "400"))
+
+# Período do pandas, dias aproximados e nome usado nos rótulos
+PERIODOS = [
+    ("D", 1, "dia"),
+    ("W", 7, "semana"),
+    ("M", 30.44, "mês"),
+    ("Q", 91.31, "trimestre"),
+    ("Y", 365.25, "ano"),
+]
+FORMATO_DATA = {"D": "%d/%m/%Y", "W": "%d/%m/%Y", "M": "%m/%Y", "Q": "%m/%Y", "Y": "%Y"}
+ARTIGO = {"dia": "do", "semana": "da", "mês": "do", "trimestre": "do", "ano": "do"}
+
+def escolher_periodo(inicio, fim, pontos, pontos_maximos=None):
+    """
+    Menor período (dia, semana, mês...) que deixa o intervalo [inicio, fim]
+    com no máximo `pontos_maximos` candles; "D" se os `pontos` já cabem
+    """
+    pontos_maximos = pontos_maximos or PONTOS_GRAFICO
+    if pontos <= pontos_maximos:
+        return "D"
+    dias = (pd.Timestamp(fim) - pd.Timestamp(inicio)).days + 1
+    for periodo, duracao, _ in PERIODOS[1:]:
+        # +1: o intervalo pode começar no meio de um período
+        if dias / duracao + 1 <= pontos_maximos:
+            return periodo
+    return PERIODOS[-1][0]
+
+def agregar_candles(candles, periodo):
+    """
+    Junta candles diários (date, item, name, open, high, low, close) em
+    candles do período: abertura do primeiro dia, fechamento do último,
+    máxima e mínima do período. `date` vira o início do período.
+    """
+    if periodo == "D" or candles.empty:
+        return candles
+    inicio_periodo = candles["date"].dt.to_period(periodo).dt.start_time
+    agregado = candles.assign(date=inicio_periodo).groupby(["item", "date"], sort=True).agg(
+        name=("name", "first"),
+        open=("open", "first"),
+        high=("high", "max"),
+        low=("low", "min"),
+        close=("close", "last"),
+    ).reset_index()
+    return agregado[candles.columns]
+
+@medido()
+def reduzir_candles(candles, inicio=None, pontos_maximos=None):
+    """
+    Candles de `inicio` em diante (None = histórico inteiro), agregados no
+    período que cabe no orçamento de pontos. Retorna (candles, período).
+    Um item sem movimento em `inicio` ganha ali um candle parado no último
+    fechamento anterior: o intervalo mostra o saldo mesmo sem movimentos.
+    """
+    if inicio is not None and not candles.empty:
+        inicio = pd.Timestamp(inicio)
+        anteriores = candles[candles["date"] < inicio]
+        candles = candles[candles["date"] >= inicio]
+        if not anteriores.empty:
+            # O saldo de antes do intervalo vira a abertura do primeiro candle
+            ultimos = anteriores.drop_duplicates("item", keep="last")
+            ultimos = ultimos[~ultimos["item"].isin(candles.loc[candles["date"] == inicio, "item"])]
+            parados = ultimos.assign(date=inicio, open=ultimos["close"], high=ultimos["close"], low=ultimos["close"])
+            candles = pd.concat([parados, candles], ignore_index=True).sort_values(["item", "date"], kind="stable", ignore_index=True)
+    if candles.empty:
+        return candles, "D"
+    # Um candle por dia por item: o maior item decide
+    pontos = candles.groupby("item").size().max()
+    periodo = escolher_periodo(candles["date"].min(), candles["date"].max(), pontos, pontos_maximos)
+    return agregar_candles(candles, periodo), periodo
+
+def lttb(x, y, pontos):
+    """
+    Largest-Triangle-Three-Buckets: posições de `pontos` amostras de (x, y)
+    que preservam o formato da curva (picos e vales). Sempre inclui a
+    primeira e a última.
+    """
+    n = len(x)
+    if pontos >= n or pontos < 3:
+        return np.arange(n) if pontos >= n else np.array([0, n - 1][:max(pontos, 0)])
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Baldes de tamanho igual entre a primeira e a última amostra
+    limites = np.linspace(1, n - 1, pontos - 1).astype(np.intp)
+    escolhidos = np.empty(pontos, dtype=np.intp)
+    escolhidos[0] = 0
+    escolhidos[-1] = n - 1
+
+    anterior = 0
+    for i in range(pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        # Média do próximo balde (ou o último ponto): terceiro vértice do triângulo
+        proximo_inicio, proximo_fim = fim, limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[proximo_inicio:proximo_fim].mean()
+        media_y = y[proximo_inicio:proximo_fim].mean()
+
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = anterior
+    return escolhidos
+
+@medido()
+def reduzir_serie(pivot_df, pontos_maximos=None):
+    """
+    Reduz uma série por data (saída de preparar_dados_grafico: índice date,
+    uma coluna por item) com LTTB. Com várias colunas, junta as datas
+    escolhidas em cada uma, dividindo o orçamento entre elas.
+    """
+    pontos_maximos = pontos_maximos or PONTOS_GRAFICO
+    if len(pivot_df) <= pontos_maximos:
+        return pivot_df
+    x = pd.DatetimeIndex(pivot_df.index).asi8
+    por_coluna = max(3, pontos_maximos // max(len(pivot_df.columns), 1))
+    linhas = set()
+    for coluna in pivot_df.columns:
+        valores = pivot_df[coluna].to_numpy(dtype=np.float64)
+        # Antes do primeiro movimento do item a coluna fica vazia
+        validos = np.flatnonzero(~np.isnan(valores))
+        if len(validos):
+            linhas.update(validos[lttb(x[validos], valores[validos], por_coluna)].tolist())
+    return pivot_df.iloc[sorted(linhas)]
+
+def rotulos_datas(datas, periodo="D", hoje=None):
+    """
+    Rótulos do eixo x; no gráfico diário o dia de hoje aparece como "Hoje"
+    """
+    rotulos = datas.dt.strftime(FORMATO_DATA[periodo]).tolist()
+    if periodo == "D" and hoje is not None and rotulos and rotulos[-1] == hoje.strftime(FORMATO_DATA["D"]):
+        rotulos[-1] = "Hoje"
+    return rotulos
+
+def figura_candles(candles, periodo="D", hoje=None):
+    """
+    Figura Plotly de candles (um item), com os rótulos do período
+    """
+    # Importado aqui: só quem mostra o gráfico paga o import do plotly
+    import plotly.graph_objects as go
+
+    nome_periodo = next(nome for chave, _, nome in PERIODOS if chave == periodo)
+    artigo = ARTIGO[nome_periodo]
+    datas = rotulos_datas(candles["date"], periodo, hoje)
+
+    # Create hover text
+    hover_texts = (
+        "Data: " + pd.Series(datas) +
+        f"<br>Início {artigo} {nome_periodo}: " + candles["open"].round().astype(int).astype(str).to_numpy() +
+        f"<br>Final {artigo} {nome_periodo}: " + candles["close"].round().astype(int).astype(str).to_numpy()
+    ).tolist()
+
+    fig = go.Figure()
+    fig.add_trace(go.Candlestick(
+        x=datas,
+        open=candles["open"].to_numpy(),
+        high=candles["high"].to_numpy(),
+        low=candles["low"].to_numpy(),
+        close=candles["close"].to_numpy(),
+        name='Quantidade',
+        increasing=dict(line=dict(color='#91cc75')),  # green for increase
+        decreasing=dict(line=dict(color='#ee6666')),  # red for decrease
+        text=hover_texts,
+        hoverinfo='text'
+    ))
+
+    # Update layout
+    fig.update_layout(
+        plot_bgcolor='white',
+        xaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='rgba(128,128,128,0.2)',
+            showline=True,
+            linewidth=1,
+            linecolor='rgba(128,128,128,0.2)',
+            rangeslider=dict(visible=False)  # Remove the range slider
+        ),
+        yaxis=dict(
+            title='Quantidade',
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='rgba(128,128,128,0.2)',
+            showline=True,
+            linewidth=1,
+            linecolor='rgba(128,128,128,0.2)'
+        ),
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+    return fig
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+from storage.base import TIMEZONE
+from utils.normalizacao_utils import como_datetime
+
+class IndiceEstoque:
+    """
+    Índices sobre os dados carregados, montados uma vez por versão dos dados.
+
+    Guarda as posições das transações de cada item e os itens de cada setor,
+    além dos dicionários nome -> id usados nos selectboxes. Consultar as
+    transações ou o saldo de um item custa O(k) nas k linhas dele, em vez de
+    varrer a tabela inteira a cada rerun. Os DataFrames são compartilhados:
+    tratar como somente leitura.
+    """
+
+    def __init__(self, items_df, transactions_df, people_df, projects_df, posicoes=None):
+        self.items_df = items_df
+        self.transactions_df = transactions_df
+        self.people_df = people_df
+        self.projects_df = projects_df
+
+        # item -> posições (crescentes) das suas linhas em transactions_df
+        self.posicoes = posicoes if posicoes is not None else _posicoes_por_item(transactions_df)
+
+        # setor -> posições dos seus itens em items_df
+        self.linhas_por_setor = (
+            items_df.groupby("sector", observed=True, sort=False).indices
+            if "sector" in items_df.columns and not items_df.empty else {}
+        )
+
+        self.item_por_nome = dict(zip(items_df["name"], items_df["id"]))
+        self.nome_item = dict(zip(items_df["id"], items_df["name"]))
+        self.pessoa_por_nome = _por_nome(people_df)
+        self.projeto_por_nome = _por_nome(projects_df)
+
+        self._por_setor = {}
+        self._saldos = None
+        self._acumulados = None
+
+    def itens(self, setor=None):
+        # Itens do setor (todos se setor for None ou "Todos")
+        if setor in (None, "Todos"):
+            return self.items_df
+        return self.items_df.take(self.linhas_por_setor.get(setor, []))
+
+    def itens_setor(self, setor):
+        return self.itens(setor)["id"].to_numpy()
+
+    def opcoes_itens(self, setor=None):
+        # Nome -> id dos itens do setor, na ordem da tabela de itens
+        if setor in (None, "Todos"):
+            return self.item_por_nome
+        itens = self.itens(setor)
+        return dict(zip(itens["name"], itens["id"]))
+
+    def transacoes_item(self, item_id):
+        return self.transactions_df.take(self.posicoes.get(item_id, []))
+
+    def transacoes_setor(self, setor):
+        if setor in (None, "Todos"):
+            return self.transactions_df
+        if setor not in self._por_setor:
+            posicoes = [self.posicoes[i] for i in self.itens_setor(setor) if i in self.posicoes]
+            # Juntar e ordenar mantém a ordem original das linhas
+            self._por_setor[setor] = np.sort(np.concatenate(posicoes)) if posicoes else np.array([], dtype=np.intp)
+        return self.transactions_df.take(self._por_setor[setor])
+
+    def saldo_item(self, item_id, saldos_df=None):
+        """
+        Saldo atual de um item: pelos saldos agregados, se houver, ou somando
+        só as transações dele
+        """
+        if saldos_df is not None:
+            if self._saldos is None or self._saldos[0] is not saldos_df:
+                self._saldos = (saldos_df, dict(zip(saldos_df["item"], saldos_df["amount"])))
+            return self._saldos[1].get(item_id, 0)
+        posicoes = self.posicoes.get(item_id)
+        if posicoes is None:
+            return 0
+        return self.transactions_df["amount"].to_numpy()[posicoes].sum()
+
+    @property
+    def acumulados(self):
+        # Montado só na primeira consulta por data
+        if self._acumulados is None:
+            self._acumulados = SaldosAcumulados(self.transactions_df)
+        return self._acumulados
+
+class SaldosAcumulados:
+    """
+    Saldo de todos os itens em qualquer instante passado.
+
+    As transações ficam ordenadas por (item, timestamp) com a soma acumulada.
+    Cada consulta faz uma busca binária por item (um único np.searchsorted
+    para todos) e custa O(itens * log n), sem somar o histórico de novo.
+    """
+
+    def __init__(self, transactions_df):
+        if transactions_df.empty:
+            self.itens = np.array([], dtype=np.int64)
+            self.instantes = np.array([], dtype=np.int64)
+            self.chaves = np.array([], dtype=np.int64)
+            self.acumulado = np.zeros(1, dtype=np.int64)
+            self.inicio = np.array([], dtype=np.intp)
+            return
+
+        codigos_item, self.itens = pd.factorize(transactions_df["item"].to_numpy(), sort=True)
+        instantes = pd.DatetimeIndex(como_datetime(transactions_df["timestamp"])).asi8
+        self.instantes, codigos_instante = np.unique(instantes, return_inverse=True)
+
+        # Chave única e ordenável para (item, instante)
+        self.chaves = codigos_item.astype(np.int64) * (len(self.instantes) + 1) + codigos_instante
+        ordem = np.argsort(self.chaves, kind="stable")
+        self.chaves = self.chaves[ordem]
+
+        # Soma acumulada global com um zero na frente: saldo = acumulado[fim] - acumulado[início do item]
+        quantidades = transactions_df["amount"].to_numpy()[ordem]
+        self.acumulado = np.concatenate([[0], np.cumsum(quantidades, dtype=np.result_type(quantidades.dtype, np.int64))])
+        self.inicio = np.searchsorted(self.chaves, np.arange(len(self.itens), dtype=np.int64) * (len(self.instantes) + 1))
+
+    def em(self, instante):
+        """
+        Saldos em `instante` (inclusive) como DataFrame item/amount, no formato
+        de saldos_df de calcular_saldo. Datas valem até o fim do dia.
+        """
+        limite = _instante(instante)
+        # Quantos instantes distintos são <= limite
+        posicao = np.searchsorted(self.instantes, limite, side="right")
+        fim = np.searchsorted(self.chaves, np.arange(len(self.itens), dtype=np.int64) * (len(self.instantes) + 1) + posicao)
+        return pd.DataFrame({
+            "item": self.itens,
+            "amount": self.acumulado[fim] - self.acumulado[self.inicio],
+        })
+
+def _instante(instante):
+    # datetime/Timestamp (sem fuso = horário de São Paulo) ou data (= fim do dia), em ns UTC
+    if not hasattr(instante, "hour"):
+        instante = pd.Timestamp(instante) + pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+    instante = pd.Timestamp(instante)
+    if instante.tzinfo is None:
+        instante = instante.tz_localize(TIMEZONE)
+    return instante.value
+
+def _posicoes_por_item(transactions_df):
+    if transactions_df.empty:
+        return {}
+    return transactions_df.groupby("item", observed=True, sort=False).indices
+
+def _por_nome(df):
+    if df.empty or "name" not in df.columns:
+        return {}
+    return dict(zip(df["name"], df["id"]))
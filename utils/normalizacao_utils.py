@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from storage.base import TIMEZONE
+
+def como_datetime(serie):
+    """
+    Timestamps como datetime64 no horário de São Paulo; não reprocessa se já estiverem
+    """
+    if isinstance(serie.dtype, pd.DatetimeTZDtype):
+        return serie if str(serie.dt.tz) == TIMEZONE else serie.dt.tz_convert(TIMEZONE)
+    return pd.to_datetime(serie, utc=True, format='ISO8601').dt.tz_convert(TIMEZONE)
+
+def _inteiro(serie, nullable=False):
+    # int32 quando couber (ids e quantidades), senão int64
+    valores = pd.to_numeric(serie)
+    if nullable or valores.isna().any():
+        return valores.astype("Int32" if _cabe_em_int32(valores) else "Int64")
+    if (valores % 1 != 0).any():
+        return valores.astype("float64")
+    return valores.astype("int32" if _cabe_em_int32(valores) else "int64")
+
+def _cabe_em_int32(valores):
+    limites = np.iinfo(np.int32)
+    return valores.empty or (valores.min() >= limites.min and valores.max() <= limites.max)
+
+def normalizar_transacoes(df):
+    """
+    Converte as transações para tipos compactos uma única vez, no carregamento:
+    ids int32, transaction_type categórico e timestamp datetime64 com fuso
+    """
+    if df.empty:
+        return df
+    # A chave de idempotência só serve no envio (fila): não ocupar memória com ela
+    df = df.drop(columns="idempotency_key", errors="ignore")
+    colunas = {}
+    for coluna in ("id", "item", "amount"):
+        if coluna in df.columns:
+            colunas[coluna] = _inteiro(df[coluna])
+    if "author" in df.columns:
+        colunas["author"] = _inteiro(df["author"], nullable=True)
+    if "transaction_type" in df.columns:
+        colunas["transaction_type"] = df["transaction_type"].astype("category")
+    if "timestamp" in df.columns:
+        colunas["timestamp"] = como_datetime(df["timestamp"])
+    return df.assign(**colunas)
+
+def normalizar_itens(df):
+    """
+    Itens com id int32 e sector/unit categóricos
+    """
+    if df.empty:
+        return df
+    colunas = {}
+    if "id" in df.columns:
+        colunas["id"] = _inteiro(df["id"])
+    for coluna in ("sector", "unit"):
+        if coluna in df.columns:
+            colunas[coluna] = df[coluna].astype("category")
+    return df.assign(**colunas)
+
+def concatenar_transacoes(atual, novas):
+    """
+    Junta transações já normalizadas sem perder os tipos (categorias diferentes
+    viram object num concat simples)
+    """
+    novas = normalizar_transacoes(novas)
+    if atual.empty:
+        return novas
+    if novas.empty:
+        return atual
+    df = pd.concat([atual, novas], ignore_index=True)
+    for coluna in atual.columns:
+        if isinstance(atual[coluna].dtype, pd.CategoricalDtype) and coluna in novas.columns:
+            df[coluna] = union_categoricals([atual[coluna], novas[coluna]], ignore_order=True)
+    return df
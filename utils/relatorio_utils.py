@@ -0,0 +1,140 @@
+import io
+from datetime import datetime, timedelta
+import pandas as pd
+import pytz
+from utils.normalizacao_utils import como_datetime
+from utils.desempenho_utils import medido
+
+ALTURA_LINHA = 10
+
+COLUNAS_TRANSACOES = ["Data/Hora", "Quantidade", "Nome do Item", "Tipo de Movimentação", "Observação"]
+
+@medido()
+def preparar_relatorio(items_df, transactions_df, saldos_df=None, dia=None, transacoes_dia=None):
+    """
+    Monta os dados do relatório: (transações do dia, saldo atual por item).
+    As transações do dia vêm do banco (carregar_historico), a não ser que
+    já venham prontas em `transacoes_dia` (ex.: relatorios.py).
+    """
+    # Importado aqui: estoque_utils depende do streamlit e do backend
+    from utils.estoque_utils import calcular_saldo, carregar_historico
+
+    saldo_df = calcular_saldo(items_df.copy(), transactions_df, saldos_df)
+    relatorio = saldo_df[["name", "unit", "Saldo Atual", "sector"]].rename(columns={
+        "name": "Nome",
+        "unit": "Unidade",
+        "sector": "Setor"
+    })
+
+    # Só as transações do dia, filtradas no banco pelo índice de "timestamp"
+    dia = dia or datetime.now(pytz.timezone('America/Sao_Paulo')).date()
+    transacoes_hoje = transacoes_dia if transacoes_dia is not None else carregar_historico(inicio=dia, fim=dia + timedelta(days=1))
+
+    # Initialize empty DataFrame for transactions if none exist
+    if transacoes_hoje.empty:
+        return pd.DataFrame(columns=COLUNAS_TRANSACOES), relatorio
+    transacoes_hoje = transacoes_hoje.assign(timestamp=como_datetime(transacoes_hoje["timestamp"]))
+
+    # Join transactions with items to get names for the report
+    transacoes_hoje = pd.merge(transacoes_hoje, items_df[["id", "name"]], left_on="item", right_on="id", how="left")
+
+    # Renomear colunas para português
+    transacoes_hoje = transacoes_hoje.rename(columns={
+        "timestamp": "Data/Hora",
+        "amount": "Quantidade",
+        "name": "Nome do Item",
+        "transaction_type": "Tipo de Movimentação",
+        "observation": "Observação"
+    })
+    # Mais recentes primeiro (já vêm assim do banco)
+    transacoes_hoje["Data/Hora"] = transacoes_hoje["Data/Hora"].dt.strftime("%d/%m/%Y %H:%M:%S")
+    return transacoes_hoje, relatorio
+
+def _texto_pdf(serie, limite=None):
+    # As fontes embutidas do FPDF só aceitam latin1: trata a coluna inteira de uma vez
+    texto = serie.astype(object).where(serie.notna(), "").astype(str)
+    if limite is not None:
+        texto = texto.str.slice(0, limite)
+    return texto.str.encode('latin1', 'replace').str.decode('latin1').tolist()
+
+def _tabela(pdf, larguras, linhas, cabecalho):
+    # Desenha as linhas repetindo o cabeçalho no topo de cada página nova
+    def desenhar_cabecalho():
+        pdf.set_font("Helvetica", style="B", size=12)
+        for i, (titulo, largura) in enumerate(zip(cabecalho, larguras)):
+            pdf.cell(largura, ALTURA_LINHA, titulo, border=1, align="C", ln=int(i == len(larguras) - 1))
+        pdf.set_font("Helvetica", size=12)
+
+    desenhar_cabecalho()
+    for linha in linhas:
+        if pdf.get_y() + ALTURA_LINHA > pdf.page_break_trigger:
+            pdf.add_page()
+            desenhar_cabecalho()
+        for i, (valor, largura) in enumerate(zip(linha, larguras)):
+            pdf.cell(largura, ALTURA_LINHA, valor, border=1, align="C", ln=int(i == len(larguras) - 1))
+
+@medido()
+def gerar_pdf(transacoes_hoje, relatorio, dia=None):
+    # Com `dia`, a data entra nos títulos (relatórios de dias passados)
+    sufixo = f" - {dia:%d/%m/%Y}" if dia is not None else ""
+    # Importado aqui: só quem gera o PDF paga o import do fpdf
+    from fpdf import FPDF
+
+    pdf = FPDF(orientation='L')  # Set landscape orientation
+    pdf.add_page()
+    
+    # Get page width (now using landscape dimensions)
+    page_width = pdf.w - 2 * pdf.l_margin
+    
+    # Movimentações do Dia primeiro
+    pdf.set_font("Helvetica", style="B", size=12)
+    pdf.cell(page_width, 10, txt=f"Movimentações do Dia{sufixo}", ln=True, align="C")
+    pdf.ln(5)
+    
+    # Sort transactions in reverse order (most recent first)
+    transacoes = transacoes_hoje.sort_values(by="Data/Hora", ascending=False)
+    observacoes = transacoes["Observação"] if "Observação" in transacoes.columns else pd.Series("", index=transacoes.index)
+    linhas = zip(
+        _texto_pdf(transacoes["Data/Hora"]),
+        _texto_pdf(transacoes["Quantidade"]),
+        _texto_pdf(transacoes["Nome do Item"], 30),
+        _texto_pdf(transacoes["Tipo de Movimentação"]),
+        _texto_pdf(observacoes, 30)
+    )
+    _tabela(
+        pdf,
+        [page_width * 0.2, page_width * 0.15, page_width * 0.3, page_width * 0.15, page_width * 0.2],
+        linhas,
+        ["Data/Hora", "Quantidade", "Nome do Item", "Tipo", "Observação"]
+    )
+    
+    pdf.ln(10)
+    
+    # Estoque Atual depois
+    pdf.set_font("Helvetica", style="B", size=12)
+    pdf.cell(page_width, 10, txt=f"Relatório Diário de Estoque{sufixo}", ln=True, align="C")
+    pdf.ln(5)
+    
+    stock_widths = [page_width * 0.5, page_width * 0.25, page_width * 0.25]
+    stock_header = ["Nome", "Unidade", "Saldo Atual"]
+    
+    # Group items by section
+    for section, group in relatorio.groupby("Setor", observed=True):
+        # Não deixar o título do setor sozinho no fim da página
+        if pdf.get_y() + 3 * ALTURA_LINHA > pdf.page_break_trigger:
+            pdf.add_page()
+        pdf.set_font("Helvetica", style="B", size=12)
+        pdf.cell(page_width, 10, f"Setor: {section}".encode('latin1', 'replace').decode('latin1'), ln=True)
+        
+        linhas = zip(
+            _texto_pdf(group["Nome"]),
+            _texto_pdf(group["Unidade"]),
+            _texto_pdf(group["Saldo Atual"])
+        )
+        _tabela(pdf, stock_widths, linhas, stock_header)
+        
+        pdf.ln(5)  # Add some space between sections
+    
+    pdf_bytes = pdf.output(dest='S').encode('latin1')
+    pdf_buffer = io.BytesIO(pdf_bytes)
+    return pdf_buffer
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Snapshot das transações em disco (Arrow IPC, lido via memory map) para
+# partidas a frio rápidas: carrega localmente e só busca o delta no banco.
+# O DataFrame é salvo já normalizado (normalizar_transacoes), então a leitura
+# não converte nada: as colunas numéricas apontam direto para o arquivo mapeado.
+SNAPSHOT_DIR = os.getenv("ESTOQUE_SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "estoque"))
+SNAPSHOT_MAX_AGE = float(os.getenv("ESTOQUE_SNAPSHOT_MAX_AGE", str(7 * 86400)))
+SNAPSHOT_SAVE_INTERVAL = float(os.getenv("ESTOQUE_SNAPSHOT_SAVE_INTERVAL", "60"))
+FORMATO = 1
+
+_ultimo_salvamento = {}
+# Um salvamento por vez; quem chegar durante um salvamento deixa para a próxima
+_salvando = threading.Lock()
+_sem_pyarrow = False
+
+def caminho_snapshot(origem):
+    # Um arquivo por origem de dados, para não misturar bancos diferentes
+    nome = hashlib.sha1(origem.encode()).hexdigest()[:16]
+    return os.path.join(SNAPSHOT_DIR, f"transactions-{nome}.arrow")
+
+def _checksum(df):
+    if df.empty:
+        return [0, 0]
+    return [int(df["id"].astype("int64").sum()), int(df["amount"].astype("int64").sum())]
+
+def salvar_snapshot(caminho, df, max_id, origem, sincronizado_em=None):
+    """
+    Grava as transações, a marca d'água (max_id) e quando a cópia veio de uma
+    sincronização completa (`sincronizado_em`) num arquivo Arrow IPC.
+    Escreve num arquivo temporário e troca no final para nunca deixar um
+    arquivo pela metade.
+    """
+    import pyarrow as pa
+
+    metadados = {
+        "formato": FORMATO,
+        "origem": origem,
+        "max_id": None if max_id is None else int(max_id),
+        "linhas": len(df),
+        "checksum": _checksum(df),
+        "salvo_em": time.time(),
+        "sincronizado_em": sincronizado_em,
+    }
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        b"estoque": json.dumps(metadados).encode(),
+    })
+
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with pa.OSFile(temporario, "wb") as arquivo:
+        with pa.ipc.new_file(arquivo, tabela.schema) as writer:
+            writer.write_table(tabela)
+    os.replace(temporario, caminho)
+
+def carregar_snapshot(caminho, origem):
+    """
+    Lê o snapshot via memory map. Retorna (df, max_id, sincronizado_em) ou None se
+    o arquivo não existir, for de outra origem/formato, estiver velho demais
+    ou corrompido (nesses dois últimos casos o arquivo é apagado para ser refeito).
+
+    Colunas numéricas sem nulos ficam no arquivo mapeado (somente leitura,
+    sem cópia); texto, categorias e colunas com nulos são convertidos.
+    """
+    if not os.path.exists(caminho):
+        return None
+    try:
+        import pyarrow as pa
+
+        # Sem fechar o mapa: as colunas do DataFrame continuam apontando para ele
+        tabela = pa.ipc.open_file(pa.memory_map(caminho, "r")).read_all()
+        metadados = json.loads(tabela.schema.metadata[b"estoque"])
+
+        if metadados["formato"] != FORMATO or metadados["origem"] != origem:
+            return None
+        if time.time() - metadados["salvo_em"] > SNAPSHOT_MAX_AGE:
+            raise ValueError("snapshot too old")
+
+        # split_blocks: uma coluna por bloco, sem juntar (copiar) as de mesmo tipo
+        df = tabela.to_pandas(split_blocks=True)
+        if len(df) != metadados["linhas"] or _checksum(df) != metadados["checksum"]:
+            raise ValueError("snapshot checksum mismatch")
+        sincronizado_em = metadados.get("sincronizado_em") or metadados["salvo_em"]
+        return df, metadados["max_id"], sincronizado_em
+    except Exception as e:
+        print(f"Discarding transaction snapshot {caminho}: {str(e)}")
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+        return None
+
+def restaurar_do_disco(store, origem):
+    """
+    Numa partida a frio, preenche o store com o snapshot em disco. A
+    sincronização seguinte busca só o delta e confere o resumo da tabela.
+    """
+    if origem is None or store.last_full_sync is not None:
+        return False
+    resultado = carregar_snapshot(caminho_snapshot(origem), origem)
+    if resultado is None:
+        return False
+    store.restaurar(*resultado)
+    return True
+
+def persistir_no_disco(store, origem, em_segundo_plano=True):
+    """
+    Grava o store em disco se ele mudou, no máximo a cada SNAPSHOT_SAVE_INTERVAL
+    segundos (ou logo após uma sincronização completa). A gravação roda numa
+    thread à parte, fora do lock de carga; retorna essa thread (ou None)
+    """
+    if origem is None or store.last_full_sync is None or _sem_pyarrow:
+        return None
+    caminho = caminho_snapshot(origem)
+    versao, salvo_em = _ultimo_salvamento.get(caminho, (None, 0))
+    if versao == store.versao:
+        return None
+    sincronizacao_completa = store.itens_alterados is None
+    if not sincronizacao_completa and time.monotonic() - salvo_em < SNAPSHOT_SAVE_INTERVAL:
+        return None
+    if not _salvando.acquire(blocking=False):
+        return None
+    # O store troca o DataFrame a cada mudança (nunca altera no lugar), então
+    # basta guardar as referências de agora
+    argumentos = (caminho, store.df, store.max_id, origem, store.last_full_sync, store.versao)
+    if not em_segundo_plano:
+        _salvar(*argumentos)
+        return None
+    thread = threading.Thread(target=_salvar, args=argumentos, name="estoque-snapshot", daemon=True)
+    thread.start()
+    return thread
+
+def _salvar(caminho, df, max_id, origem, sincronizado_em, versao):
+    global _sem_pyarrow
+    try:
+        salvar_snapshot(caminho, df, max_id, origem, sincronizado_em)
+        _ultimo_salvamento[caminho] = (versao, time.monotonic())
+    except ImportError:
+        # pyarrow é opcional: sem ele, sem snapshot em disco (e sem tentar de novo)
+        _sem_pyarrow = True
+    except Exception as e:
+        print(f"Error saving transaction snapshot {caminho}: {str(e)}")
+    finally:
+        _salvando.release()
@@ -1,12 +1,15 @@
 from config.supabase_config import get_supabase_client
+from utils.fetch_utils import buscar_registros
+
+# Linhas por requisição nas operações em lote
+CHUNK_SIZE = 500
 
 def get_all_products():
     """
     Retorna todos os produtos do banco de dados
     """
     supabase = get_supabase_client()
-    response = supabase.table('products').select("*").execute()
-    return response.data
+    return buscar_registros(supabase, 'products')
 
 def add_product(name, description, price, quantity):
     """
@@ -22,6 +25,23 @@ def add_product(name, description, price, quantity):
     response = supabase.table('products').insert(data).execute()
     return response.data
 
+def upsert_products(products, chunk_size=CHUNK_SIZE, supabase=None):
+    """
+    Insere ou atualiza vários produtos, uma requisição por lote de `chunk_size`.
+    Produtos com 'id' são atualizados (ou criados com esse id); sem 'id', inseridos.
+    """
+    supabase = supabase or get_supabase_client()
+    # O PostgREST exige as mesmas colunas em todas as linhas de uma requisição
+    com_id = [product for product in products if product.get('id') is not None]
+    sem_id = [{k: v for k, v in product.items() if k != 'id'} for product in products if product.get('id') is None]
+
+    data = []
+    for inicio in range(0, len(com_id), chunk_size):
+        data.extend(supabase.table('products').upsert(com_id[inicio:inicio + chunk_size]).execute().data)
+    for inicio in range(0, len(sem_id), chunk_size):
+        data.extend(supabase.table('products').insert(sem_id[inicio:inicio + chunk_size]).execute().data)
+    return data
+
 def update_product_quantity(product_id, new_quantity):
     """
     Atualiza a quantidade de um produto
@@ -30,10 +50,46 @@ def update_product_quantity(product_id, new_quantity):
     response = supabase.table('products').update({'quantity': new_quantity}).eq('id', product_id).execute()
     return response.data
 
+def increment_product_quantity(product_id, delta, supabase=None):
+    """
+    Soma `delta` à quantidade de um produto de forma atômica no banco
+    (sql/005_product_quantity.sql): escritas concorrentes não se perdem
+    """
+    return increment_product_quantities([(product_id, delta)], supabase=supabase)
+
+def decrement_product_quantity(product_id, amount):
+    """
+    Subtrai `amount` da quantidade de um produto de forma atômica
+    """
+    return increment_product_quantity(product_id, -amount)
+
+def increment_product_quantities(changes, chunk_size=CHUNK_SIZE, supabase=None):
+    """
+    Aplica vários incrementos atômicos ({id: delta} ou lista de (id, delta)),
+    uma chamada por lote de `chunk_size`. Retorna os produtos atualizados.
+    Única implementação do RPC: SupabaseBackend.incrementar_quantidades usa esta.
+    """
+    if isinstance(changes, dict):
+        changes = changes.items()
+    # Deltas do mesmo id somados aqui, como no banco, para não cair em lotes diferentes
+    deltas = {}
+    for product_id, delta in changes:
+        deltas[product_id] = deltas.get(product_id, 0) + delta
+    changes = [{'id': product_id, 'delta': delta} for product_id, delta in deltas.items()]
+    if not changes:
+        return []
+
+    supabase = supabase or get_supabase_client()
+    data = []
+    for inicio in range(0, len(changes), chunk_size):
+        response = supabase.rpc('increment_product_quantities', {'p_changes': changes[inicio:inicio + chunk_size]}).execute()
+        data.extend(response.data)
+    return data
+
 def delete_product(product_id):
     """
     Remove um produto do banco de dados
     """
     supabase = get_supabase_client()
     response = supabase.table('products').delete().eq('id', product_id).execute()
-    return response.data 
\ No newline at end of file
+    return response.data
@@ -0,0 +1,275 @@
+import math
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+import numpy as np
+import pandas as pd
+from utils.normalizacao_utils import concatenar_transacoes, normalizar_transacoes
+
+class TransactionStore:
+    """
+    Cópia local da tabela de transações, sincronizada de forma incremental.
+
+    Guarda o maior `id` já recebido (high-water mark) e, a cada sincronização,
+    busca apenas as linhas mais novas, junto com o resumo da tabela (contagem
+    e somas de conferência). Se o resumo do banco não bater com a cópia local
+    (edição/remoção) ou se a cópia estiver há tempo demais sem uma
+    sincronização completa, recarrega a tabela inteira.
+
+    `itens_alterados` diz quais itens mudaram na última sincronização
+    (None quando a tabela foi recarregada inteira), para que caches
+    derivados invalidem só o necessário.
+    """
+
+    def __init__(self, resync_interval=300):
+        self.resync_interval = resync_interval
+        self.df = pd.DataFrame()
+        self.max_id = None
+        self.last_full_sync = None
+        # Início do intervalo de ressincronização: última carga completa ou restauração
+        self.intervalo_desde = None
+        self.itens_alterados = None
+
+    def sync(self, backend):
+        # Primeira carga ou intervalo de ressincronização vencido: sincronização completa
+        if self.last_full_sync is None or time.time() - self.intervalo_desde > self.resync_interval:
+            return self.full_sync(backend)
+
+        # Buscar apenas as transações novas, com o resumo da tabela na mesma consulta
+        delta_df, resumo = backend.carregar_delta(self.max_id)
+
+        if not delta_df.empty:
+            # Linhas já aplicadas localmente voltam no delta: ficar com a versão do banco
+            self.df = concatenar_transacoes(self.df, delta_df).drop_duplicates("id", keep="last", ignore_index=True)
+            self.max_id = delta_df["id"].max()
+        self.itens_alterados = set(delta_df["item"]) if not delta_df.empty else set()
+
+        # Contagem ou somas diferentes indicam linhas editadas ou removidas no banco
+        if not resumo_confere(resumo, self.df):
+            return self.full_sync(backend)
+
+        return self.df
+
+    def full_sync(self, backend):
+        # Tipos compactos e timestamps convertidos uma vez só, aqui
+        self.df = normalizar_transacoes(backend.carregar_transacoes())
+        self.max_id = self.df["id"].max() if not self.df.empty else None
+        self.last_full_sync = time.time()
+        self.intervalo_desde = self.last_full_sync
+        self.itens_alterados = None
+        return self.df
+
+    def restaurar(self, df, max_id, sincronizado_em):
+        """
+        Parte de uma cópia já normalizada (ex.: snapshot em disco) em vez de
+        baixar tudo. `sincronizado_em` é quando essa cópia veio de uma carga
+        completa. A próxima sincronização busca só o delta e confere o resumo,
+        recarregando tudo só se ele não bater; o intervalo de ressincronização
+        conta a partir da restauração.
+        """
+        self.df = df
+        self.max_id = max_id
+        self.last_full_sync = sincronizado_em
+        self.intervalo_desde = time.time()
+        self.itens_alterados = None
+
+    def aplicar(self, linhas):
+        """
+        Acrescenta linhas recém-inseridas (como devolvidas pelo banco) sem
+        consultar o banco de novo. O max_id não avança: a próxima sincronização
+        ainda busca tudo depois dele, inclusive escritas de outras sessões.
+        """
+        novas = pd.DataFrame([linha for linha in linhas if linha])
+        if novas.empty:
+            return self.df
+        self.df = concatenar_transacoes(self.df, novas).drop_duplicates("id", keep="last", ignore_index=True)
+        return self.df
+
+    @property
+    def versao(self):
+        # Muda sempre que a cópia local muda: serve de chave para caches derivados
+        return (self.max_id, len(self.df), self.last_full_sync)
+
+    def invalidate(self):
+        self.last_full_sync = None
+
+def resumo_transacoes(df):
+    """
+    Contagem e somas de conferência das transações, como as de
+    EstoqueBackend.carregar_delta: "soma" muda quando uma quantidade é
+    editada; as assinaturas (ponderadas pelo id) mudam quando uma linha é
+    trocada por outra, mesmo com a mesma contagem e a mesma soma
+    """
+    if df.empty:
+        return {"linhas": 0, "soma": 0, "assinatura": 0, "assinatura_item": 0}
+    ids = df["id"].to_numpy(dtype=np.int64)
+    quantidades = df["amount"].to_numpy()
+    if quantidades.dtype.kind in "iu":
+        quantidades = quantidades.astype(np.int64)
+    return {
+        "linhas": len(df),
+        "soma": quantidades.sum().item(),
+        "assinatura": (ids * quantidades).sum().item(),
+        "assinatura_item": (ids * df["item"].to_numpy(dtype=np.int64)).sum().item(),
+    }
+
+def resumo_confere(resumo, df):
+    # Compara só o que o backend informou (alguns só dão a contagem)
+    local = resumo_transacoes(df)
+    return all(_mesmo_numero(valor, local[chave]) for chave, valor in resumo.items() if chave in local)
+
+def _mesmo_numero(a, b):
+    # Inteiros (ou Decimal do Postgres) exatos; quantidades fracionárias com tolerância
+    if float(a).is_integer() and float(b).is_integer():
+        return int(a) == int(b)
+    return math.isclose(float(a), float(b), rel_tol=1e-9)
+
+class SharedSnapshot:
+    """
+    Snapshot dos dados compartilhado por todas as sessões do processo.
+
+    Fica válido por `ttl` segundos ou até `invalidar()`. Quando vence, só
+    uma sessão recarrega (single-flight): as outras esperam no lock e
+    reaproveitam o resultado. Também guarda caches derivados (saldos,
+    dados por item), com versão por item para invalidar só o que mudou.
+    A memória não cresce com o número de sessões: os DataFrames são
+    compartilhados e devem ser tratados como somente leitura.
+
+    Uma sessão pode estar calculando com um DataFrame de transações mais
+    antigo que o atual; por isso as versões por item ficam registradas por
+    geração (cada DataFrame que o store já teve) e o cache por item guarda
+    o valor sob a versão dos dados de quem calculou.
+    """
+
+    # Gerações lembradas: sessões com dados mais antigos calculam sem cache
+    GERACOES = 8
+    # Valores por item guardados (os menos usados saem primeiro)
+    MAX_CACHE_ITENS = int(os.getenv("ESTOQUE_CACHE_ITENS", "1024"))
+
+    def __init__(self, ttl=None, resync_interval=300):
+        self.ttl = ttl if ttl is not None else float(os.getenv("ESTOQUE_SNAPSHOT_TTL", "5"))
+        self.resync_interval = resync_interval
+        self.lock = threading.Lock()
+        # Versões e cache por item: separado do `lock`, que fica preso durante a carga
+        self.lock_versoes = threading.Lock()
+        self.limpar()
+
+    def limpar(self):
+        self.store = TransactionStore(self.resync_interval)
+        self.dados = None
+        self.atualizado_em = None
+        self.epoca = 0
+        self.versoes_itens = {}
+        self.geracoes = deque(maxlen=self.GERACOES)
+        self.cache = {}
+        self.cache_itens = OrderedDict()
+
+    def _fresco(self):
+        return self.atualizado_em is not None and time.monotonic() - self.atualizado_em < self.ttl
+
+    def obter(self, carregar):
+        """
+        Retorna (dados, transações, tempos). `carregar(store)` sincroniza o
+        store e devolve (dados, tempos) das demais tabelas; só é chamado se o
+        snapshot estiver vencido, e por uma única thread de cada vez.
+        """
+        if self._fresco():
+            return self.dados, self.store.df, {}
+        with self.lock:
+            # Outra sessão pode ter recarregado enquanto esperávamos
+            if self._fresco():
+                return self.dados, self.store.df, {}
+            dados, tempos = carregar(self.store)
+            self._marcar_alterados(self.store.itens_alterados)
+            self.dados = dados
+            self.atualizado_em = time.monotonic()
+            return dados, self.store.df, tempos
+
+    def aplicar(self, linhas):
+        """
+        Aplica linhas recém-inseridas e devolve (versão anterior, versão nova)
+        """
+        with self.lock:
+            anterior = self.store.versao
+            self.store.aplicar(linhas)
+            self._marcar_alterados({linha["item"] for linha in linhas if linha})
+            return anterior, self.store.versao
+
+    def invalidar(self):
+        # A próxima leitura vai ao banco (sincronização incremental)
+        self.atualizado_em = None
+
+    @property
+    def versao(self):
+        return self.store.versao
+
+    def versao_item(self, item_id, transactions_df=None):
+        """
+        Versão das transações de `item_id` em `transactions_df` (padrão: os
+        dados atuais). None se esse DataFrame é antigo demais para saber.
+        """
+        with self.lock_versoes:
+            return self._versao_item(item_id, transactions_df)
+
+    def _versao_item(self, item_id, transactions_df=None):
+        if transactions_df is None:
+            return (self.epoca, self.versoes_itens.get(item_id, 0))
+        geracao = self._geracao(transactions_df)
+        return (geracao[1], geracao[2].get(item_id, 0)) if geracao is not None else None
+
+    def versao_de(self, transactions_df):
+        """
+        `versao` de quando `transactions_df` era o DataFrame atual (None se antigo demais)
+        """
+        with self.lock_versoes:
+            geracao = self._geracao(transactions_df)
+            return geracao[3] if geracao is not None else None
+
+    def _geracao(self, transactions_df):
+        for geracao in reversed(self.geracoes):
+            if geracao[0]() is transactions_df:
+                return geracao
+        return None
+
+    def cache_por_item(self, item_id, nome, calcular, transactions_df=None):
+        """
+        Valor derivado de um item, calculado por `calcular()` a partir de
+        `transactions_df`. Guardado sob a versão desses dados, e só se ela
+        ainda for a atual: um cálculo com dados antigos nunca entra no cache.
+        """
+        with self.lock_versoes:
+            chave = self._versao_item(item_id, transactions_df)
+            guardado = self.cache_itens.get((item_id, nome))
+            if chave is not None and guardado is not None and guardado[0] == chave:
+                self.cache_itens.move_to_end((item_id, nome))
+                return guardado[1]
+        valor = calcular()
+        if chave is None:
+            return valor
+        with self.lock_versoes:
+            if chave == self._versao_item(item_id):
+                self.cache_itens[(item_id, nome)] = (chave, valor)
+                self.cache_itens.move_to_end((item_id, nome))
+                while len(self.cache_itens) > self.MAX_CACHE_ITENS:
+                    self.cache_itens.popitem(last=False)
+        return valor
+
+    def _marcar_alterados(self, item_ids):
+        # item_ids None: a tabela inteira foi recarregada
+        with self.lock_versoes:
+            if item_ids is None:
+                self.epoca += 1
+                self.versoes_itens = {}
+                self.cache_itens = OrderedDict()
+            else:
+                for item_id in item_ids:
+                    self.versoes_itens[item_id] = self.versoes_itens.get(item_id, 0) + 1
+
+            # As versões acima valem para o DataFrame atual do store
+            geracao = (weakref.ref(self.store.df), self.epoca, dict(self.versoes_itens), self.store.versao)
+            if self.geracoes and self.geracoes[-1][0]() is self.store.df:
+                self.geracoes[-1] = geracao
+            else:
+                self.geracoes.append(geracao)